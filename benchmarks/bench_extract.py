@@ -0,0 +1,185 @@
+"""
+Extraction benchmark harness
+اندازه‌گیری زمان، گذردهی و حافظه extract_images روی پیکره مصنوعی
+
+مثال:
+    python benchmarks/bench_extract.py --output results.json
+    python benchmarks/bench_extract.py --quick --compare results.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+
+
+BACKENDS = ("pdf", "docx", "pptx")
+
+
+def _silent(*_):
+    pass
+
+
+def _measure(document_path, options):
+    """
+    اجرای یک استخراج در پردازه تازه و اندازه‌گیری آن
+
+    پردازه جداگانه لازم است چون حداکثر RSS فقط رو به افزایش است و اجراهای قبلی
+    اندازه‌گیری را آلوده می‌کنند.
+    """
+    from cli_extractor import extract_images
+    from utils import get_memory_usage, get_peak_memory_usage
+
+    baseline_rss = get_memory_usage()
+    started = time.perf_counter()
+    outputs = extract_images(document_path, log=_silent, **options)
+    elapsed = time.perf_counter() - started
+    output_bytes = sum(os.path.getsize(path) for path in outputs or [])
+    return {
+        'seconds': elapsed,
+        'images': len(outputs or []),
+        'output_bytes': output_bytes,
+        'peak_rss': get_peak_memory_usage(),
+        'baseline_rss': baseline_rss,
+    }
+
+
+def run_scenario(workdir, scenario, repeat, options):
+    """
+    ساخت سند یک سناریو و اندازه‌گیری آن repeat بار
+
+    Returns:
+        dict: پارامترهای سناریو به همراه میانه معیارها
+    """
+    name = "{backend}-{codec}-p{pages}-i{images_per_page}-s{image_size}-d{duplicate_ratio}".format(**scenario)
+    scenario_dir = os.path.join(workdir, name)
+    os.makedirs(scenario_dir)
+    document_path = os.path.join(scenario_dir, f"document.{scenario['backend']}")
+    total_images = corpus.write_document(document_path, **scenario)
+    input_bytes = os.path.getsize(document_path)
+
+    runs = []
+    for _ in range(repeat):
+        shutil.rmtree(os.path.join(scenario_dir, "extracted_images"), ignore_errors=True)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            runs.append(executor.submit(_measure, document_path, options).result())
+
+    seconds = statistics.median(run['seconds'] for run in runs)
+    images = runs[0]['images']
+    peak_rss = [run['peak_rss'] for run in runs if run['peak_rss'] is not None]
+    return dict(
+        scenario,
+        name=name,
+        source_images=total_images,
+        input_bytes=input_bytes,
+        images=images,
+        output_bytes=runs[0]['output_bytes'],
+        seconds=seconds,
+        seconds_min=min(run['seconds'] for run in runs),
+        images_per_second=images / seconds if seconds else None,
+        bytes_per_second=input_bytes / seconds if seconds else None,
+        peak_rss=max(peak_rss) if peak_rss else None,
+        peak_rss_delta=max(run['peak_rss'] - run['baseline_rss'] for run in runs) if peak_rss else None,
+    )
+
+
+def build_scenarios(args):
+    """ساخت ماتریس سناریوها از آرگومان‌ها"""
+    for backend, codec, pages, images_per_page, image_size, duplicate_ratio in itertools.product(
+            args.backends, args.codecs, args.pages, args.images_per_page, args.image_sizes, args.duplicate_ratios):
+        yield {
+            'backend': backend,
+            'codec': codec,
+            'pages': pages,
+            'images_per_page': images_per_page,
+            'image_size': image_size,
+            'duplicate_ratio': duplicate_ratio,
+        }
+
+
+def environment():
+    """نسخه‌های مؤثر بر نتایج، برای مقایسه بین ارتقاها"""
+    import PIL
+    import pypdf
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pillow': PIL.__version__,
+        'pypdf': pypdf.__version__,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(baseline_path, results):
+    """چاپ نسبت زمان هر سناریو به اجرای پایه"""
+    with open(baseline_path, "r", encoding="utf-8") as fp:
+        baseline = {item['name']: item for item in json.load(fp)['results']}
+    print(f"{'scenario':<48} {'base s':>9} {'new s':>9} {'ratio':>7}")
+    for item in results:
+        base = baseline.get(item['name'])
+        if base is None:
+            continue
+        ratio = item['seconds'] / base['seconds'] if base['seconds'] else float("nan")
+        flag = "  ⚠️" if ratio > 1.10 else ""
+        print(f"{item['name']:<48} {base['seconds']:>9.4f} {item['seconds']:>9.4f} {ratio:>7.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک استخراج تصاویر روی اسناد مصنوعی")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--codecs", nargs="+", choices=corpus.CODECS, default=list(corpus.CODECS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[20])
+    parser.add_argument("--images-per-page", nargs="+", type=int, default=[2])
+    parser.add_argument("--image-sizes", nargs="+", type=int, default=[512])
+    parser.add_argument("--duplicate-ratios", nargs="+", type=float, default=[0.3])
+    parser.add_argument("--repeat", type=int, default=3, help="تعداد تکرار هر سناریو (میانه گزارش می‌شود)")
+    parser.add_argument("--quick", action="store_true", help="سناریوهای کوچک برای بررسی سریع")
+    parser.add_argument("--workers", type=int, default=1, help="گزینه --workers برای PDF")
+    parser.add_argument("--output-profile", choices=sorted(PROFILES), help="پروفایل خروجی استخراج")
+    parser.add_argument("--output", help="مسیر فایل JSON نتایج")
+    parser.add_argument("--compare", metavar="BASELINE", help="مقایسه با یک فایل JSON قبلی")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.pages, args.image_sizes, args.repeat = [4], [128], 1
+
+    options = {'workers': args.workers}
+    if args.output_profile:
+        from profiles import get_profile
+        options['profile'] = get_profile(args.output_profile)
+    results = []
+    workdir = tempfile.mkdtemp(prefix="image-extractor-bench-")
+    try:
+        for scenario in build_scenarios(args):
+            result = run_scenario(workdir, scenario, args.repeat, options)
+            results.append(result)
+            print(f"{result['name']:<48} {result['seconds']:.4f}s "
+                  f"{result['images_per_second']:.1f} img/s "
+                  f"{result['bytes_per_second'] / (1024 * 1024):.2f} MB/s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'environment': environment(), 'options': dict(options, profile=args.output_profile), 'results': results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
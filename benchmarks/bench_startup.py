@@ -0,0 +1,118 @@
+"""
+CLI startup benchmark
+اندازه‌گیری زمان راه‌اندازی رابط خط فرمان در پردازه‌های تازه
+
+مثال:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 150 --importtime
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+CLI = os.path.join(SRC, "cli_extractor.py")
+
+# ماژول‌هایی که نباید برای فرمت‌های دیگر بارگذاری شوند
+HEAVY_MODULES = ("pypdf", "PIL.Image", "numpy", "sqlite3", "concurrent.futures")
+
+_CHECK_MODULES = (
+    "import sys, cli_extractor\n"
+    "cli_extractor.extract_images({path!r}, log=lambda *_: None)\n"
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))\n"
+)
+
+
+def _run(args, env=None):
+    started = time.perf_counter()
+    completed = subprocess.run(args, cwd=SRC, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return time.perf_counter() - started, completed
+
+
+def measure(name, args, repeat):
+    """
+    اجرای یک فرمان repeat بار و گزارش میانه زمان دیواری
+
+    Returns:
+        dict: نام سناریو، میانه و کمینه زمان به میلی‌ثانیه
+    """
+    _run(args)  # گرم کردن حافظه نهان فایل‌ها و __pycache__
+    samples = [_run(args)[0] for _ in range(repeat)]
+    return {'name': name, 'median_ms': statistics.median(samples) * 1000, 'min_ms': min(samples) * 1000}
+
+
+def _write_docx(directory):
+    import zipfile
+    path = os.path.join(directory, "startup.docx")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", "<w:document/>")
+        # کوچک‌ترین GIF معتبر؛ بدون تبدیل نوشته می‌شود
+        archive.writestr("word/media/image1.gif", bytes.fromhex(
+            "47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b"))
+    return path
+
+
+def loaded_modules(document_path):
+    """ماژول‌های سنگینی که پس از استخراج یک سند بارگذاری شده‌اند"""
+    code = _CHECK_MODULES.format(path=document_path, heavy=HEAVY_MODULES)
+    _, completed = _run([sys.executable, "-c", code])
+    output = completed.stdout.decode().strip().splitlines()
+    return [name for name in (output[-1] if output else "").split(",") if name]
+
+
+def import_profile(top):
+    """
+    سنگین‌ترین ماژول‌ها در import cli_extractor بر اساس زمان تجمعی (-X importtime)
+
+    Returns:
+        list: (زمان تجمعی به میکروثانیه، نام ماژول)
+    """
+    _, completed = _run([sys.executable, "-X", "importtime", "-c", "import cli_extractor"])
+    rows = []
+    for line in completed.stderr.decode().splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.split("|", 1)[0].split(":") + line.split("|")[1:])
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="بنچمارک زمان راه‌اندازی CLI")
+    parser.add_argument("--repeat", type=int, default=10, help="تعداد اجرای هر سناریو (پیش‌فرض: 10)")
+    parser.add_argument("--budget-ms", type=float, help="خطا اگر میانه زمان --help از این مقدار بیشتر باشد")
+    parser.add_argument("--importtime", action="store_true", help="نمایش سنگین‌ترین importها")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="image-extractor-startup-") as workdir:
+        document = _write_docx(workdir)
+        results = [
+            measure("python -c pass", [sys.executable, "-c", "pass"], args.repeat),
+            measure("import cli_extractor", [sys.executable, "-c", "import cli_extractor"], args.repeat),
+            measure("cli --help", [sys.executable, CLI, "--help"], args.repeat),
+            measure("cli docx", [sys.executable, CLI, document], args.repeat),
+        ]
+        heavy = loaded_modules(document)
+
+    for result in results:
+        print(f"{result['name']:<24} {result['median_ms']:>8.1f} ms (min {result['min_ms']:.1f})")
+    print(f"ماژول‌های سنگین بارگذاری شده برای DOCX: {', '.join(heavy) if heavy else 'هیچ'}")
+
+    if args.importtime:
+        for cumulative, name in import_profile(15):
+            print(f"{cumulative / 1000:>8.1f} ms  {name}")
+
+    help_ms = results[2]['median_ms']
+    if args.budget_ms is not None and help_ms > args.budget_ms:
+        print(f"⚠️ زمان راه‌اندازی {help_ms:.1f}ms از بودجه {args.budget_ms:.1f}ms بیشتر است")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Synthetic document corpora for benchmarks
+تولید اسناد مصنوعی PDF/DOCX/PPTX به صورت آفلاین برای اندازه‌گیری کارایی
+"""
+
+import io
+import random
+import zipfile
+import zlib
+
+from PIL import Image
+from pypdf import PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject
+
+
+CODECS = ("jpeg", "png", "jp2")
+
+_ZIP_LAYOUT = {
+    "docx": ("word/media/", "word/document.xml"),
+    "pptx": ("ppt/media/", "ppt/slides/slide1.xml"),
+}
+
+
+def make_image(seed, size, mode="RGB"):
+    """
+    ساخت یک تصویر نویزی قطعی (برای اینکه فشرده‌سازی واقع‌بینانه باشد)
+
+    Args:
+        seed (int): بذر تصادفی؛ بذر یکسان تصویر یکسان می‌دهد
+        size (int): طول ضلع تصویر به پیکسل
+    """
+    rng = random.Random(seed)
+    # نویز کوچک بزرگ‌نمایی شده شبیه عکس است؛ نویز خالص به شکل غیرواقعی فشرده‌ناپذیر است
+    small = max(2, size // 8)
+    count = small * small * len(mode)
+    noise = Image.frombytes(mode, (small, small), rng.getrandbits(count * 8).to_bytes(count, "little"))
+    return noise.resize((size, size), Image.BICUBIC)
+
+
+def encode_image(img, codec):
+    """کدگذاری تصویر با کدک داده شده"""
+    buffer = io.BytesIO()
+    if codec == "jpeg":
+        img.save(buffer, format="JPEG", quality=85)
+    elif codec == "png":
+        img.save(buffer, format="PNG")
+    elif codec == "jp2":
+        img.save(buffer, format="JPEG2000")
+    else:
+        raise ValueError(f"کدک ناشناخته: {codec}")
+    return buffer.getvalue()
+
+
+def image_seeds(count, duplicate_ratio, seed=0):
+    """
+    تولید فهرست بذرها با نسبت تکراری مشخص
+
+    Returns:
+        list: بذر هر تصویر؛ حدود duplicate_ratio از آن‌ها تکرار بذرهای قبلی‌اند
+    """
+    rng = random.Random(seed)
+    seeds = []
+    for i in range(count):
+        if seeds and rng.random() < duplicate_ratio:
+            seeds.append(rng.choice(seeds))
+        else:
+            seeds.append(i + 1)
+    return seeds
+
+
+def _pdf_image_xobject(writer, img, codec):
+    stream = DecodedStreamObject()
+    if codec == "png":
+        # PNG در PDF به صورت پیکسل‌های خام با FlateDecode ذخیره می‌شود
+        stream.set_data(zlib.compress(img.tobytes()))
+        filter_name = "/FlateDecode"
+    else:
+        stream.set_data(encode_image(img, codec))
+        filter_name = "/DCTDecode" if codec == "jpeg" else "/JPXDecode"
+    stream.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(img.width),
+        NameObject("/Height"): NumberObject(img.height),
+        NameObject("/ColorSpace"): NameObject("/DeviceRGB"),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+        NameObject("/Filter"): NameObject(filter_name),
+    })
+    return writer._add_object(stream)
+
+
+def write_pdf(path, pages, images_per_page, image_size, duplicate_ratio, codec, seed=0):
+    """
+    ساخت PDF با pypdf که هر صفحه images_per_page تصویر XObject دارد
+
+    Returns:
+        int: تعداد کل تصاویر
+    """
+    writer = PdfWriter()
+    seeds = image_seeds(pages * images_per_page, duplicate_ratio, seed)
+    for page_index in range(pages):
+        page = writer.add_blank_page(width=612, height=792)
+        resources = DictionaryObject()
+        names = DictionaryObject()
+        content = []
+        for slot in range(images_per_page):
+            image_seed = seeds[page_index * images_per_page + slot]
+            # هر تکرار یک شیء جداست (مثل اسناد واقعی) تا حذف تکراری بر اساس محتوا سنجیده شود
+            ref = _pdf_image_xobject(writer, make_image(image_seed, image_size), codec)
+            name = f"/Im{slot}"
+            names[NameObject(name)] = ref
+            content.append(f"q 100 0 0 100 {50 + slot * 110} 600 cm {name} Do Q")
+        resources[NameObject("/XObject")] = names
+        page[NameObject("/Resources")] = resources
+        content_stream = DecodedStreamObject()
+        content_stream.set_data("\n".join(content).encode())
+        page[NameObject("/Contents")] = writer._add_object(content_stream)
+        page[NameObject("/MediaBox")] = ArrayObject([NumberObject(0), NumberObject(0),
+                                                     NumberObject(612), NumberObject(792)])
+    with open(path, "wb") as fp:
+        writer.write(fp)
+    return len(seeds)
+
+
+def write_ooxml(path, kind, images, image_size, duplicate_ratio, codec, seed=0):
+    """
+    ساخت بایگانی حداقلی docx یا pptx با تصاویر در پوشه media
+
+    Returns:
+        int: تعداد کل تصاویر
+    """
+    media_prefix, part_name = _ZIP_LAYOUT[kind]
+    extension = {"jpeg": ".jpeg", "png": ".png", "jp2": ".jp2"}[codec]
+    seeds = image_seeds(images, duplicate_ratio, seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types/>')
+        archive.writestr(part_name, '<?xml version="1.0"?><document/>')
+        for index, image_seed in enumerate(seeds, 1):
+            archive.writestr(f"{media_prefix}image{index}{extension}",
+                             encode_image(make_image(image_seed, image_size), codec))
+    return len(seeds)
+
+
+def write_document(path, backend, pages=10, images_per_page=2, image_size=512, duplicate_ratio=0.0,
+                   codec="jpeg", seed=0):
+    """
+    ساخت یک سند مصنوعی برای backend داده شده
+
+    Args:
+        path (str): مسیر خروجی
+        backend (str): pdf، docx یا pptx
+        pages (int): تعداد صفحات (برای docx/pptx ضرب در images_per_page تعداد تصاویر است)
+        images_per_page (int): تصاویر هر صفحه
+        image_size (int): طول ضلع تصاویر
+        duplicate_ratio (float): نسبت تصاویر تکراری (۰ تا ۱)
+        codec (str): jpeg، png یا jp2
+
+    Returns:
+        int: تعداد کل تصاویر
+    """
+    if backend == "pdf":
+        return write_pdf(path, pages, images_per_page, image_size, duplicate_ratio, codec, seed)
+    return write_ooxml(path, backend, pages * images_per_page, image_size, duplicate_ratio, codec, seed)
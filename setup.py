@@ -37,7 +37,7 @@ setup(
     python_requires=">=3.8",
     install_requires=[
         "pillow>=10.0.0",
-        "pypdf>=4.0.0",
+        "pypdf>=4.0.0,<7",
     ],
     entry_points={
         "console_scripts": [
@@ -0,0 +1,170 @@
+"""
+Batch extraction over many documents
+پردازش دسته‌ای اسناد با مجموعه‌ای محدود از کارگرهای ماندگار
+"""
+
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from cli_extractor import extract_images, open_dedup_index
+from dedup import DEFAULT_ALGORITHM
+from incremental import file_fingerprint
+from metrics import Metrics
+from utils import is_supported_format, format_file_size
+
+
+def iter_input_paths(sources, read_stdin=False, sniff_zip=False):
+    """
+    تبدیل پوشه‌ها، الگوهای glob و فهرست stdin به مسیر فایل‌های پشتیبانی شده
+
+    Args:
+        sources (list): مسیر فایل، پوشه یا الگوی glob
+        read_stdin (bool): خواندن یک مسیر در هر خط از stdin
+        sniff_zip (bool): فایل‌های .zip هم پذیرفته شوند (extract_images(..., sniff_zip=True))
+
+    Yields:
+        str: مسیر هر فایل (بدون تکرار و به ترتیب ورود)
+    """
+    seen = set()
+
+    def candidates():
+        for source in sources:
+            if os.path.isdir(source):
+                for root, dirs, files in os.walk(source):
+                    dirs.sort()
+                    # پوشه‌های خروجی خودمان را دوباره پیمایش نکن
+                    dirs[:] = [d for d in dirs if d != "extracted_images"]
+                    for name in sorted(files):
+                        yield os.path.join(root, name)
+            elif glob.has_magic(source):
+                yield from sorted(glob.glob(source, recursive=True))
+            else:
+                yield source
+        if read_stdin:
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+
+    for path in candidates():
+        if not os.path.isfile(path):
+            continue
+        if not is_supported_format(path) and not (sniff_zip and os.path.splitext(path)[1].lower() == ".zip"):
+            continue
+        key = os.path.abspath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield path
+
+
+def _process_document(file_path, extract_options, hash_algorithm, index_path, fingerprint=False, near_distance=None,
+                      collect_metrics=False):
+    """اجرای استخراج برای یک سند در کارگر؛ خطاها به جای پرتاب برگردانده می‌شوند"""
+    metrics = Metrics() if collect_metrics else None
+    try:
+        # اثر انگشت پیش از استخراج گرفته می‌شود تا تغییرات حین کار در اجرای بعدی دیده شوند
+        source_fingerprint = file_fingerprint(file_path, hash_algorithm) if fingerprint else None
+        size = os.path.getsize(file_path)
+        with open_dedup_index(index_path, hash_algorithm, extract_options.get('memory_limit'),
+                              near_distance) as dedup:
+            outputs = extract_images(file_path, dedup=dedup, metrics=metrics, **extract_options)
+        return file_path, outputs, size, None, source_fingerprint, metrics and metrics.as_dict()
+    except Exception as e:
+        return file_path, None, 0, str(e), None, metrics and metrics.as_dict()
+
+
+def run_batch(paths, jobs=1, hash_algorithm=DEFAULT_ALGORITHM, index_path=None, manifest=None,
+              near_distance=None, metrics=None, **extract_options):
+    """
+    استخراج از تعداد زیادی سند با حداکثر jobs پردازش هم‌زمان
+
+    کارگرها برای کل دسته زنده می‌مانند، پس هزینه import کتابخانه‌های Pillow و pypdf
+    فقط یک بار برای هر کارگر پرداخت می‌شود.
+
+    Args:
+        paths (iterable): مسیر اسناد
+        jobs (int): تعداد پردازه‌های هم‌زمان
+        hash_algorithm (str): الگوریتم چکیده برای حذف تکراری‌ها
+        index_path (str): مسیر شاخص ماندگار SQLite برای حذف تکراری‌ها بین اجراها
+        manifest (SourceManifest): وضعیت اجرای افزایشی؛ اسناد بدون تغییر اصلاً باز نمی‌شوند
+        near_distance (int): حداکثر فاصله چکیده ادراکی برای کنار گذاشتن تصاویر مشابه
+        metrics (Metrics): جمع‌آوری متریک‌های همه اسناد (از همه پردازه‌ها) در این شیء
+        **extract_options: آرگومان‌های extract_images (workers فقط وقتی jobs برابر 1 است اعمال می‌شود)
+
+    Returns:
+        dict: آمار کلی اجرا
+    """
+    stats = {'documents': 0, 'failed': 0, 'skipped': 0, 'images': 0, 'bytes': 0}
+    started = time.perf_counter()
+    fingerprint = manifest is not None
+
+    def record(result):
+        file_path, outputs, size, error, source_fingerprint, document_metrics = result
+        if document_metrics is not None:
+            metrics.merge(document_metrics, include_elapsed=False)
+        if outputs is None:
+            stats['failed'] += 1
+            print(f"❌ خطا در پردازش {file_path}" + (f": {error}" if error else ""))
+            return
+        stats['documents'] += 1
+        stats['images'] += len(outputs)
+        stats['bytes'] += size
+        if manifest is not None:
+            manifest.update(file_path, source_fingerprint, outputs)
+            if stats['documents'] % 100 == 0:
+                manifest.save()
+
+    def changed(paths):
+        for file_path in paths:
+            if manifest is not None and manifest.is_unchanged(file_path):
+                stats['skipped'] += 1
+                continue
+            yield file_path
+
+    paths = changed(paths)
+
+    if jobs <= 1:
+        for file_path in paths:
+            record(_process_document(file_path, extract_options, hash_algorithm, index_path, fingerprint,
+                                     near_distance, metrics is not None))
+    else:
+        if extract_options.get('workers', 1) > 1:
+            print("⚠️ در حالت دسته‌ای با چند کار هم‌زمان، هر PDF در یک پردازه پردازش می‌شود")
+        extract_options = dict(extract_options, workers=1)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = deque()
+            for file_path in paths:
+                # پنجره محدود تا فهرست هزاران فایل یک‌جا در صف قرار نگیرد
+                if len(pending) >= jobs * 2:
+                    record(pending.popleft().result())
+                pending.append(executor.submit(
+                    _process_document, file_path, extract_options, hash_algorithm, index_path, fingerprint,
+                    near_distance, metrics is not None))
+            while pending:
+                record(pending.popleft().result())
+
+    if manifest is not None:
+        manifest.save()
+    stats['elapsed'] = time.perf_counter() - started
+    if metrics is not None:
+        # زمان دیواری کل دسته، نه مجموع زمان اسناد هم‌زمان
+        metrics.elapsed += stats['elapsed']
+    print_batch_summary(stats)
+    return stats
+
+
+def print_batch_summary(stats):
+    """چاپ خلاصه و گذردهی کلی اجرای دسته‌ای"""
+    elapsed = max(stats['elapsed'], 1e-9)
+    megabytes = stats['bytes'] / (1024 * 1024)
+    print(f"📊 {stats['documents']} سند، {stats['images']} تصویر، "
+          f"{format_file_size(stats['bytes'])} در {stats['elapsed']:.2f} ثانیه"
+          + (f" ({stats['failed']} ناموفق)" if stats['failed'] else "")
+          + (f"، {stats['skipped']} سند بدون تغییر رد شد" if stats['skipped'] else ""))
+    print(f"⚡ {stats['documents'] / elapsed:.2f} سند/ثانیه، "
+          f"{stats['images'] / elapsed:.2f} تصویر/ثانیه، {megabytes / elapsed:.2f} MB/ثانیه")
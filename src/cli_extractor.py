@@ -1,176 +1,686 @@
-import logging
+import glob
+import itertools
 import os
-import zipfile
-from uuid import uuid4
-from pypdf import PdfReader
-from PIL import Image
-import io
 import sys
+from collections import deque
+from contextlib import ExitStack
+from uuid import uuid4
+# pypdf، Pillow و concurrent.futures فقط هنگام نیاز import می‌شوند تا --help و اجرای
+# اسناد Word/PowerPoint هزینه بارگذاری آن‌ها را نپردازند (benchmarks/bench_startup.py)
+from dedup import DedupIndex, PersistentDedupIndex, available_algorithms
+from conversion import ConversionPool
+from extractor_core import (ImageFilter, get_backend, iter_images, iter_pdf_images, needs_conversion,
+                            parse_page_ranges, render_image, select_pages)
+from image_manifest import ImageManifest, describe_image
+from incremental import SourceManifest, extraction_settings, file_fingerprint
+from metrics import Metrics, active as active_metrics, collecting, count, profile_document, stage
+from perceptual import DEFAULT_DISTANCE, NearDuplicateIndex
+from profiles import PROFILES, get_profile, parse_thumbnail_sizes
+from sinks import SINKS, open_sink
+from utils import format_file_size, get_peak_memory_usage
+from writer import ImageWriter
+
+# برچسب پیام‌های هر فرمت (ایموجی، نام)
+_FORMAT_LABELS = {
+    ".docx": ("📝", "Word"),
+    ".pptx": ("🎨", "PowerPoint"),
+    ".xlsx": ("📊", "Excel"),
+    ".odt": ("📝", "OpenDocument Text"),
+    ".odp": ("🎨", "OpenDocument Presentation"),
+    ".ods": ("📊", "OpenDocument Spreadsheet"),
+    ".epub": ("📚", "EPUB"),
+    ".cbz": ("📚", "CBZ"),
+}
 
 def generate_uuid_filename(extension):
     return f"{uuid4()}{extension.lower()}"
 
 def ensure_directory_exists(path):
-    if not os.path.exists(path):
-        os.makedirs(path)
+    # exist_ok برای وقتی که چند کارگر هم‌زمان پوشه خروجی مشترک را می‌سازند
+    os.makedirs(path, exist_ok=True)
+
+def extract_images(file_path: str, workers: int = 1, dedup=None, naming: str = "uuid", passthrough: bool = True,
+                   memory_limit=None, convert_workers: int = 0, profile=None, write_workers: int = 0,
+                   fsync_batch=None, image_filter=None, manifest_path=None, metrics=None, profile_dir=None,
+                   profiler="cprofile", pages=None, slides=None, sink="dir", thumbnail_sizes=None, log=print,
+                   progress=None, sniff_zip=False):
+    """
+    استخراج تصاویر از یک فایل و ذخیره آن‌ها در پوشه extracted_images کنار فایل
+
+    Args:
+        file_path (str): مسیر فایل
+        workers (int): تعداد پردازه‌های موازی برای صفحات PDF، یا نخ‌های خواندن اعضای DOCX/PPTX
+        dedup (DedupIndex): شاخص تکراری‌ها؛ برای اشتراک بین چند سند یک شاخص بدهید
+        naming (str): "uuid" برای نام تصادفی یا "digest" برای نام بر اساس چکیده محتوا
+        passthrough (bool): کپی مستقیم جریان‌های JPEG/JPEG2000 در PDF بدون decode
+        memory_limit (int): سقف حافظه به بایت برای حالت جریانی PDF
+        convert_workers (int): تعداد نخ‌های تبدیل JP2 در پس‌زمینه (0 یعنی هم‌زمان با استخراج)
+        profile (OutputProfile): پروفایل خروجی (profiles.get_profile)؛ None یعنی فقط تبدیل JP2 به PNG
+        write_workers (int): تعداد نخ‌های نوشتن غیرهم‌زمان (0 یعنی نوشتن در حلقه استخراج)
+        fsync_batch (int): fsync خروجی‌ها در دسته‌های این اندازه؛ None یعنی بدون fsync
+        image_filter (ImageFilter): فیلتر اندازه و ابعاد که پیش از decode و نوشتن اعمال می‌شود
+        manifest_path (str): فایل JSONL که رکورد هر تصویر ذخیره شده به آن اضافه می‌شود
+        metrics (Metrics): جمع‌آوری زمان مراحل و شمارنده‌ها در این شیء
+        profile_dir (str): پوشه خروجی profiler برای این سند
+        profiler (str): cprofile یا pyinstrument
+        pages (tuple): فقط این صفحات PDF (extractor_core.parse_page_ranges)
+        slides (tuple): فقط تصاویر این اسلایدهای PowerPoint
+        sink (str): مقصد خروجی (sinks.open_sink): dir، tar، zip، pack یا pack:PATH
+        thumbnail_sizes (tuple): اندازه‌های تصاویر بندانگشتی JPEG که کنار هر تصویر نوشته می‌شوند
+        log (callable): تابع گزارش پیام‌ها
+        progress (callable): فراخوانی با (current, total) برای نمایش پیشرفت صفحات PDF
+        sniff_zip (bool): استخراج از فایل‌های .zip با تشخیص فرمت از محتوا (EPUB، ODF، OOXML یا CBZ)
 
-def extract_images(file_path: str):
+    Returns:
+        list: مسیر تصاویر ذخیره شده (برای مقصدهای بایگانی "<container>#<name>")، یا None در صورت خطا
+        یا فرمت پشتیبانی نشده
+    """
     output_path = os.path.join(os.path.dirname(file_path), "extracted_images")
     _, file_extension = os.path.splitext(file_path)
     file_extension = file_extension.lower()
+    if dedup is None:
+        dedup = DedupIndex(max_entries=dedup_entries_for_memory(memory_limit))
+
+    if file_extension != ".pdf" and get_backend(file_path) is None and not (sniff_zip and file_extension == ".zip"):
+        log(f"❌ فرمت فایل پشتیبانی نمی‌شود: {file_extension}")
+        return None
+
+    with ExitStack() as stack:
+        stack.enter_context(collecting(metrics))
+        stack.enter_context(profile_document(file_path, profile_dir, profiler))
+        count("documents")
+        image_manifest = stack.enter_context(ImageManifest(manifest_path)) if manifest_path else None
+        output_sink = open_sink(sink, output_path, file_path, sync=fsync_batch is not None)
+        if output_sink is not None:
+            stack.enter_context(output_sink)
+        if file_extension == ".pdf":
+            return extract_images_from_pdf(file_path, output_path, workers=workers, dedup=dedup, naming=naming,
+                                           passthrough=passthrough, memory_limit=memory_limit,
+                                           convert_workers=convert_workers, profile=profile,
+                                           write_workers=write_workers, fsync_batch=fsync_batch,
+                                           image_filter=image_filter, image_manifest=image_manifest, pages=pages,
+                                           sink=output_sink, thumbnail_sizes=thumbnail_sizes, log=log,
+                                           progress=progress)
+        return _extract_with_backend(file_path, output_path, dedup, naming, log, convert_workers, profile,
+                                     write_workers, fsync_batch, image_filter, image_manifest, slides, output_sink,
+                                     thumbnail_sizes, workers, sniff_zip)
+
+def _output_filename(image_key, ext, naming):
+    if naming == "digest":
+        return f"{image_key.digest}{ext.lower()}"
+    return generate_uuid_filename(ext)
+
+def _save_thumbnails(output_path, image_filename, thumbnails, image_key, writer=None, sink=None):
+    """
+    نوشتن تصاویر بندانگشتی کنار تصویر اصلی با نام <نام>.thumb<اندازه>.jpg
+
+    مثل تصویر اصلی با writer در صف نوشتن (و fsync دسته‌ای آن) قرار می‌گیرند؛ نتیجه
+    آن‌ها token ندارد و در فهرست تصاویر ذخیره شده شمرده نمی‌شود. در مقصدهای بایگانی
+    هر تصویر بندانگشتی با چکیده "<digest>.thumb<size>" در شاخص ثبت می‌شود تا از
+    تصویر اصلی جدا خوانده شود.
+
+    Returns:
+        list: رکورد هر تصویر بندانگشتی برای فهرست JSONL
+    """
+    stem = os.path.splitext(image_filename)[0]
+    records = []
+    for thumbnail in thumbnails:
+        name = f"{stem}.thumb{thumbnail.size}{thumbnail.ext}"
+        if sink is not None:
+            with stage("write"):
+                location = sink.write(name, thumbnail.data,
+                                      image_key._replace(digest=f"{image_key.digest}.thumb{thumbnail.size}"))
+        elif writer is not None:
+            location = os.path.join(output_path, name)
+            writer.write(location, thumbnail.data, counter="thumbnails_out")
+        else:
+            location = os.path.join(output_path, name)
+            with stage("write"), open(location, "wb") as fp:
+                fp.write(thumbnail.data)
+        if writer is None:
+            count("thumbnails_out")
+            count("bytes_out", len(thumbnail.data))
+        width, height = thumbnail.dimensions
+        records.append({'size': thumbnail.size, 'output': os.path.abspath(location), 'width': width,
+                        'height': height, 'output_size': len(thumbnail.data)})
+    return records
+
+def _save_image(output_path, ext, image_data, image_key, naming="uuid", log=print, writer=None, sink=None,
+                thumbnails=(), thumbnail_records=None):
+    """
+    نوشتن یک تصویر با نام نهایی
+
+    با writer فایل فقط در صف نوشتن قرار می‌گیرد و None برگردانده می‌شود؛ مسیر پس از
+    پایان نوشتن از writer.completed() تحویل داده می‌شود. با sink تصویر به بایگانی یا
+    فایل pack اضافه و مکان آن برگردانده می‌شود. تصاویر بندانگشتی همین‌جا نوشته و
+    رکوردشان در thumbnail_records (بر اساس کلید تصویر) نگه داشته می‌شود.
+    """
+    image_filename = _output_filename(image_key, ext, naming)
+    if thumbnails:
+        records = _save_thumbnails(output_path, image_filename, thumbnails, image_key, writer, sink)
+        if thumbnail_records is not None:
+            thumbnail_records[image_key] = records
+    if sink is not None:
+        with stage("write"):
+            location = sink.write(image_filename, image_data, image_key)
+        count("images_out")
+        count("bytes_out", len(image_data))
+        log(f"✅ تصویر ذخیره شد: {os.path.basename(location)}")
+        return location
+    file_path = os.path.join(output_path, image_filename)
+    if writer is not None:
+        writer.write(file_path, image_data, image_key)
+        return None
+    with stage("write"), open(file_path, "wb") as fp:
+        fp.write(image_data)
+    count("images_out")
+    count("bytes_out", len(image_data))
+    log(f"✅ تصویر ذخیره شد: {image_filename}")
+    return file_path
+
+def _convert_and_save(output_path, image_key, image_name, image_data, naming, log, profile=None, writer=None,
+                      sink=None, thumbnail_sizes=None, thumbnail_records=None):
+    """تبدیل و ذخیره یک تصویر (در نخ‌های ConversionPool اجرا می‌شود)"""
+    ext, image_data, thumbnails = render_image(image_name, image_data, profile, thumbnail_sizes)
+    if ext is None:
+        log(f"❌ خطا در تبدیل تصویر: {image_name}")
+        return image_key, None
+    return image_key, _save_image(output_path, ext, image_data, image_key, naming, log, writer, sink, thumbnails,
+                                  thumbnail_records)
+
+def _open_writer(write_workers=0, fsync_batch=None):
+    if write_workers <= 0 and not fsync_batch:
+        return None
+    return ImageWriter(max(1, write_workers), fsync_batch)
+
+def _written(results, log):
+    for image_key, saved_path in results:
+        # نتایج بدون کلید مربوط به تصاویر بندانگشتی هستند
+        if image_key is None:
+            continue
+        log(f"✅ تصویر ذخیره شد: {os.path.basename(saved_path)}")
+        yield image_key, saved_path
+
+def _log_writer_stats(writer, log):
+    stats = writer.stats()
+    if not stats['files']:
+        return
+    latency = "، ".join(f"p{p}: {seconds * 1000:.1f}ms" for p, seconds in stats['latency'].items())
+    log(f"💾 نوشتن {stats['files']} فایل ({format_file_size(stats['bytes'])}) - {latency}")
+    if stats['fsync_batches']:
+        sync_latency = "، ".join(f"p{p}: {seconds * 1000:.1f}ms" for p, seconds in stats['fsync_latency'].items())
+        log(f"💾 {stats['fsync_batches']} دسته fsync - {sync_latency}")
+
+def _near_duplicate(seen_images, image_key, fingerprint, image_name, log):
+    """بررسی اینکه تصویر مشابه قبلاً ذخیره شده است (چکیده تصویر تازه پس از نوشتن ثبت می‌شود)"""
+    similar = seen_images.add_near(image_key, fingerprint)
+    if similar is None:
+        return False
+    log(f"🔁 تصویر مشابه قبلاً ذخیره شده است: {image_name} ≈ {similar.digest[:12]}")
+    return True
 
-    if file_extension == ".pdf":
-        extract_images_from_pdf(file_path, output_path)
-    elif file_extension == ".docx":
-        extract_images_from_docx(file_path, output_path)
-    elif file_extension == ".pptx":
-        extract_images_from_pptx(file_path, output_path)
-    else:
-        print(f"❌ فرمت فایل پشتیبانی نمی‌شود: {file_extension}")
+def _write_images(images, output_path, seen_images, naming, log=print, convert_workers=0, profile=None,
+                  write_workers=0, fsync_batch=None, image_manifest=None, sink=None, thumbnail_sizes=None):
+    """
+    مصرف مولد ExtractedImage: حذف تکراری، تبدیل در حافظه و نوشتن یک‌باره با نام نهایی
 
-def extract_images_from_pdf(pdf_file_path: str, output_path: str):
+    با convert_workers، تصاویری که به تبدیل نیاز دارند در صف محدود نخ‌های تبدیل قرار
+    می‌گیرند تا decode آن‌ها با خواندن سند هم‌پوشانی داشته باشد. با write_workers
+    نوشتن فایل‌ها هم در نخ‌های ImageWriter انجام می‌شود (مقصدهای بایگانی خودشان ترتیبی
+    و بافر شده می‌نویسند و ImageWriter ندارند). ثبت در شاخص تکراری‌ها و فهرست JSONL
+    همیشه در همین نخ انجام می‌شود. با thumbnail_sizes هر تصویر raster برای ساخت تصاویر
+    بندانگشتی decode می‌شود، پس به نخ‌های تبدیل سپرده می‌شود.
+
+    Returns:
+        list: مسیر تصاویر ذخیره شده
+    """
+    saved_paths = []
+    described = {}
+    thumbnail_records = {}
+
+    def finish(image_key, saved_path):
+        # None یعنی تصویر هنوز در صف نوشتن است (یا تبدیلش شکست خورده)
+        if saved_path is None:
+            return
+        seen_images.record(image_key, saved_path)
+        saved_paths.append(saved_path)
+        info = described.pop(image_key, None)
+        thumbnails = thumbnail_records.pop(image_key, None)
+        if info is not None:
+            image_manifest.record(info, image_key, saved_path, seen_images.algorithm, profile,
+                                  sink.size(saved_path) if sink is not None else None, thumbnails)
+
+    with ExitStack() as stack:
+        pool = stack.enter_context(ConversionPool(convert_workers)) if convert_workers > 0 else None
+        writer = _open_writer(write_workers, fsync_batch) if sink is None else None
+        if writer is not None:
+            stack.enter_context(writer)
+
+        def drain():
+            if pool is not None:
+                for result in pool.completed():
+                    finish(*result)
+            if writer is not None:
+                for result in _written(writer.completed(), log):
+                    finish(*result)
+
+        for image in images:
+            image_key = seen_images.key_for(image.data)
+            if not seen_images.add(image_key):
+                image.release()
+                continue
+            if seen_images.near is not None and _near_duplicate(
+                    seen_images, image_key, seen_images.near.fingerprint(image.data), image.name, log):
+                image.release()
+                continue
+            if image_manifest is not None:
+                described[image_key] = describe_image(image)
+
+            if pool is not None and (thumbnail_sizes or needs_conversion(image, profile)):
+                pool.submit(_convert_and_save, output_path, image_key, image.name, image.data, naming, log,
+                            profile, writer, sink, thumbnail_sizes, thumbnail_records)
+            else:
+                ext, image_data, thumbnails = render_image(image.name, image.data, profile, thumbnail_sizes)
+                if ext is None:
+                    log(f"❌ خطا در تبدیل تصویر: {image.name}")
+                else:
+                    finish(image_key, _save_image(output_path, ext, image_data, image_key, naming, log, writer,
+                                                  sink, thumbnails, thumbnail_records))
+            image.release()
+            drain()
+
+        if pool is not None:
+            for result in pool.close():
+                finish(*result)
+        if writer is not None:
+            for result in _written(writer.close(), log):
+                finish(*result)
+            _log_writer_stats(writer, log)
+    return saved_paths
+
+def _extract_pdf_page_range(pdf_file_path: str, page_indices, algorithm: str, passthrough: bool = True,
+                            memory_limit=None, profile=None, image_filter=None, near=False, describe=False,
+                            collect_metrics=False, thumbnail_sizes=None):
+    """
+    پردازش دسته‌ای از صفحات (page_indices، از صفر) در یک پردازه کارگر
+
+    هر کارگر PdfReader مخصوص خودش را باز می‌کند و تکراری‌های داخل همان بازه را
+    حذف می‌کند. حذف تکراری بین بازه‌ها در پردازه اصلی و به ترتیب صفحات انجام می‌شود.
+
+    Returns:
+        list: لیست (ImageKey, name, ext, data, fingerprint, info, thumbnails)؛ برای تصاویری که تبدیلشان ناموفق
+        بوده ext برابر None است، fingerprint (چکیده ادراکی) فقط با near و info (مشخصات منبع برای فهرست) فقط
+        با describe محاسبه می‌شود؛ و متریک‌های کارگر (خروجی Metrics.as_dict) یا None
+    """
+    seen_images = DedupIndex(algorithm)
+    results = []
+    worker_metrics = Metrics() if collect_metrics else None
+    with collecting(worker_metrics):
+        for image in iter_pdf_images(pdf_file_path, passthrough, memory_limit, page_indices=page_indices,
+                                     image_filter=image_filter):
+            image_key = seen_images.key_for(image.data)
+
+            if not seen_images.add(image_key):
+                continue
+
+            fingerprint = NearDuplicateIndex.fingerprint(image.data) if near else None
+            info = describe_image(image) if describe else None
+            ext, image_data, thumbnails = render_image(image.name, image.data, profile, thumbnail_sizes)
+            results.append((image_key, image.name, ext, image_data, fingerprint, info, thumbnails))
+    return results, worker_metrics.as_dict() if worker_metrics is not None else None
+
+def _split_page_ranges(page_indices, workers: int):
+    # چند دسته برای هر کارگر تا صفحات سنگین باعث بیکار ماندن بقیه نشوند؛ برش range خودش range است
+    chunk_size = max(1, -(-len(page_indices) // (workers * 4)))
+    return [page_indices[start:start + chunk_size] for start in range(0, len(page_indices), chunk_size)]
+
+def extract_images_from_pdf(pdf_file_path: str, output_path: str, workers: int = 1, dedup=None, naming="uuid",
+                            passthrough=True, memory_limit=None, convert_workers=0, profile=None, write_workers=0,
+                            fsync_batch=None, image_filter=None, image_manifest=None, pages=None, sink=None,
+                            thumbnail_sizes=None, log=print, progress=None):
     try:
-        print("📖 در حال خواندن فایل PDF...")
-        reader = PdfReader(pdf_file_path)
-        seen_images = set()
+        log("📖 در حال خواندن فایل PDF...")
+        from pypdf import PdfReader
+        with stage("open"):
+            reader = PdfReader(pdf_file_path)
+        seen_images = dedup if dedup is not None else DedupIndex()
         ensure_directory_exists(output_path)
         
         total_pages = len(reader.pages)
-        print(f"📄 تعداد صفحات: {total_pages}")
-        
-        for i, page in enumerate(reader.pages):
-            print(f"🔄 در حال پردازش صفحه {i+1} از {total_pages}")
-            
-            for image in page.images:
-                image_data = image.data
-                image_hash = hash(image_data)
-
-                if image_hash in seen_images:
-                    continue
+        page_indices = select_pages(pages, total_pages)
+        if pages is None:
+            log(f"📄 تعداد صفحات: {total_pages}")
+        else:
+            log(f"📄 تعداد صفحات: {total_pages} ({len(page_indices)} صفحه انتخاب شده)")
 
-                seen_images.add(image_hash)
-
-                ext = os.path.splitext(image.name)[1].lower()
-                if ext == ".jpeg":
-                    ext = ".jpg"
-                elif ext == ".jp2":
-                    try:
-                        with Image.open(io.BytesIO(image_data)) as img:
-                            if img.mode == "RGBA":
-                                img = img.convert("RGB")
-                            ext = ".png"
-                            image_data = io.BytesIO()
-                            img.save(image_data, format="PNG")
-                            image_data = image_data.getvalue()
-                    except Exception as e:
-                        print(f"❌ خطا در تبدیل JP2 به PNG: {e}")
-                        continue
-
-                image_filename = generate_uuid_filename(ext)
-                file_path = os.path.join(output_path, image_filename)
-                with open(file_path, "wb") as fp:
-                    fp.write(image_data)
-                
-                print(f"✅ تصویر ذخیره شد: {image_filename}")
-        
-        print(f"🎉 استخراج کامل شد! تعداد تصاویر استخراج شده: {len(seen_images)}")
-        
-    except Exception as e:
-        print(f"❌ خطا در استخراج از PDF: {e}")
+        if workers > 1 and len(page_indices) > 1:
+            del reader
+            saved_paths = _extract_pdf_parallel(pdf_file_path, output_path, total_pages, workers, seen_images, naming,
+                                                passthrough, memory_limit, profile, write_workers, fsync_batch,
+                                                image_filter, image_manifest, log, progress, page_indices, sink,
+                                                thumbnail_sizes)
+        else:
+            def on_page(i):
+                log(f"🔄 در حال پردازش صفحه {i+1} از {total_pages}")
+                if progress is not None:
+                    progress(i, total_pages)
 
-def extract_images_from_docx(docx_file_path: str, output_path: str):
-    try:
-        ensure_directory_exists(output_path)
-        print("📝 در حال استخراج از فایل Word...")
+            images = iter_pdf_images(pdf_file_path, passthrough, memory_limit, page_indices, on_page=on_page,
+                                     reader=reader, image_filter=image_filter)
+            saved_paths = _write_images(images, output_path, seen_images, naming, log, convert_workers, profile,
+                                        write_workers, fsync_batch, image_manifest, sink, thumbnail_sizes)
         
-        with zipfile.ZipFile(docx_file_path, 'r') as zip_ref:
-            for file_info in zip_ref.infolist():
-                if file_info.filename.startswith('word/media/'):
-                    zip_ref.extract(file_info, output_path)
-                    filename = os.path.basename(file_info.filename)
-                    original_path = os.path.join(output_path, filename)
-                    
-                    if os.path.exists(original_path):
-                        _, ext = os.path.splitext(filename)
-                        if ext.lower() == ".jpeg":
-                            ext = ".jpg"
-                        elif ext.lower() == ".jp2":
-                            try:
-                                with Image.open(original_path) as img:
-                                    if img.mode == "RGBA":
-                                        img = img.convert("RGB")
-                                    ext = ".png"
-                                    img.save(original_path, format="PNG")
-                            except Exception as e:
-                                print(f"❌ خطا در تبدیل JP2 به PNG: {e}")
-                                os.remove(original_path)
-                                continue
-
-                        new_filename = generate_uuid_filename(ext)
-                        new_path = os.path.join(output_path, new_filename)
-                        os.rename(original_path, new_path)
-                        print(f"✅ تصویر ذخیره شد: {new_filename}")
-        
-        print("🎉 استخراج از فایل Word کامل شد!")
+        log(f"🎉 استخراج کامل شد! تعداد تصاویر استخراج شده: {len(saved_paths)}")
+        if memory_limit is not None and get_peak_memory_usage() is not None:
+            log(f"📈 حداکثر حافظه مصرفی: {format_file_size(get_peak_memory_usage())}")
+        return saved_paths
         
     except Exception as e:
-        print(f"❌ خطا در استخراج از Word: {e}")
+        log(f"❌ خطا در استخراج از PDF: {e}")
+        return None
+
+def _extract_pdf_parallel(pdf_file_path, output_path, total_pages, workers, seen_images, naming, passthrough,
+                          memory_limit=None, profile=None, write_workers=0, fsync_batch=None, image_filter=None,
+                          image_manifest=None, log=print, progress=None, page_indices=None, sink=None,
+                          thumbnail_sizes=None):
+    from concurrent.futures import ProcessPoolExecutor
+    page_ranges = _split_page_ranges(page_indices if page_indices is not None else range(total_pages), workers)
+    log(f"⚙️ پردازش موازی با {workers} کارگر در {len(page_ranges)} بازه")
+
+    saved_paths = []
+    described = {}
+    thumbnail_records = {}
+
+    def finish(image_key, saved_path):
+        # None یعنی تصویر هنوز در صف نوشتن است (یا تبدیلش شکست خورده)
+        if saved_path is None:
+            return
+        seen_images.record(image_key, saved_path)
+        saved_paths.append(saved_path)
+        info = described.pop(image_key, None)
+        thumbnails = thumbnail_records.pop(image_key, None)
+        if info is not None:
+            image_manifest.record(info, image_key, saved_path, seen_images.algorithm, profile,
+                                  sink.size(saved_path) if sink is not None else None, thumbnails)
+
+    parent_metrics = active_metrics()
+    collect_metrics = parent_metrics is not None
+    writer = _open_writer(write_workers, fsync_batch) if sink is None else None
+    with ExitStack() as stack, ProcessPoolExecutor(max_workers=workers) as executor:
+        if writer is not None:
+            stack.enter_context(writer)
+        pending = deque()
+        range_iter = iter(page_ranges)
+        # حداکثر دو بازه در صف هر کارگر تا نتایج منتظر ادغام حافظه را پر نکنند
+        for chunk in itertools.islice(range_iter, workers * 2):
+            pending.append((chunk, executor.submit(
+                _extract_pdf_page_range, pdf_file_path, chunk, seen_images.algorithm, passthrough,
+                memory_limit, profile, image_filter, seen_images.near is not None, image_manifest is not None,
+                collect_metrics, thumbnail_sizes)))
+
+        while pending:
+            chunk, future = pending.popleft()
+            next_range = next(range_iter, None)
+            if next_range is not None:
+                pending.append((next_range, executor.submit(
+                    _extract_pdf_page_range, pdf_file_path, next_range, seen_images.algorithm, passthrough,
+                    memory_limit, profile, image_filter, seen_images.near is not None,
+                    image_manifest is not None, collect_metrics, thumbnail_sizes)))
 
-def extract_images_from_pptx(pptx_file_path: str, output_path: str):
+            # ادغام به ترتیب صفحات تا اولین نمونه هر تصویر تکراری حفظ شود
+            results, worker_metrics = future.result()
+            if worker_metrics is not None:
+                # زمان کل کارگرها با زمان کل اجرا هم‌پوشانی دارد
+                parent_metrics.merge(worker_metrics, include_elapsed=False)
+            for image_key, image_name, ext, image_data, fingerprint, info, thumbnails in results:
+                if not seen_images.add(image_key):
+                    continue
+                if _near_duplicate(seen_images, image_key, fingerprint, image_name, log):
+                    continue
+
+                if ext is None:
+                    log(f"❌ خطا در تبدیل تصویر: {image_name}")
+                    continue
+
+                if info is not None:
+                    described[image_key] = info
+                finish(image_key, _save_image(output_path, ext, image_data, image_key, naming, log, writer,
+                                              sink, thumbnails, thumbnail_records))
+                if writer is not None:
+                    for result in _written(writer.completed(), log):
+                        finish(*result)
+
+            log(f"🔄 صفحات {chunk[0]+1} تا {chunk[-1]+1} از {total_pages} پردازش شد")
+            if progress is not None:
+                progress(chunk[-1] + 1, total_pages)
+
+        if writer is not None:
+            for result in _written(writer.close(), log):
+                finish(*result)
+            _log_writer_stats(writer, log)
+    return saved_paths
+
+def _extract_with_backend(file_path, output_path, dedup=None, naming="uuid", log=print, convert_workers=0,
+                          profile=None, write_workers=0, fsync_batch=None, image_filter=None, image_manifest=None,
+                          slides=None, sink=None, thumbnail_sizes=None, workers=1, sniff_zip=False):
+    ext = os.path.splitext(file_path)[1].lower()
+    emoji, label = _FORMAT_LABELS.get(ext, ("📦", ext.lstrip(".").upper()))
     try:
+        seen_images = dedup if dedup is not None else DedupIndex()
         ensure_directory_exists(output_path)
-        print("🎨 در حال استخراج از فایل PowerPoint...")
-        
-        with zipfile.ZipFile(pptx_file_path, 'r') as zip_ref:
-            for file_info in zip_ref.infolist():
-                if file_info.filename.startswith('ppt/media/'):
-                    zip_ref.extract(file_info, output_path)
-                    filename = os.path.basename(file_info.filename)
-                    original_path = os.path.join(output_path, filename)
-                    
-                    if os.path.exists(original_path):
-                        _, ext = os.path.splitext(filename)
-                        valid_extensions = {".jpg", ".jpeg", ".png", ".jp2"}
-                        
-                        if ext.lower() == ".jpeg":
-                            ext = ".jpg"
-                        elif ext.lower() == ".jp2":
-                            try:
-                                with Image.open(original_path) as img:
-                                    if img.mode == "RGBA":
-                                        img = img.convert("RGB")
-                                    ext = ".png"
-                                    img.save(original_path, format="PNG")
-                            except Exception as e:
-                                print(f"❌ خطا در تبدیل JP2 به PNG: {e}")
-                                os.remove(original_path)
-                                continue
-                        
-                        if ext.lower() in valid_extensions:
-                            new_filename = generate_uuid_filename(ext)
-                            new_path = os.path.join(output_path, new_filename)
-                            os.rename(original_path, new_path)
-                            print(f"✅ تصویر ذخیره شد: {new_filename}")
-                        else:
-                            os.remove(original_path)
-        
-        print("🎉 استخراج از فایل PowerPoint کامل شد!")
-        
+        log(f"{emoji} در حال استخراج از فایل {label}...")
+
+        if workers > 1:
+            log(f"⚙️ خواندن موازی اعضای بایگانی با {workers} نخ")
+        images = iter_images(file_path, sniff_zip, image_filter=image_filter, slides=slides, workers=workers)
+        saved_paths = _write_images(images, output_path, seen_images, naming, log, convert_workers, profile,
+                                    write_workers, fsync_batch, image_manifest, sink, thumbnail_sizes)
+
+        log(f"🎉 استخراج از فایل {label} کامل شد!")
+        return saved_paths
+
     except Exception as e:
-        print(f"❌ خطا در استخراج از PowerPoint: {e}")
+        log(f"❌ خطا در استخراج از {label}: {e}")
+        return None
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("💡 روش استفاده:")
-        print("python cli_extractor.py <مسیر-فایل>")
-        print("\nمثال:")
-        print('python cli_extractor.py "C:\\Users\\user-name\\Documents\\document.pdf"')
+def extract_images_from_docx(docx_file_path: str, output_path: str, dedup=None, naming="uuid", log=print):
+    return _extract_with_backend(docx_file_path, output_path, dedup, naming, log)
+
+def extract_images_from_pptx(pptx_file_path: str, output_path: str, dedup=None, naming="uuid", log=print):
+    return _extract_with_backend(pptx_file_path, output_path, dedup, naming, log)
+
+def dedup_entries_for_memory(memory_limit):
+    # هر کلید در شاخص حدود ۲۰۰ بایت جا می‌گیرد؛ حداکثر حدود ۵٪ سقف حافظه به آن می‌رسد
+    if memory_limit is None:
+        return None
+    return max(10000, memory_limit // 4096)
+
+def open_dedup_index(index_path=None, algorithm="blake2b", memory_limit=None, near_distance=None):
+    """ساخت شاخص تکراری‌ها: ماندگار اگر مسیر داده شود، وگرنه درون حافظه"""
+    max_entries = dedup_entries_for_memory(memory_limit)
+    if index_path:
+        return PersistentDedupIndex(index_path, algorithm, max_entries=max_entries, near_distance=near_distance)
+    return DedupIndex(algorithm, max_entries=max_entries, near_distance=near_distance)
+
+def maintain_index(index_path, algorithm, compact=False, max_age_days=None, max_entries=None):
+    with PersistentDedupIndex(index_path, algorithm) as index:
+        if max_age_days is not None or max_entries is not None:
+            removed = index.evict(max_age_days=max_age_days, max_entries=max_entries)
+            print(f"🧹 {removed} رکورد قدیمی از شاخص حذف شد")
+        if compact:
+            removed = index.compact()
+            print(f"🧹 {removed} رکورد بدون فایل از شاخص حذف شد")
+        print(f"📇 تعداد رکوردهای شاخص: {len(index)}")
+
+def report_metrics(metrics, show_table=False, export_path=None):
+    """چاپ جدول خلاصه مراحل و/یا ذخیره متریک‌ها در فایل"""
+    if metrics is None:
+        return
+    if show_table:
+        print(metrics.format_table())
+    if export_path:
+        metrics.export(export_path)
+        print(f"📈 متریک‌ها ذخیره شد: {export_path}")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="cli_extractor.py",
+        description="استخراج تصاویر از فایل‌های PDF، Word، PowerPoint، Excel، OpenDocument، EPUB و CBZ",
+        epilog=('مثال:\npython cli_extractor.py "C:\\Users\\user-name\\Documents\\document.pdf"\n'
+                'python cli_extractor.py docs/ "scans/**/*.pdf" --jobs 8\n'
+                'find . -name "*.pptx" | python cli_extractor.py --stdin'),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("paths", nargs="*", metavar="path",
+                        help="مسیر فایل، پوشه یا الگوی glob")
+    parser.add_argument("--stdin", action="store_true",
+                        help="خواندن فهرست فایل‌ها از stdin (یک مسیر در هر خط)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="تعداد اسنادی که هم‌زمان در حالت دسته‌ای پردازش می‌شوند (پیش‌فرض: 1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="تعداد پردازه‌های موازی برای صفحات PDF، یا نخ‌های خواندن موازی اعضای DOCX/PPTX "
+                             "(پیش‌فرض: 1)")
+    parser.add_argument("--hash", dest="hash_algorithm", default="blake2b", choices=available_algorithms(),
+                        help="الگوریتم چکیده برای تشخیص تصاویر تکراری (پیش‌فرض: blake2b)")
+    parser.add_argument("--near-duplicates", dest="near_distance", type=int, nargs="?", const=DEFAULT_DISTANCE,
+                        metavar="BITS",
+                        help="کنار گذاشتن تصاویر تقریباً تکراری با چکیده ادراکی dHash؛ "
+                             f"حداکثر فاصله Hamming (پیش‌فرض: {DEFAULT_DISTANCE})")
+    parser.add_argument("--naming", choices=["uuid", "digest"], default="uuid",
+                        help="نام‌گذاری خروجی: تصادفی (uuid) یا بر اساس چکیده محتوا (digest)")
+    parser.add_argument("--no-passthrough", dest="passthrough", action="store_false",
+                        help="decode همه تصاویر PDF با pypdf به جای کپی مستقیم جریان‌های JPEG/JPEG2000")
+    parser.add_argument("--convert-workers", type=int, default=0, metavar="N",
+                        help="تعداد نخ‌های تبدیل JP2 در پس‌زمینه با صف محدود (پیش‌فرض: 0، تبدیل هم‌زمان)")
+    parser.add_argument("--write-workers", type=int, default=0, metavar="N",
+                        help="تعداد نخ‌های نوشتن غیرهم‌زمان؛ استخراج منتظر ذخیره‌ساز نمی‌ماند (پیش‌فرض: 0)")
+    parser.add_argument("--fsync", dest="fsync_batch", type=int, nargs="?", const=32, metavar="BATCH",
+                        help="fsync فایل‌های خروجی در دسته‌های BATCH تایی (پیش‌فرض دسته: 32)")
+    parser.add_argument("--output-profile", choices=sorted(PROFILES),
+                        help="پروفایل خروجی: archive (بدون اتلاف، بیشترین فشرده‌سازی)، fast (کمترین زمان encode) "
+                             "یا web (WebP با ابعاد محدود)؛ پیش‌فرض فقط تبدیل JP2 به PNG")
+    parser.add_argument("--quality", type=int, metavar="Q",
+                        help="کیفیت خروجی با اتلاف در پروفایل web (1-100)")
+    parser.add_argument("--max-dimension", type=int, metavar="PX",
+                        help="حداکثر طول بزرگ‌ترین ضلع تصاویر خروجی پروفایل")
+    parser.add_argument("--min-bytes", type=int, metavar="N",
+                        help="نادیده گرفتن تصاویر کوچک‌تر از N بایت (مثلاً آیکون‌ها و گلوله‌ها)")
+    parser.add_argument("--min-width", type=int, metavar="PX", help="نادیده گرفتن تصاویر با عرض کمتر از PX")
+    parser.add_argument("--min-height", type=int, metavar="PX", help="نادیده گرفتن تصاویر با ارتفاع کمتر از PX")
+    parser.add_argument("--max-pixels", type=int, metavar="N", help="نادیده گرفتن تصاویر با بیش از N پیکسل")
+    parser.add_argument("--pages", metavar="RANGES",
+                        help="فقط این صفحات PDF (از 1)، مثلاً 1-3,10 یا 5- تا آخر")
+    parser.add_argument("--sniff-zip", action="store_true",
+                        help="استخراج از فایل‌های .zip با تشخیص فرمت از محتوا (EPUB، ODF، OOXML یا CBZ)")
+    parser.add_argument("--slides", metavar="RANGES",
+                        help="فقط تصاویر این اسلایدهای PowerPoint (از 1)، مثلاً 1 یا 2-4")
+    parser.add_argument("--max-memory", type=float, metavar="MB",
+                        help="حالت جریانی با سقف حافظه؛ اشیای هر صفحه PDF پس از استفاده آزاد می‌شوند")
+    parser.add_argument("--index", metavar="DB",
+                        help="شاخص SQLite ماندگار؛ تصاویری که در اجراهای قبلی نوشته شده‌اند دوباره نوشته نمی‌شوند")
+    parser.add_argument("--index-compact", action="store_true",
+                        help="حذف رکوردهای فایل‌های پاک شده از شاخص و فشرده‌سازی آن")
+    parser.add_argument("--index-evict-days", type=float, metavar="DAYS",
+                        help="حذف رکوردهایی که در این تعداد روز دیده نشده‌اند")
+    parser.add_argument("--index-max-entries", type=int, metavar="N",
+                        help="نگه داشتن حداکثر N رکورد جدیدتر در شاخص")
+    parser.add_argument("--sink", default="dir", metavar="{dir,tar,zip,pack[:PATH]}",
+                        help="مقصد خروجی: فایل‌های جدا (dir)، بایگانی tar یا ZIP بدون فشرده‌سازی برای هر سند، "
+                             "یا یک فایل pack با شاخص آفست (پیش‌فرض: dir)")
+    parser.add_argument("--thumbnails", metavar="SIZES",
+                        help="نوشتن تصاویر بندانگشتی JPEG کنار هر تصویر، مثلاً 128,512 (حداکثر طول ضلع بزرگ‌تر)")
+    parser.add_argument("--manifest", dest="manifest_path", metavar="JSONL",
+                        help="افزودن یک رکورد JSON برای هر تصویر ذخیره شده (سند، صفحه، ابعاد، چکیده، مسیر خروجی)")
+    parser.add_argument("--stats", action="store_true",
+                        help="نمایش جدول زمان هر مرحله (باز کردن، بارگذاری، چکیده، تبدیل، نوشتن) در پایان")
+    parser.add_argument("--metrics", dest="metrics_path", metavar="FILE",
+                        help="ذخیره متریک‌ها در فایل JSON، یا قالب textfile پرومتئوس اگر پسوند .prom باشد")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="اجرای هر سند زیر profiler و ذخیره نتیجه در این پوشه")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile",
+                        help="profiler مورد استفاده با --profile-dir (پیش‌فرض: cprofile)")
+    parser.add_argument("--incremental", metavar="STATE",
+                        help="فایل وضعیت JSON؛ اسنادی که از اجرای قبل تغییر نکرده‌اند رد می‌شوند")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers باید حداقل 1 باشد")
+    if args.jobs < 1:
+        parser.error("--jobs باید حداقل 1 باشد")
+    if args.near_distance is not None and not 0 <= args.near_distance < 64:
+        parser.error("--near-duplicates باید بین 0 و 63 باشد")
+    if args.fsync_batch is not None and args.fsync_batch < 1:
+        parser.error("اندازه دسته --fsync باید حداقل 1 باشد")
+    if (args.quality is not None or args.max_dimension is not None) and not args.output_profile:
+        parser.error("--quality و --max-dimension به --output-profile نیاز دارند")
+    sink_kind, _, sink_path = args.sink.partition(":")
+    if sink_kind not in SINKS or (sink_path and sink_kind != "pack"):
+        parser.error(f"مقصد خروجی ناشناخته: {args.sink}")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        parser.error("--quality باید بین 1 و 100 باشد")
+    try:
+        pages = parse_page_ranges(args.pages) if args.pages else None
+        slides = parse_page_ranges(args.slides) if args.slides else None
+        thumbnail_sizes = parse_thumbnail_sizes(args.thumbnails) if args.thumbnails else None
+    except ValueError as e:
+        parser.error(str(e))
+    maintenance = args.index_compact or args.index_evict_days is not None or args.index_max_entries is not None
+    if maintenance and not args.index:
+        parser.error("عملیات نگهداری شاخص به --index نیاز دارد")
+    if maintenance:
+        maintain_index(args.index, args.hash_algorithm, compact=args.index_compact,
+                       max_age_days=args.index_evict_days, max_entries=args.index_max_entries)
+        if not args.paths and not args.stdin:
+            return
+    if not args.paths and not args.stdin:
+        parser.print_help()
         sys.exit(1)
 
-    file_path = sys.argv[1]
-    
-    if not os.path.exists(file_path):
-        print(f"❌ فایل پیدا نشد: {file_path}")
+    memory_limit = int(args.max_memory * 1024 * 1024) if args.max_memory else None
+    metrics = Metrics() if args.stats or args.metrics_path else None
+    image_filter = ImageFilter(args.min_bytes, args.min_width, args.min_height, args.max_pixels)
+    extract_options = {'workers': args.workers, 'naming': args.naming, 'passthrough': args.passthrough,
+                       'memory_limit': memory_limit, 'convert_workers': args.convert_workers,
+                       'write_workers': args.write_workers, 'fsync_batch': args.fsync_batch,
+                       'image_filter': image_filter or None, 'manifest_path': args.manifest_path,
+                       'profile_dir': args.profile_dir, 'profiler': args.profiler, 'pages': pages, 'slides': slides,
+                       'sink': args.sink, 'thumbnail_sizes': thumbnail_sizes, 'sniff_zip': args.sniff_zip,
+                       'profile': get_profile(args.output_profile, args.quality, args.max_dimension)
+                       if args.output_profile else None}
+
+    if len(args.paths) == 1 and not args.stdin and not os.path.isdir(args.paths[0]) \
+            and not glob.has_magic(args.paths[0]):
+        file_path = args.paths[0]
+        if not os.path.exists(file_path):
+            print(f"❌ فایل پیدا نشد: {file_path}")
+            sys.exit(1)
+        manifest = SourceManifest(args.incremental, args.hash_algorithm, extraction_settings(extract_options)) \
+            if args.incremental else None
+        if manifest is not None and manifest.is_unchanged(file_path):
+            manifest.save()
+            print(f"⏭️ فایل از آخرین استخراج تغییر نکرده است: {file_path}")
+            return
+        source_fingerprint = file_fingerprint(file_path, args.hash_algorithm) if manifest is not None else None
+        with open_dedup_index(args.index, args.hash_algorithm, memory_limit, args.near_distance) as dedup:
+            outputs = extract_images(file_path, dedup=dedup, metrics=metrics, **extract_options)
+            if args.index:
+                print(f"📇 {dedup.hits} تصویر از قبل در شاخص موجود بود")
+        if manifest is not None and outputs is not None:
+            manifest.update(file_path, source_fingerprint, outputs)
+            manifest.save()
+        report_metrics(metrics, args.stats, args.metrics_path)
+        return
+
+    from batch import iter_input_paths, run_batch
+    manifest = SourceManifest(args.incremental, args.hash_algorithm, extraction_settings(extract_options)) \
+        if args.incremental else None
+    paths = iter_input_paths(args.paths, read_stdin=args.stdin, sniff_zip=args.sniff_zip)
+    stats = run_batch(paths, jobs=args.jobs, hash_algorithm=args.hash_algorithm, index_path=args.index,
+                      manifest=manifest, near_distance=args.near_distance, metrics=metrics, **extract_options)
+    report_metrics(metrics, args.stats, args.metrics_path)
+    if stats['failed']:
         sys.exit(1)
-    
-    extract_images(file_path)
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Background conversion stage
+مرحله تبدیل پس‌زمینه: استخراج و decode/encode تصاویر هم‌پوشانی دارند
+"""
+
+import queue
+import threading
+
+
+class ConversionPool:
+    """
+    مجموعه نخ‌های تبدیل با صف محدود
+
+    تولیدکننده (حلقه استخراج) کارها را با submit در صف می‌گذارد و اگر صف پر باشد
+    منتظر می‌ماند؛ به این ترتیب حداکثر max_pending داده خام هم‌زمان در حافظه است.
+    Pillow هنگام decode و encode قفل GIL را آزاد می‌کند، پس نخ‌ها واقعاً موازی اجرا
+    می‌شوند. نتایج در نخ تولیدکننده با completed یا close تحویل داده می‌شوند تا
+    کارهایی مثل ثبت در شاخص SQLite فقط در یک نخ انجام شوند.
+    """
+
+    def __init__(self, workers, max_pending=None):
+        if workers < 1:
+            raise ValueError("تعداد نخ‌های تبدیل باید حداقل 1 باشد")
+        self.workers = workers
+        self._jobs = queue.Queue(maxsize=max_pending or workers * 2)
+        self._results = queue.Queue()
+        self._closed = False
+        self._threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._run, name=f"convert-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            func, args = job
+            try:
+                self._results.put((None, func(*args)))
+            except Exception as e:
+                self._results.put((e, None))
+
+    def submit(self, func, *args):
+        """
+        افزودن یک کار به صف (در صورت پر بودن صف مسدود می‌شود)
+
+        Args:
+            func (callable): تابعی که در نخ تبدیل اجرا می‌شود
+            *args: آرگومان‌های تابع
+        """
+        self._jobs.put((func, args))
+
+    def completed(self):
+        """
+        تحویل نتایج کارهای تمام شده بدون انتظار
+
+        Yields:
+            مقدار بازگشتی هر کار
+
+        Raises:
+            Exception: اولین خطای رخ داده در نخ‌های تبدیل
+        """
+        while True:
+            try:
+                error, result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if error is not None:
+                raise error
+            yield result
+
+    def close(self):
+        """
+        انتظار برای پایان همه کارها و توقف نخ‌ها
+
+        Returns:
+            list: نتایج باقی‌مانده
+        """
+        self._stop()
+        return list(self.completed())
+
+    def _stop(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            # کارهای در صف را دور بریز تا نخ‌ها سریع متوقف شوند
+            while True:
+                try:
+                    self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+        self._stop()
@@ -0,0 +1,374 @@
+"""
+Content-hash deduplication for extracted images
+حذف تصاویر تکراری بر اساس اندازه و چکیده محتوا
+"""
+
+import hashlib
+import os
+import time
+from collections import deque, namedtuple
+
+from metrics import stage
+from perceptual import NearDuplicateIndex
+from sinks import location_exists
+
+try:
+    import xxhash
+except ImportError:  # وابستگی اختیاری
+    xxhash = None
+
+
+DEFAULT_ALGORITHM = "blake2b"
+CHUNK_SIZE = 1024 * 1024
+
+
+def available_algorithms():
+    """
+    دریافت الگوریتم‌های چکیده قابل استفاده
+
+    Returns:
+        list: نام الگوریتم‌ها (xxh3 فقط در صورت نصب بودن xxhash)
+    """
+    algorithms = ["blake2b", "sha256"]
+    if xxhash is not None:
+        algorithms.append("xxh3")
+    return algorithms
+
+
+def new_hasher(algorithm=DEFAULT_ALGORITHM):
+    """
+    ساخت شیء hash جریانی برای الگوریتم داده شده
+
+    Args:
+        algorithm (str): blake2b، sha256 یا xxh3
+
+    Returns:
+        شیء دارای متدهای update و hexdigest
+    """
+    if algorithm == "blake2b":
+        return hashlib.blake2b(digest_size=16)
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "xxh3":
+        if xxhash is None:
+            raise ValueError("برای الگوریتم xxh3 بسته xxhash باید نصب باشد")
+        return xxhash.xxh3_128()
+    raise ValueError(f"الگوریتم چکیده ناشناخته: {algorithm}")
+
+
+class ImageKey(namedtuple("ImageKey", ["size", "digest"])):
+    """کلید محتوای تصویر: (اندازه به بایت، چکیده hex)"""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return self.digest
+
+
+def content_key(data, algorithm=DEFAULT_ALGORITHM):
+    """
+    محاسبه کلید محتوا برای داده‌های درون حافظه
+
+    Args:
+        data (bytes): داده‌های تصویر
+        algorithm (str): الگوریتم چکیده
+
+    Returns:
+        ImageKey: کلید (size, digest)
+    """
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return ImageKey(len(data), hasher.hexdigest())
+
+
+def stream_key(fileobj, algorithm=DEFAULT_ALGORITHM):
+    """
+    محاسبه کلید محتوا با خواندن تکه‌تکه از یک فایل یا عضو ZIP
+
+    Args:
+        fileobj: شیء قابل خواندن باینری
+        algorithm (str): الگوریتم چکیده
+
+    Returns:
+        ImageKey: کلید (size, digest)
+    """
+    hasher = new_hasher(algorithm)
+    size = 0
+    while True:
+        chunk = fileobj.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        size += len(chunk)
+    return ImageKey(size, hasher.hexdigest())
+
+
+class DedupIndex:
+    """
+    شاخص درون حافظه تصاویر دیده شده
+
+    کلیدها بر اساس اندازه دسته‌بندی می‌شوند؛ تصویری با اندازه تازه بدون مقایسه چکیده
+    جدید شناخته می‌شود و فقط تصاویر هم‌اندازه چکیده‌هایشان مقایسه می‌شود.
+
+    با max_entries حافظه شاخص محدود می‌شود: قدیمی‌ترین کلیدها کنار گذاشته می‌شوند و
+    تکرار آن‌ها پس از فاصله‌ای طولانی دیگر تشخیص داده نمی‌شود.
+
+    با near_distance، تصاویری که بایت‌هایشان تازه است ولی چکیده ادراکی‌شان حداکثر
+    near_distance بیت با تصویر قبلی فاصله دارد هم تکراری شمرده می‌شوند (add_near).
+    """
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, max_entries=None, near_distance=None):
+        new_hasher(algorithm)  # خطای زودهنگام برای الگوریتم نامعتبر
+        self.algorithm = algorithm
+        self.max_entries = max_entries
+        self._by_size = {}
+        self._count = 0
+        self._order = deque() if max_entries else None
+        self.near = NearDuplicateIndex(near_distance) if near_distance is not None else None
+        self._fingerprints = {}
+
+    def key_for(self, data):
+        """محاسبه کلید داده‌ها با الگوریتم همین شاخص"""
+        with stage("hash"):
+            return content_key(data, self.algorithm)
+
+    def __contains__(self, key):
+        digests = self._by_size.get(key.size)
+        return digests is not None and key.digest in digests
+
+    def __len__(self):
+        return self._count
+
+    def add(self, key):
+        """
+        ثبت کلید در شاخص
+
+        Args:
+            key (ImageKey): کلید تصویر
+
+        Returns:
+            bool: True اگر تصویر تازه باشد، False اگر قبلاً دیده شده
+        """
+        digests = self._by_size.get(key.size)
+        if digests is None:
+            self._by_size[key.size] = {key.digest}
+        elif key.digest in digests:
+            return False
+        else:
+            digests.add(key.digest)
+        self._count += 1
+        if self._order is not None:
+            self._order.append(key)
+            if self._count > self.max_entries:
+                self._evict_oldest()
+        return True
+
+    def _evict_oldest(self):
+        oldest = self._order.popleft()
+        digests = self._by_size[oldest.size]
+        digests.discard(oldest.digest)
+        if not digests:
+            del self._by_size[oldest.size]
+        self._count -= 1
+
+    def add_near(self, key, fingerprint):
+        """
+        بررسی تصویر تقریباً تکراری (پس از اینکه add آن را تازه تشخیص داده)
+
+        چکیده تصویر تازه تا نوشتن موفق آن (record) فقط نگه داشته می‌شود، تا تصویری که
+        تبدیلش شکست خورده جلوی ذخیره تصاویر مشابه بعدی را نگیرد.
+
+        Args:
+            key (ImageKey): کلید تصویر
+            fingerprint (int): چکیده ادراکی (NearDuplicateIndex.fingerprint)
+
+        Returns:
+            ImageKey: کلید تصویر مشابه ذخیره شده، یا None اگر تصویر تازه باشد
+        """
+        if self.near is None or fingerprint is None:
+            return None
+        similar = self.near.match(fingerprint)
+        if similar is None:
+            self._fingerprints[key] = fingerprint
+        return similar
+
+    def _commit_fingerprint(self, key):
+        # افزودن چکیده ادراکی تصویری که نوشته شده به درخت BK
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is not None:
+            self.near.add(fingerprint, key)
+        return fingerprint
+
+    def record(self, key, output_path):
+        """
+        ثبت مسیر خروجی تصویری که تازه نوشته شده
+
+        چکیده ادراکی تصویر همین‌جا به شاخص تصاویر مشابه اضافه می‌شود. شاخص درون حافظه
+        نیازی به مسیر ندارد؛ شاخص‌های ماندگار آن را نگه می‌دارند.
+        """
+        self._commit_fingerprint(key)
+
+    def close(self):
+        """آزادسازی منابع شاخص"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PersistentDedupIndex(DedupIndex):
+    """
+    شاخص ماندگار مبتنی بر SQLite برای حذف تکراری‌ها بین اجراهای مختلف
+
+    هر تصویر نوشته شده با کلید (algorithm, size, digest) و مسیر خروجی‌اش ثبت می‌شود.
+    در اجرای بعدی، تصویری که فایلش هنوز وجود دارد فقط یک برخورد متادیتا است و
+    دوباره نوشته نمی‌شود. چکیده ادراکی هم (در صورت فعال بودن) کنار هر رکورد ذخیره و
+    در اولین بررسی به درخت BK بارگذاری می‌شود تا تصاویر مشابه بین اجراها هم تشخیص
+    داده شوند.
+    """
+
+    COMMIT_EVERY = 256
+
+    def __init__(self, db_path, algorithm=DEFAULT_ALGORITHM, max_entries=None, near_distance=None):
+        super().__init__(algorithm, max_entries, near_distance)
+        self._near_loaded = False
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self.hits = 0
+        self._pending = 0
+        # چند پردازه دسته‌ای می‌توانند هم‌زمان روی یک شاخص بنویسند
+        import sqlite3
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " algorithm TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (algorithm, size, digest)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_last_seen ON images (last_seen)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+        if "phash" not in columns:  # شاخص‌های ساخته شده با نسخه‌های قبلی
+            self._conn.execute("ALTER TABLE images ADD COLUMN phash INTEGER")
+        self._conn.commit()
+
+    def lookup(self, key):
+        """
+        جستجوی مسیر خروجی ثبت شده برای یک کلید
+
+        Returns:
+            str: مسیر فایل یا None
+        """
+        row = self._conn.execute(
+            "SELECT path FROM images WHERE algorithm = ? AND size = ? AND digest = ?",
+            (self.algorithm, key.size, key.digest),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, key):
+        if not super().add(key):
+            return False
+
+        stored_path = self.lookup(key)
+        if stored_path is None or not location_exists(stored_path):
+            # تصویر تازه یا فایل قبلی پاک شده؛ باید نوشته شود
+            return True
+
+        self._conn.execute(
+            "UPDATE images SET last_seen = ?, hits = hits + 1 WHERE algorithm = ? AND size = ? AND digest = ?",
+            (time.time(), self.algorithm, key.size, key.digest),
+        )
+        self.hits += 1
+        self._maybe_commit()
+        return False
+
+    def add_near(self, key, fingerprint):
+        if self.near is None or fingerprint is None:
+            return None
+        if not self._near_loaded:
+            rows = self._conn.execute(
+                "SELECT size, digest, phash FROM images WHERE algorithm = ? AND phash IS NOT NULL", (self.algorithm,))
+            for size, digest, phash in rows:
+                # SQLite فقط عدد صحیح علامت‌دار 64 بیتی دارد
+                self.near.add(phash & 0xFFFFFFFFFFFFFFFF, ImageKey(size, digest))
+            self._near_loaded = True
+        return super().add_near(key, fingerprint)
+
+    def record(self, key, output_path):
+        now = time.time()
+        phash = self._commit_fingerprint(key)
+        if phash is not None and phash >= 1 << 63:
+            phash -= 1 << 64
+        self._conn.execute(
+            "INSERT INTO images (algorithm, size, digest, path, first_seen, last_seen, phash)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (algorithm, size, digest) DO UPDATE SET path = excluded.path, last_seen = excluded.last_seen,"
+            " phash = COALESCE(excluded.phash, images.phash)",
+            (self.algorithm, key.size, key.digest, os.path.abspath(output_path), now, now, phash),
+        )
+        self._maybe_commit()
+
+    def _maybe_commit(self):
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+
+    def compact(self):
+        """
+        حذف رکوردهایی که فایل خروجی‌شان دیگر وجود ندارد و فشرده‌سازی پایگاه داده
+
+        Returns:
+            int: تعداد رکوردهای حذف شده
+        """
+        rows = self._conn.execute("SELECT algorithm, size, digest, path FROM images").fetchall()
+        missing = [(algorithm, size, digest) for algorithm, size, digest, path in rows
+                   if not location_exists(path)]
+        self._conn.executemany("DELETE FROM images WHERE algorithm = ? AND size = ? AND digest = ?", missing)
+        self._conn.commit()
+        self._pending = 0
+        self._conn.execute("VACUUM")
+        return len(missing)
+
+    def evict(self, max_age_days=None, max_entries=None):
+        """
+        بیرون راندن رکوردهای قدیمی از شاخص
+
+        Args:
+            max_age_days (float): حذف رکوردهایی که در این تعداد روز دیده نشده‌اند
+            max_entries (int): نگه داشتن حداکثر این تعداد رکورد (جدیدترین‌ها)
+
+        Returns:
+            int: تعداد رکوردهای حذف شده
+        """
+        removed = 0
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            removed += self._conn.execute("DELETE FROM images WHERE last_seen < ?", (cutoff,)).rowcount
+        if max_entries is not None:
+            removed += self._conn.execute(
+                "DELETE FROM images WHERE (algorithm, size, digest) IN ("
+                " SELECT algorithm, size, digest FROM images ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            ).rowcount
+        self._conn.commit()
+        self._pending = 0
+        return removed
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,847 @@
+"""
+Unified image extraction engine
+هسته مشترک استخراج تصاویر برای رابط خط فرمان و رابط گرافیکی
+
+هر فرمت یک backend دارد که با register_backend برای پسوندهایش ثبت می‌شود و یک
+مولد از ExtractedImage برمی‌گرداند. بایت‌های هر تصویر فقط هنگام دسترسی به data
+بارگذاری می‌شوند، پس فراخواننده می‌تواند بدون نوشتن روی دیسک پیمایش، فیلتر یا
+موازی‌سازی کند.
+"""
+
+import gc
+import io
+import logging
+import os
+import posixpath
+import re
+from collections import deque, namedtuple
+from contextlib import ExitStack
+from functools import partial
+
+# pypdf، Pillow و zipfile داخل backendها import می‌شوند تا هر فرمت فقط هنگام اولین
+# استفاده هزینه بارگذاری کتابخانه‌اش را بپردازد
+from metrics import count, stage
+from profiles import thumbnails_from_data, transcode, transcode_with_thumbnails
+from utils import convert_jp2_to_png, format_file_size, get_memory_usage, normalize_extension
+
+
+_BACKENDS = {}
+
+# فیلترهایی که جریانشان خودش یک فایل تصویر کامل است و می‌توان بدون decode کپی کرد
+_PASSTHROUGH_FILTERS = {"/DCTDecode": ".jpg", "/JPXDecode": ".jp2"}
+
+# فضاهای نام Open Packaging Conventions و PresentationML
+_RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_PRESENTATION_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_OFFICE_RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def register_backend(*extensions):
+    """
+    دکوراتور ثبت یک backend برای پسوندهای داده شده
+
+    backend با (file_path, **options) فراخوانی می‌شود و باید گزینه‌هایی را که
+    نمی‌شناسد نادیده بگیرد.
+    """
+    def decorator(func):
+        for ext in extensions:
+            _BACKENDS[ext.lower()] = func
+        return func
+    return decorator
+
+
+def get_backend(file_path):
+    """
+    دریافت backend مناسب برای یک فایل
+
+    Returns:
+        callable: backend یا None اگر فرمت پشتیبانی نشود
+    """
+    _, ext = os.path.splitext(file_path)
+    return _BACKENDS.get(ext.lower())
+
+
+def supported_extensions():
+    """
+    دریافت پسوندهایی که backend دارند
+
+    Returns:
+        list: پسوندها به ترتیب الفبا
+    """
+    return sorted(_BACKENDS)
+
+
+class ExtractedImage:
+    """
+    یک تصویر از سند منبع با بایت‌هایی که به صورت تنبل بارگذاری می‌شوند
+
+    loader یا bytes برمی‌گرداند یا (name, bytes) برای backendهایی که نام نهایی
+    (و پسوند) را فقط پس از decode می‌دانند.
+    """
+
+    __slots__ = ("source", "page", "member", "size_hint", "_name", "_data", "_loader", "_dimensions", "_probe",
+                 "_prefetched")
+
+    def __init__(self, source, loader, name=None, page=None, member=None, size_hint=None, dimensions=None,
+                 probe=None):
+        self.source = source
+        self.page = page
+        self.member = member
+        self.size_hint = size_hint
+        self._name = name
+        self._data = None
+        self._loader = loader
+        self._dimensions = dimensions
+        self._probe = probe
+        self._prefetched = None
+
+    def prefetch(self, loader):
+        """
+        استفاده از loader داده شده (مثلاً Future.result یک خواندن در پس‌زمینه) فقط برای
+        اولین بارگذاری؛ پس از release دوباره loader اصلی استفاده می‌شود
+        """
+        self._prefetched = loader
+
+    def _load(self):
+        loader, self._prefetched = self._prefetched or self._loader, None
+        with stage("load"):
+            result = loader()
+        if isinstance(result, tuple):
+            self._name, self._data = result
+        else:
+            self._data = result
+        count("bytes_in", len(self._data))
+
+    @property
+    def name(self):
+        """نام اصلی تصویر در سند"""
+        if self._name is None:
+            self._load()
+        return self._name
+
+    @property
+    def ext(self):
+        """پسوند نرمال شده تصویر"""
+        return normalize_extension(os.path.splitext(self.name)[1])
+
+    @property
+    def data(self):
+        """بایت‌های تصویر (در اولین دسترسی بارگذاری می‌شوند)"""
+        if self._data is None:
+            self._load()
+        return self._data
+
+    @property
+    def dimensions(self):
+        """
+        (width, height) تصویر بدون decode کامل
+
+        از متادیتای سند (مثلاً /Width و /Height در PDF)، یا با probe، یا در آخر از
+        سرآیند بایت‌ها خوانده می‌شود. None اگر Pillow فرمت را نشناسد.
+        """
+        if self._dimensions is None and self._probe is not False:
+            probe = self._probe or (lambda: header_dimensions(io.BytesIO(self.data)))
+            self._dimensions = probe()
+            self._probe = False
+        return self._dimensions
+
+    def release(self):
+        """آزاد کردن بایت‌های بارگذاری شده؛ دسترسی بعدی دوباره بارگذاری می‌کند"""
+        self._data = None
+
+    def __repr__(self):
+        location = f"page={self.page}" if self.page is not None else f"member={self.member!r}"
+        return f"ExtractedImage({os.path.basename(self.source)!r}, {location}, name={self._name!r})"
+
+
+def header_dimensions(fileobj):
+    """
+    خواندن ابعاد تصویر فقط از سرآیند (Image.open پیکسل‌ها را decode نمی‌کند)
+
+    Returns:
+        tuple: (width, height) یا None اگر فرمت شناخته نشود
+    """
+    from PIL import Image
+    try:
+        with Image.open(fileobj) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+class ImageFilter(namedtuple("ImageFilter", ["min_bytes", "min_width", "min_height", "max_pixels"])):
+    """
+    فیلتر اندازه و ابعاد که پیش از decode یا نوشتن تصویر بررسی می‌شود
+
+    اندازه از size_hint (اندازه عضو ZIP، یا /Length جریان در PDF) و ابعاد از
+    ExtractedImage.dimensions خوانده می‌شوند؛ تصویری که ابعادش قابل تشخیص نیست (مثلاً
+    EMF) فقط با min_bytes سنجیده می‌شود. برای تصاویر PDF که decode می‌شوند min_bytes با
+    اندازه جریان کدگذاری شده مقایسه می‌شود، پس تصاویر رد شده هرگز decode نمی‌شوند.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, min_bytes=None, min_width=None, min_height=None, max_pixels=None):
+        return super().__new__(cls, min_bytes, min_width, min_height, max_pixels)
+
+    def __bool__(self):
+        return any(value is not None for value in self)
+
+    def accepts(self, image):
+        """
+        بررسی عبور یک تصویر از فیلتر
+
+        Args:
+            image (ExtractedImage): تصویر
+
+        Returns:
+            bool: True اگر تصویر باید نگه داشته شود
+        """
+        if self.min_bytes is not None and image.size_hint is not None and image.size_hint < self.min_bytes:
+            return False
+
+        dimensions = None
+        if self.min_width is not None or self.min_height is not None or self.max_pixels is not None:
+            dimensions = image.dimensions
+        if dimensions is not None:
+            width, height = dimensions
+            if self.min_width is not None and width < self.min_width:
+                return False
+            if self.min_height is not None and height < self.min_height:
+                return False
+            if self.max_pixels is not None and width * height > self.max_pixels:
+                return False
+
+        # بدون size_hint اندازه فقط پس از بارگذاری بایت‌ها معلوم است، پس آخرین بررسی است
+        if self.min_bytes is not None and image.size_hint is None and len(image.data) < self.min_bytes:
+            return False
+        return True
+
+
+def iter_images(file_path, sniff_zip=False, **options):
+    """
+    پیمایش تصاویر یک سند با backend ثبت شده برای پسوندش
+
+    Args:
+        file_path (str): مسیر سند
+        sniff_zip (bool): خواندن فایل‌های .zip با iter_zip_archive_images (فرمت از محتوا تشخیص داده می‌شود)
+        **options: گزینه‌های backend (مثلاً image_filter، یا passthrough و memory_limit برای PDF)
+
+    Returns:
+        Iterator[ExtractedImage]: مولد تصاویر
+
+    Raises:
+        ValueError: اگر فرمت فایل پشتیبانی نشود
+    """
+    backend = get_backend(file_path)
+    if backend is None and sniff_zip and os.path.splitext(file_path)[1].lower() == ".zip":
+        backend = iter_zip_archive_images
+    if backend is None:
+        raise ValueError(f"فرمت فایل پشتیبانی نمی‌شود: {os.path.splitext(file_path)[1].lower()}")
+    return backend(file_path, **options)
+
+
+def parse_page_ranges(spec):
+    """
+    تجزیه انتخاب صفحات یا اسلایدها مثل "1-3,10" یا "5-" (از 1)
+
+    Args:
+        spec (str): بازه‌های جدا شده با ویرگول؛ "N-" یعنی از N تا آخر
+
+    Returns:
+        tuple: بازه‌های (first, last) از 1؛ last برای بازه باز None است
+
+    Raises:
+        ValueError: اگر انتخاب نامعتبر باشد
+    """
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        first, dash, last = part.partition("-")
+        try:
+            first = int(first)
+            last = (int(last) if last.strip() else None) if dash else first
+        except ValueError:
+            raise ValueError(f"انتخاب صفحات نامعتبر: {part!r}") from None
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"انتخاب صفحات نامعتبر: {part!r}")
+        ranges.append((first, last))
+    return tuple(ranges)
+
+
+def select_pages(ranges, total):
+    """
+    شماره صفحات (از صفر) انتخاب شده در سندی با total صفحه
+
+    Args:
+        ranges (tuple): خروجی parse_page_ranges؛ None یعنی همه صفحات
+        total (int): تعداد صفحات سند
+
+    Returns:
+        Sequence: شماره صفحات به ترتیب و بدون تکرار؛ صفحات بیرون از سند نادیده گرفته می‌شوند
+    """
+    if ranges is None:
+        return range(total)
+    selected = set()
+    for first, last in ranges:
+        selected.update(range(first - 1, min(last if last is not None else total, total)))
+    return sorted(selected)
+
+
+# پسوندهایی که پیش از ذخیره decode و دوباره کدگذاری می‌شوند
+CONVERTED_EXTENSIONS = {".jp2"}
+
+
+def needs_conversion(image, profile=None):
+    """بررسی اینکه ذخیره تصویر (با پروفایل خروجی داده شده) به decode نیاز دارد"""
+    return image.ext in (CONVERTED_EXTENSIONS if profile is None else profile.decode)
+
+
+def convert_image_data(name, data, profile=None):
+    """
+    آماده‌سازی بایت‌های یک تصویر برای ذخیره
+
+    بدون پروفایل فقط JP2 به PNG تبدیل می‌شود؛ با پروفایل، تبدیل و تنظیمات encoder
+    از پروفایل می‌آیند (profiles.PROFILES).
+
+    Args:
+        name (str): نام اصلی تصویر (برای تشخیص پسوند)
+        data (bytes): بایت‌های تصویر
+        profile (OutputProfile): پروفایل خروجی
+
+    Returns:
+        tuple: (ext, data)؛ در صورت شکست تبدیل (None, None)
+    """
+    ext = normalize_extension(os.path.splitext(name)[1])
+    if profile is not None:
+        if ext not in profile.decode:
+            return ext, data
+        with stage("convert"):
+            return transcode(data, ext, profile)
+    if ext not in CONVERTED_EXTENSIONS:
+        return ext, data
+    with stage("convert"):
+        data, ext, success = convert_jp2_to_png(data)
+    if not success:
+        return None, None
+    return ext, data
+
+
+def render_image(name, data, profile=None, thumbnail_sizes=None):
+    """
+    آماده‌سازی بایت‌های یک تصویر برای ذخیره به همراه تصاویر بندانگشتی
+
+    با پروفایل، تصاویر بندانگشتی از همان تصویری ساخته می‌شوند که برای تبدیل decode
+    شده است؛ تصاویر کپی شده (و JP2 بدون پروفایل) یک بار در مقیاس کوچک decode
+    می‌شوند (draft برای JPEG و reduce برای JPEG2000).
+
+    Args:
+        name (str): نام اصلی تصویر (برای تشخیص پسوند)
+        data (bytes): بایت‌های تصویر
+        profile (OutputProfile): پروفایل خروجی
+        thumbnail_sizes (tuple): اندازه‌های تصاویر بندانگشتی؛ None یعنی بدون آن‌ها
+
+    Returns:
+        tuple: (ext, data, thumbnails)؛ در صورت شکست تبدیل (None, None, [])
+    """
+    if not thumbnail_sizes:
+        ext, data = convert_image_data(name, data, profile)
+        return ext, data, []
+    ext = normalize_extension(os.path.splitext(name)[1])
+    if profile is not None and ext in profile.decode:
+        with stage("convert"):
+            return transcode_with_thumbnails(data, ext, profile, thumbnail_sizes)
+    output_ext, output = convert_image_data(name, data, profile)
+    if output_ext is None:
+        return None, None, []
+    with stage("thumbnail"):
+        thumbnails = thumbnails_from_data(data, ext, thumbnail_sizes)
+    return output_ext, output, thumbnails
+
+
+def _image_xobject(page, image_id):
+    """
+    دریافت دیکشنری XObject یک تصویر صفحه
+
+    Returns:
+        DictionaryObject: XObject یا None برای تصاویر درون‌خطی
+    """
+    path = image_id if isinstance(image_id, list) else [image_id]
+    if path[0].startswith("~"):  # تصویر درون‌خطی
+        return None
+    xobject = page
+    try:
+        for name in path:
+            xobject = xobject["/Resources"]["/XObject"][name].get_object()
+    except (KeyError, TypeError):
+        return None
+    return xobject
+
+
+def _xobject_dimensions(xobject):
+    try:
+        return int(xobject["/Width"]), int(xobject["/Height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _xobject_length(xobject):
+    # اندازه جریان کدگذاری شده (/Length) بدون decode؛ pypdf پس از خواندن جریان /Length را
+    # از دیکشنری حذف می‌کند و بایت‌های کدگذاری شده را در _data نگه می‌دارد. pypdf برای
+    # این بایت‌ها accessor عمومی ندارد (get_data جریان را decode می‌کند)، پس نسخه pypdf
+    # در فایل‌های وابستگی به بازه آزموده شده (>=4.0.0,<7) محدود است
+    try:
+        return int(xobject["/Length"])
+    except (KeyError, TypeError, ValueError):
+        data = getattr(xobject, "_data", None)
+        return len(data) if isinstance(data, bytes) else None
+
+
+def _raw_image_stream(image_id, xobject):
+    """
+    بررسی اینکه XObject تصویر را می‌توان بدون decode کپی کرد
+
+    فقط تصاویری که یک فیلتر DCT یا JPX دارند و ماسک یا آرایه Decode ندارند (یعنی فایل
+    نهایی دقیقاً همان جریان است) عبوری در نظر گرفته می‌شوند.
+
+    Returns:
+        str: نام فایل تصویر یا None اگر تصویر باید از مسیر عادی pypdf decode شود
+    """
+    path = image_id if isinstance(image_id, list) else [image_id]
+    filters = xobject.get("/Filter")
+    if isinstance(filters, list):
+        if len(filters) != 1:
+            return None
+        filters = filters[0]
+    ext = _PASSTHROUGH_FILTERS.get(filters)
+    if ext is None or "/SMask" in xobject or "/Mask" in xobject or "/Decode" in xobject:
+        return None
+    return f"{path[-1][1:]}{ext}"
+
+
+def _decode_pdf_image(images, image_id):
+    image = images[image_id]
+    return image.name, image.data
+
+
+def _iter_page_images(pdf_file_path, page, page_index, passthrough=True, image_filter=None):
+    """
+    پیمایش تصاویر یک صفحه
+
+    در حالت passthrough، جریان‌های JPEG و JPEG2000 مستقیماً کپی می‌شوند و فقط بقیه
+    تصاویر از مسیر page.images (که با Pillow بازسازی می‌کند) عبور می‌کنند. تصاویری که
+    از image_filter رد نمی‌شوند با ابعاد /Width و /Height یا اندازه /Length کنار گذاشته
+    می‌شوند و هیچ‌وقت decode نمی‌شوند.
+    """
+    images = page.images
+    for image_id in images.keys():
+        xobject = _image_xobject(page, image_id)
+        dimensions = _xobject_dimensions(xobject) if xobject is not None else None
+        length = _xobject_length(xobject) if xobject is not None else None
+        name = _raw_image_stream(image_id, xobject) if passthrough and xobject is not None else None
+        if name is not None:
+            # برای DCT و JPX خروجی get_data همان جریان خام است
+            image = ExtractedImage(pdf_file_path, xobject.get_data, name=name, page=page_index,
+                                   size_hint=length, dimensions=dimensions)
+        else:
+            image = ExtractedImage(pdf_file_path, partial(_decode_pdf_image, images, image_id), page=page_index,
+                                   size_hint=length, dimensions=dimensions)
+        if image_filter is None or image_filter.accepts(image):
+            yield image
+
+
+def _release_reader_cache(reader):
+    # pypdf همه اشیای تجزیه شده (از جمله جریان‌های decode شده) را در resolved_objects نگه می‌دارد
+    cache = getattr(reader, "resolved_objects", None)
+    if cache is not None:
+        cache.clear()
+
+
+@register_backend(".pdf")
+def iter_pdf_images(pdf_file_path, passthrough=True, memory_limit=None, page_indices=None, on_page=None,
+                    reader=None, image_filter=None, pages=None, **_):
+    """
+    مولد جریانی تصاویر یک PDF، صفحه به صفحه
+
+    تصاویر هر صفحه باید پیش از رفتن به صفحه بعد مصرف شوند؛ با memory_limit پس از هر
+    صفحه حافظه نهان pypdf آزاد می‌شود و اگر RSS از سقف بالاتر برود جمع‌آوری زباله
+    اجرا و هشدار داده می‌شود.
+
+    Args:
+        pdf_file_path (str): مسیر فایل PDF
+        passthrough (bool): کپی مستقیم جریان‌های JPEG/JPEG2000
+        memory_limit (int): سقف حافظه به بایت
+        page_indices (iterable): شماره صفحات (از صفر)؛ پیش‌فرض همه صفحات
+        pages (tuple): انتخاب صفحات (parse_page_ranges) وقتی page_indices داده نشده
+        on_page (callable): فراخوانی با شماره هر صفحه پیش از پردازش آن
+        reader (PdfReader): خواننده از پیش باز شده
+        image_filter (ImageFilter): فیلتر اندازه و ابعاد
+
+    Yields:
+        ExtractedImage: تصاویر به ترتیب صفحات
+    """
+    if reader is None:
+        from pypdf import PdfReader
+        with stage("open"):
+            reader = PdfReader(pdf_file_path)
+    if page_indices is None:
+        page_indices = select_pages(pages, len(reader.pages))
+
+    warned = False
+    for page_index in page_indices:
+        if on_page is not None:
+            on_page(page_index)
+        page = reader.pages[page_index]
+        count("pages")
+        yield from _iter_page_images(pdf_file_path, page, page_index, passthrough, image_filter)
+        del page
+
+        if memory_limit is None:
+            continue
+        _release_reader_cache(reader)
+        if (get_memory_usage() or 0) > memory_limit:
+            gc.collect()
+            if not warned and (get_memory_usage() or 0) > memory_limit:
+                logging.warning(f"مصرف حافظه از سقف {format_file_size(memory_limit)} بالاتر رفت")
+                warned = True
+
+
+def _zip_member_dimensions(zip_ref, file_info):
+    # فقط چند کیلوبایت ابتدای عضو برای سرآیند از حالت فشرده خارج می‌شود
+    with zip_ref.open(file_info) as member:
+        return header_dimensions(member)
+
+
+def _part_relationships(zip_ref, part_name):
+    """
+    روابط داخلی یک part در بسته OPC (مثلاً ppt/slides/_rels/slide1.xml.rels)
+
+    Returns:
+        dict: {rId: (نوع رابطه، نام عضو مقصد)}؛ اگر part رابطه‌ای نداشته باشد خالی
+    """
+    from xml.etree import ElementTree
+    directory, name = posixpath.split(part_name)
+    try:
+        root = ElementTree.fromstring(zip_ref.read(posixpath.join(directory, "_rels", f"{name}.rels")))
+    except KeyError:
+        return {}
+    relationships = {}
+    for relationship in root.iter(f"{_RELATIONSHIPS_NS}Relationship"):
+        target = relationship.get("Target", "")
+        if relationship.get("TargetMode") == "External" or not target:
+            continue
+        member = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(directory, target))
+        relationships[relationship.get("Id")] = (relationship.get("Type", "").rsplit("/", 1)[-1], member)
+    return relationships
+
+
+def _pptx_slide_parts(zip_ref):
+    # ترتیب نمایش اسلایدها از sldIdLst در presentation.xml می‌آید، نه از شماره نام فایل‌ها
+    from xml.etree import ElementTree
+    try:
+        root = ElementTree.fromstring(zip_ref.read("ppt/presentation.xml"))
+    except KeyError:  # بسته ناقص؛ ترتیب بر اساس شماره slideN.xml
+        names = [name for name in zip_ref.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", name)]
+        return sorted(names, key=lambda name: int(name[len("ppt/slides/slide"):-len(".xml")]))
+    relationships = _part_relationships(zip_ref, "ppt/presentation.xml")
+    parts = []
+    for slide in root.iter(f"{_PRESENTATION_NS}sldId"):
+        relationship = relationships.get(slide.get(f"{_OFFICE_RELATIONSHIPS_NS}id"))
+        if relationship is not None:
+            parts.append(relationship[1])
+    return parts
+
+
+def _slide_media(slides, zip_ref):
+    """
+    اعضای تصویری که اسلایدهای انتخاب شده به آن‌ها ارجاع می‌دهند
+
+    فقط presentation.xml، روابط آن و فایل‌های rels اسلایدهای انتخاب شده خوانده
+    می‌شوند؛ XML خود اسلایدها و بقیه اعضا باز نمی‌شوند.
+
+    Returns:
+        list: (نام عضو، شماره اسلاید از صفر) به ترتیب اسلایدها؛ هر عضو فقط یک بار
+    """
+    parts = _pptx_slide_parts(zip_ref)
+    members = {}
+    for index in select_pages(slides, len(parts)):
+        for relationship_type, member in _part_relationships(zip_ref, parts[index]).values():
+            if relationship_type == "image":
+                members.setdefault(member, index)
+    return list(members.items())
+
+
+def _zip_entries(zip_ref, media_prefixes, select_members=None):
+    if select_members is None:
+        for file_info in zip_ref.infolist():
+            if file_info.filename.startswith(media_prefixes) and not file_info.is_dir():
+                yield file_info, None
+        return
+    for member, page in select_members(zip_ref):
+        try:
+            yield zip_ref.getinfo(member), page
+        except KeyError:  # ارجاع به عضوی که در بایگانی نیست
+            continue
+
+
+class _ZipReaders:
+    """
+    خواندن موازی اعضای یک بایگانی ZIP در نخ‌ها
+
+    هر نخ ZipFile مخصوص خودش را روی همان فایل باز می‌کند؛ از حالت فشرده خارج
+    کردن deflate و CRC در zlib بدون GIL اجرا می‌شوند، پس اعضای بزرگ روی چند هسته
+    خوانده می‌شوند. حداکثر workers * 2 عضو جلوتر از مصرف‌کننده خوانده می‌شوند.
+    """
+
+    def __init__(self, zip_file_path, workers):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        self.zip_file_path = zip_file_path
+        self.window = workers * 2
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+        self._futures = deque()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip-reader")
+
+    def _read(self, member):
+        zip_ref = getattr(self._local, "zip_ref", None)
+        if zip_ref is None:
+            import zipfile
+            zip_ref = self._local.zip_ref = zipfile.ZipFile(self.zip_file_path, 'r')
+            with self._handles_lock:
+                self._handles.append(zip_ref)
+        return zip_ref.read(member)
+
+    def submit(self, file_info):
+        """شروع خواندن یک عضو؛ Future با بایت‌های عضو"""
+        while self._futures and self._futures[0].done():
+            self._futures.popleft()
+        future = self._executor.submit(self._read, file_info.filename)
+        self._futures.append(future)
+        return future
+
+    def close(self):
+        """لغو خواندن‌های مصرف نشده و بستن handleهای نخ‌ها"""
+        # shutdown(cancel_futures=True) در پایتون 3.8 وجود ندارد
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        for zip_ref in self._handles:
+            zip_ref.close()
+
+
+def _iter_zip_images(zip_file_path, media_prefixes, valid_extensions=None, image_filter=None, select_members=None,
+                     workers=1):
+    """
+    پیمایش اعضای پوشه‌های media یک بایگانی ZIP (قواعد هر فرمت در ZIP_FORMATS)
+
+    اعضا با پسوند نامعتبر پیش از خواندن کنار گذاشته می‌شوند؛ بایت‌های بقیه مستقیماً
+    از zip_ref.read() و بدون فایل موقت بارگذاری می‌شوند. image_filter با
+    ZipInfo.file_size و سرآیند عضو بررسی می‌شود. select_members (با zip_ref فراخوانی
+    می‌شود و (نام عضو، صفحه) برمی‌گرداند) به جای پیمایش همه اعضا فقط همان‌ها را می‌خواند.
+    با workers > 1 فهرست مرکزی یک بار در همین پردازه خوانده می‌شود و اعضای پذیرفته
+    شده به ترتیب در نخ‌های _ZipReaders از حالت فشرده خارج می‌شوند.
+    نوع اعضای بدون پسوند از امضای ابتدای آن‌ها تشخیص داده می‌شود (sniff_image_extension).
+    """
+    import zipfile
+    with stage("open"):
+        zip_ref = zipfile.ZipFile(zip_file_path, 'r')
+    with ExitStack() as stack:
+        stack.enter_context(zip_ref)
+        readers = None
+        if workers > 1:
+            readers = _ZipReaders(zip_file_path, workers)
+            stack.callback(readers.close)
+        pending = deque()
+        for file_info, page in _zip_entries(zip_ref, media_prefixes, select_members):
+            filename = os.path.basename(file_info.filename)
+            ext = os.path.splitext(filename)[1].lower()
+            if not ext:
+                # عضو بدون پسوند (مثلاً در EPUB یا CBZ)؛ نوع از چند بایت ابتدای آن تشخیص داده می‌شود
+                with zip_ref.open(file_info) as member:
+                    ext = sniff_image_extension(member.read(16))
+                if ext is None and valid_extensions is not None:
+                    continue
+                filename += ext or ""
+            if valid_extensions is not None and ext not in valid_extensions:
+                continue
+
+            image = ExtractedImage(zip_file_path, partial(zip_ref.read, file_info), name=filename, page=page,
+                                   member=file_info.filename, size_hint=file_info.file_size,
+                                   probe=partial(_zip_member_dimensions, zip_ref, file_info))
+            if image_filter is not None and not image_filter.accepts(image):
+                continue
+            if readers is None:
+                yield image
+                continue
+            image.prefetch(readers.submit(file_info).result)
+            pending.append(image)
+            if len(pending) >= readers.window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+class ZipFormat(namedtuple("ZipFormat", ["media_prefixes", "valid_extensions", "mimetype", "select_members"])):
+    """
+    قواعد یافتن تصاویر در یک فرمت مبتنی بر ZIP
+
+    Attributes:
+        media_prefixes (tuple): پوشه‌هایی که تصاویر در آن‌ها هستند؛ "" یعنی کل بایگانی
+        valid_extensions (frozenset): پسوندهای پذیرفته شده، یا None برای همه اعضای پوشه‌ها
+        mimetype (str): MIME type فرمت (عضو mimetype در ODF/EPUB یا part اصلی OOXML)
+        select_members (callable): ترتیب و شماره صفحه اعضا (مانند _iter_zip_images)، یا None
+    """
+
+    __slots__ = ()
+
+
+_IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp", ".jp2"})
+
+# امضای چند بایت ابتدای فایل برای اعضایی که پسوند ندارند
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"II*\x00", ".tif"),
+    (b"MM\x00*", ".tif"),
+    (b"\x00\x00\x00\x0cjP  \r\n\x87\n", ".jp2"),
+    (b"\xff\x4f\xff\x51", ".jp2"),  # codestream خام JPEG 2000
+    (b"BM", ".bmp"),
+)
+
+
+def sniff_image_extension(header):
+    """
+    تشخیص نوع تصویر از بایت‌های ابتدای آن
+
+    Args:
+        header (bytes): حداقل 16 بایت ابتدای فایل
+
+    Returns:
+        str: پسوند نرمال شده، یا None اگر تصویر شناخته شده‌ای نباشد
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    for signature, ext in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return ext
+    return None
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def _comic_pages(zip_ref):
+    # ترتیب صفحات کمیک از نام فایل‌ها می‌آید (page2 پیش از page10)، نه از ترتیب اعضا در بایگانی
+    names = [info.filename for info in zip_ref.infolist() if not info.is_dir()
+             and os.path.splitext(info.filename)[1].lower() in _IMAGE_EXTENSIONS | {""}]
+    return [(name, index) for index, name in enumerate(sorted(names, key=_natural_key))]
+
+
+# فرمت‌های مبتنی بر ZIP که با یک backend مشترک (_iter_zip_images) پیمایش می‌شوند
+ZIP_FORMATS = {
+    ".docx": ZipFormat(("word/media/",), None,
+                       "application/vnd.openxmlformats-officedocument.wordprocessingml.document", None),
+    ".pptx": ZipFormat(("ppt/media/",), frozenset({".jpg", ".jpeg", ".png", ".jp2"}),
+                       "application/vnd.openxmlformats-officedocument.presentationml.presentation", None),
+    ".xlsx": ZipFormat(("xl/media/",), None,
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", None),
+    ".odt": ZipFormat(("Pictures/",), None, "application/vnd.oasis.opendocument.text", None),
+    ".odp": ZipFormat(("Pictures/",), None, "application/vnd.oasis.opendocument.presentation", None),
+    ".ods": ZipFormat(("Pictures/",), None, "application/vnd.oasis.opendocument.spreadsheet", None),
+    ".epub": ZipFormat(("",), _IMAGE_EXTENSIONS, "application/epub+zip", None),
+    ".cbz": ZipFormat(("",), _IMAGE_EXTENSIONS, "application/vnd.comicbook+zip", _comic_pages),
+}
+
+
+def sniff_zip_format(zip_ref):
+    """
+    تشخیص فرمت یک بایگانی ZIP از محتوایش، بدون توجه به پسوند
+
+    عضو mimetype در ODF و EPUB و part اصلی در [Content_Types].xml بسته‌های OOXML
+    خوانده می‌شوند، سپس پوشه‌های media جدول؛ بایگانی بدون هیچ‌کدام که تصویر داشته
+    باشد CBZ در نظر گرفته می‌شود.
+
+    Args:
+        zip_ref (ZipFile): بایگانی باز
+
+    Returns:
+        str: پسوند فرمت در ZIP_FORMATS، یا None اگر شناخته نشود
+    """
+    names = set(zip_ref.namelist())
+    if "mimetype" in names:
+        mimetype = zip_ref.read("mimetype").decode("ascii", "replace").strip()
+        for ext, zip_format in ZIP_FORMATS.items():
+            if zip_format.mimetype == mimetype:
+                return ext
+        # بقیه فرمت‌های OpenDocument (مثلاً odg) هم تصاویر را در Pictures/ نگه می‌دارند
+        return ".odt" if mimetype.startswith("application/vnd.oasis.opendocument.") else None
+    if "[Content_Types].xml" in names:
+        content_types = zip_ref.read("[Content_Types].xml").decode("utf-8", "replace")
+        for ext, zip_format in ZIP_FORMATS.items():
+            if f"{zip_format.mimetype}.main+xml" in content_types:
+                return ext
+    # بسته‌های ناقص یا با part اصلی دیگر (مثلاً docm)؛ از پوشه media تشخیص داده می‌شوند
+    for ext, zip_format in ZIP_FORMATS.items():
+        prefixes = tuple(prefix for prefix in zip_format.media_prefixes if prefix)
+        if prefixes and any(name.startswith(prefixes) for name in names):
+            return ext
+    if any(os.path.splitext(name)[1].lower() in _IMAGE_EXTENSIONS for name in names):
+        return ".cbz"
+    return None
+
+
+def _iter_zip_format(zip_format, zip_file_path, image_filter=None, workers=1, **_):
+    return _iter_zip_images(zip_file_path, zip_format.media_prefixes, zip_format.valid_extensions, image_filter,
+                            zip_format.select_members, workers)
+
+
+@register_backend(".docx")
+def iter_docx_images(docx_file_path, image_filter=None, workers=1, **_):
+    """مولد تصاویر یک سند Word (word/media/)؛ workers نخ‌های خواندن اعضا"""
+    return _iter_zip_format(ZIP_FORMATS[".docx"], docx_file_path, image_filter, workers)
+
+
+@register_backend(".pptx")
+def iter_pptx_images(pptx_file_path, image_filter=None, slides=None, workers=1, **_):
+    """
+    مولد تصاویر یک ارائه PowerPoint (ppt/media/)
+
+    Args:
+        pptx_file_path (str): مسیر فایل
+        image_filter (ImageFilter): فیلتر اندازه و ابعاد
+        slides (tuple): اسلایدهای انتخاب شده (parse_page_ranges)؛ تصاویر از طریق روابط
+            همین اسلایدها پیدا می‌شوند و page هر تصویر شماره اسلاید است
+        workers (int): تعداد نخ‌هایی که اعضای بایگانی را موازی از حالت فشرده خارج می‌کنند
+    """
+    zip_format = ZIP_FORMATS[".pptx"]
+    select_members = partial(_slide_media, slides) if slides is not None else None
+    return _iter_zip_images(pptx_file_path, zip_format.media_prefixes, zip_format.valid_extensions, image_filter,
+                            select_members, workers)
+
+
+def iter_zip_archive_images(zip_file_path, **options):
+    """
+    مولد تصاویر یک بایگانی ZIP عمومی؛ قواعد فرمت از محتوا تشخیص داده می‌شوند (sniff_zip_format)
+
+    برای پسوند .zip ثبت نمی‌شود تا پوشه‌ها و فهرست‌های ورودی هر بایگانی دلخواهی را
+    استخراج نکنند؛ فقط با فراخوانی صریح یا iter_images(..., sniff_zip=True) (گزینه
+    --sniff-zip در CLI) استفاده می‌شود.
+    """
+    import zipfile
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        ext = sniff_zip_format(zip_ref)
+    if ext is None:
+        return iter(())
+    return _BACKENDS[ext](zip_file_path, **options)
+
+
+# بقیه فرمت‌های جدول backend اختصاصی ندارند
+for _ext, _zip_format in ZIP_FORMATS.items():
+    if _ext not in _BACKENDS:
+        register_backend(_ext)(partial(_iter_zip_format, _zip_format))
+del _ext, _zip_format
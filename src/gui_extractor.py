@@ -1,27 +1,11 @@
-import logging
 import os
 import subprocess
-import zipfile
-from uuid import uuid4
-from pypdf import PdfReader
-from PIL import Image
-import io
 import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from threading import Thread
-from utils import (
-    generate_uuid_filename, 
-    ensure_directory_exists,
-    is_supported_format,
-    get_file_info,
-    convert_jp2_to_png,
-    normalize_extension,
-    calculate_progress,
-    format_file_size,
-    get_output_path,
-    ImageProcessor
-)
+from utils import calculate_progress, get_supported_formats
+from cli_extractor import extract_images
 
 class ImageExtractorGUI:
     def __init__(self, root):
@@ -60,6 +44,9 @@ class ImageExtractorGUI:
 • PDF (.pdf)
 • Word (.docx)  
 • PowerPoint (.pptx)
+• Excel (.xlsx)
+• OpenDocument (.odt, .odp, .ods)
+• EPUB و کمیک (.epub, .cbz)
 
 تصاویر استخراج شده در پوشه extracted_images ذخیره می‌شوند.
         """
@@ -102,10 +89,13 @@ class ImageExtractorGUI:
     
     def browse_file(self):
         file_types = [
-            ("فایل‌های پشتیبانی شده", "*.pdf *.docx *.pptx"),
+            ("فایل‌های پشتیبانی شده", " ".join(f"*{ext}" for ext in get_supported_formats())),
             ("فایل‌های PDF", "*.pdf"),
             ("فایل‌های Word", "*.docx"),
-            ("فایل‌های PowerPoint", "*.pptx")
+            ("فایل‌های PowerPoint", "*.pptx"),
+            ("فایل‌های Excel", "*.xlsx"),
+            ("فایل‌های OpenDocument", "*.odt *.odp *.ods"),
+            ("کتاب‌ها و کمیک‌ها", "*.epub *.cbz")
         ]
         
         filename = filedialog.askopenfilename(
@@ -183,169 +173,25 @@ class ImageExtractorGUI:
         else:
             messagebox.showwarning("هشدار", "لطفاً ابتدا یک فایل انتخاب کنید")
     
-    # توابع استخراج (همان توابع قبلی با کمی تغییر)
-    def generate_uuid_filename(self, extension):
-        return f"{uuid4()}{extension.lower()}"
-    
-    def ensure_directory_exists(self, path):
-        if not os.path.exists(path):
-            os.makedirs(path)
-    
+    # استخراج با همان خط لوله مشترک رابط خط فرمان
     def extract_images(self, file_path: str):
         try:
-            output_path = os.path.join(os.path.dirname(file_path), "extracted_images")
             _, file_extension = os.path.splitext(file_path)
-            file_extension = file_extension.lower()
-            
-            self.log(f"در حال پردازش فایل با پسوند: {file_extension}")
+            self.log(f"در حال پردازش فایل با پسوند: {file_extension.lower()}")
             
-            if file_extension == ".pdf":
-                return self.extract_images_from_pdf(file_path, output_path)
-            elif file_extension == ".docx":
-                return self.extract_images_from_docx(file_path, output_path)
-            elif file_extension == ".pptx":
-                return self.extract_images_from_pptx(file_path, output_path)
-            else:
-                self.log(f"فرمت فایل پشتیبانی نمی‌شود: {file_extension}")
+            saved_paths = extract_images(file_path, log=self.log, progress=self.update_progress)
+            if saved_paths is None:
                 return False
-        except Exception as e:
-            self.log(f"خطا در استخراج: {str(e)}")
-            return False
-    
-    def extract_images_from_pdf(self, pdf_file_path: str, output_path: str):
-        try:
-            self.log("در حال خواندن فایل PDF...")
-            reader = PdfReader(pdf_file_path)
-            seen_images = set()
-            self.ensure_directory_exists(output_path)
-            
-            total_pages = len(reader.pages)
-            self.log(f"تعداد صفحات: {total_pages}")
             
-            for i, page in enumerate(reader.pages):
-                self.progress_value.set(int((i / total_pages) * 100))
-                self.status_text.set(f"در حال پردازش صفحه {i+1} از {total_pages}")
-                
-                for image in page.images:
-                    image_data = image.data
-                    image_hash = hash(image_data)
-                    
-                    if image_hash in seen_images:
-                        continue
-                    
-                    seen_images.add(image_hash)
-                    
-                    ext = os.path.splitext(image.name)[1].lower()
-                    if ext == ".jpeg":
-                        ext = ".jpg"
-                    elif ext == ".jp2":
-                        try:
-                            with Image.open(io.BytesIO(image_data)) as img:
-                                if img.mode == "RGBA":
-                                    img = img.convert("RGB")
-                                ext = ".png"
-                                image_data = io.BytesIO()
-                                img.save(image_data, format="PNG")
-                                image_data = image_data.getvalue()
-                        except Exception as e:
-                            self.log(f"خطا در تبدیل JP2 به PNG: {e}")
-                            continue
-                    
-                    image_filename = self.generate_uuid_filename(ext)
-                    file_path = os.path.join(output_path, image_filename)
-                    with open(file_path, "wb") as fp:
-                        fp.write(image_data)
-                    
-                    self.log(f"تصویر ذخیره شد: {image_filename}")
-            
-            self.log(f"تعداد تصاویر استخراج شده: {len(seen_images)}")
+            self.log(f"تعداد تصاویر استخراج شده: {len(saved_paths)}")
             return True
         except Exception as e:
-            self.log(f"خطا در استخراج از PDF: {e}")
-            return False
-    
-    def extract_images_from_docx(self, docx_file_path: str, output_path: str):
-        try:
-            self.ensure_directory_exists(output_path)
-            self.log("در حال استخراج از فایل Word...")
-            
-            # استفاده از zipfile به جای unzip
-            with zipfile.ZipFile(docx_file_path, 'r') as zip_ref:
-                for file_info in zip_ref.infolist():
-                    if file_info.filename.startswith('word/media/'):
-                        zip_ref.extract(file_info, output_path)
-                        filename = os.path.basename(file_info.filename)
-                        original_path = os.path.join(output_path, filename)
-                        
-                        if os.path.exists(original_path):
-                            _, ext = os.path.splitext(filename)
-                            if ext.lower() == ".jpeg":
-                                ext = ".jpg"
-                            elif ext.lower() == ".jp2":
-                                try:
-                                    with Image.open(original_path) as img:
-                                        if img.mode == "RGBA":
-                                            img = img.convert("RGB")
-                                        ext = ".png"
-                                        img.save(original_path, format="PNG")
-                                except Exception as e:
-                                    self.log(f"خطا در تبدیل JP2 به PNG: {e}")
-                                    os.remove(original_path)
-                                    continue
-                            
-                            new_filename = self.generate_uuid_filename(ext)
-                            new_path = os.path.join(output_path, new_filename)
-                            os.rename(original_path, new_path)
-                            self.log(f"تصویر ذخیره شد: {new_filename}")
-            
-            return True
-        except Exception as e:
-            self.log(f"خطا در استخراج از Word: {e}")
+            self.log(f"خطا در استخراج: {str(e)}")
             return False
     
-    def extract_images_from_pptx(self, pptx_file_path: str, output_path: str):
-        try:
-            self.ensure_directory_exists(output_path)
-            self.log("در حال استخراج از فایل PowerPoint...")
-            
-            # استفاده از zipfile به جای unzip
-            with zipfile.ZipFile(pptx_file_path, 'r') as zip_ref:
-                for file_info in zip_ref.infolist():
-                    if file_info.filename.startswith('ppt/media/'):
-                        zip_ref.extract(file_info, output_path)
-                        filename = os.path.basename(file_info.filename)
-                        original_path = os.path.join(output_path, filename)
-                        
-                        if os.path.exists(original_path):
-                            _, ext = os.path.splitext(filename)
-                            valid_extensions = {".jpg", ".jpeg", ".png", ".jp2"}
-                            
-                            if ext.lower() == ".jpeg":
-                                ext = ".jpg"
-                            elif ext.lower() == ".jp2":
-                                try:
-                                    with Image.open(original_path) as img:
-                                        if img.mode == "RGBA":
-                                            img = img.convert("RGB")
-                                        ext = ".png"
-                                        img.save(original_path, format="PNG")
-                                except Exception as e:
-                                    self.log(f"خطا در تبدیل JP2 به PNG: {e}")
-                                    os.remove(original_path)
-                                    continue
-                            
-                            if ext.lower() in valid_extensions:
-                                new_filename = self.generate_uuid_filename(ext)
-                                new_path = os.path.join(output_path, new_filename)
-                                os.rename(original_path, new_path)
-                                self.log(f"تصویر ذخیره شد: {new_filename}")
-                            else:
-                                os.remove(original_path)
-            
-            return True
-        except Exception as e:
-            self.log(f"خطا در استخراج از PowerPoint: {e}")
-            return False
+    def update_progress(self, current, total):
+        self.progress_value.set(calculate_progress(current, total))
+        self.status_text.set(f"در حال پردازش صفحه {current+1} از {total}")
 
 def main():
     # ایجاد پنجره اصلی
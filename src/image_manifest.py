@@ -0,0 +1,103 @@
+"""
+JSON-lines image manifest
+فهرست ماشین‌خوان تصاویر استخراج شده؛ یک رکورد JSON در هر خط، هم‌زمان با استخراج
+"""
+
+import json
+import os
+import time
+
+
+def describe_image(image):
+    """
+    مشخصات منبع یک تصویر برای رکورد فهرست
+
+    Args:
+        image (ExtractedImage): تصویر
+
+    Returns:
+        dict: سند، صفحه (از 1)، عضو ZIP، نام اصلی، فرمت و ابعاد
+    """
+    dimensions = image.dimensions
+    return {
+        'source': os.path.abspath(image.source),
+        'page': image.page + 1 if image.page is not None else None,
+        'member': image.member,
+        'name': image.name,
+        'format': image.ext.lstrip("."),
+        'width': dimensions[0] if dimensions else None,
+        'height': dimensions[1] if dimensions else None,
+    }
+
+
+class ImageManifest:
+    """
+    نویسنده فایل JSONL که برای هر تصویر ذخیره شده یک رکورد اضافه می‌کند
+
+    هر رکورد با یک فراخوانی write روی فایلی که با O_APPEND باز شده نوشته می‌شود،
+    پس چند پردازه دسته‌ای می‌توانند هم‌زمان به یک فایل اضافه کنند بدون اینکه
+    خط‌هایشان در هم برود.
+    """
+
+    def __init__(self, manifest_path):
+        directory = os.path.dirname(os.path.abspath(manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = manifest_path
+        self.count = 0
+        self._fd = os.open(manifest_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def record(self, info, image_key, output_path, algorithm=None, profile=None, output_size=None,
+               thumbnails=None):
+        """
+        افزودن رکورد یک تصویر ذخیره شده
+
+        Args:
+            info (dict): خروجی describe_image
+            image_key (ImageKey): کلید محتوای تصویر منبع
+            output_path (str): مسیر فایل خروجی
+            algorithm (str): الگوریتم چکیده
+            profile (OutputProfile): پروفایل خروجی اعمال شده
+            output_size (int): اندازه خروجی؛ برای مقصدهای بایگانی که مسیر فایل جدا ندارند
+            thumbnails (list): رکورد تصاویر بندانگشتی نوشته شده (اندازه، مسیر، ابعاد)
+        """
+        output_format = os.path.splitext(output_path)[1].lstrip(".").lower()
+        conversion = None
+        if profile is not None and f".{info['format']}" in profile.decode:
+            conversion = f"{info['format']}→{output_format} ({profile.name})"
+        elif output_format != info['format']:
+            conversion = f"{info['format']}→{output_format}"
+
+        entry = dict(info, digest=image_key.digest, algorithm=algorithm, size=image_key.size,
+                     output=os.path.abspath(output_path), output_format=output_format,
+                     output_size=output_size if output_size is not None else os.path.getsize(output_path),
+                     conversion=conversion, extracted_at=time.time())
+        if thumbnails:
+            entry['thumbnails'] = thumbnails
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        os.write(self._fd, line.encode("utf-8"))
+        self.count += 1
+
+    def close(self):
+        """بستن فایل فهرست"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_manifest(manifest_path):
+    """
+    خواندن رکوردهای یک فایل فهرست
+
+    Yields:
+        dict: رکورد هر تصویر
+    """
+    with open(manifest_path, "r", encoding="utf-8") as fp:
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
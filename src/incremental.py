@@ -0,0 +1,149 @@
+"""
+Incremental extraction state
+نگهداری اثر انگشت فایل‌های منبع برای رد کردن اسناد بدون تغییر
+"""
+
+import json
+import os
+
+from dedup import DEFAULT_ALGORITHM, stream_key
+from utils import get_file_info
+
+# گزینه‌هایی که مجموعه یا محتوای خروجی یک سند را تعیین می‌کنند
+OUTPUT_OPTIONS = ("pages", "slides", "image_filter", "profile", "naming", "sink", "passthrough", "thumbnail_sizes")
+
+
+def file_fingerprint(file_path, algorithm=DEFAULT_ALGORITHM):
+    """
+    محاسبه اثر انگشت کامل یک فایل منبع
+
+    Args:
+        file_path (str): مسیر فایل
+        algorithm (str): الگوریتم چکیده محتوا
+
+    Returns:
+        dict: اندازه، زمان تغییر و چکیده محتوا، یا None اگر فایل وجود نداشته باشد
+    """
+    info = get_file_info(file_path)
+    if info is None:
+        return None
+    with open(file_path, "rb") as fp:
+        key = stream_key(fp, algorithm)
+    return {'size': info['size'], 'mtime': info['modified'], 'digest': key.digest}
+
+
+def extraction_settings(extract_options):
+    """
+    خلاصه قابل ذخیره در JSON از گزینه‌های مؤثر بر خروجی استخراج
+
+    Args:
+        extract_options (dict): آرگومان‌های extract_images
+
+    Returns:
+        dict: مقدار هر گزینه OUTPUT_OPTIONS به شکل قابل مقایسه با وضعیت ذخیره شده
+    """
+    def plain(value):
+        if hasattr(value, "_asdict"):
+            return {name: plain(item) for name, item in value._asdict().items()}
+        if isinstance(value, dict):
+            return {str(name): plain(item) for name, item in value.items()}
+        if isinstance(value, (set, frozenset)):
+            return sorted(plain(item) for item in value)
+        if isinstance(value, (list, tuple)):
+            return [plain(item) for item in value]
+        return value
+
+    return {name: plain(extract_options.get(name)) for name in OUTPUT_OPTIONS}
+
+
+class SourceManifest:
+    """
+    فایل وضعیت JSON که (path, size, mtime, digest) هر سند را به خروجی‌هایش نگاشت می‌کند
+
+    بررسی تغییر ابتدا فقط با size و mtime انجام می‌شود؛ محتوای فایل تنها وقتی خوانده
+    می‌شود که mtime عوض شده ولی اندازه یکسان است (مثلاً پس از کپی دوباره فایل).
+    گزینه‌های اجرا (settings) هم کنار هر سند ذخیره می‌شوند؛ سندی که با انتخاب صفحات،
+    فیلتر یا پروفایل دیگری استخراج شده بود تغییر کرده به حساب می‌آید.
+    """
+
+    def __init__(self, manifest_path, algorithm=DEFAULT_ALGORITHM, settings=None):
+        self.manifest_path = manifest_path
+        self.algorithm = algorithm
+        self.settings = settings
+        self.entries = {}
+        self._dirty = False
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+            # تغییر الگوریتم یعنی چکیده‌های قبلی قابل مقایسه نیستند
+            if data.get('algorithm', algorithm) == algorithm:
+                self.entries = data.get('documents', {})
+
+    @staticmethod
+    def _key(file_path):
+        return os.path.abspath(file_path)
+
+    def is_unchanged(self, file_path):
+        """
+        بررسی اینکه سند از آخرین استخراج تغییر نکرده است
+
+        Args:
+            file_path (str): مسیر سند
+
+        Returns:
+            bool: True اگر سند قبلاً با همین محتوا و همین گزینه‌ها پردازش شده باشد
+        """
+        entry = self.entries.get(self._key(file_path))
+        if entry is None or entry.get('settings') != self.settings:
+            return False
+        info = get_file_info(file_path)
+        if info is None or info['size'] != entry['size']:
+            return False
+        if info['modified'] == entry['mtime']:
+            return True
+
+        with open(file_path, "rb") as fp:
+            key = stream_key(fp, self.algorithm)
+        if key.digest != entry['digest']:
+            return False
+        entry['mtime'] = info['modified']
+        self._dirty = True
+        return True
+
+    def update(self, file_path, fingerprint, outputs):
+        """
+        ثبت نتیجه استخراج یک سند
+
+        Args:
+            file_path (str): مسیر سند
+            fingerprint (dict): خروجی file_fingerprint
+            outputs (list): مسیر تصاویر استخراج شده
+        """
+        if fingerprint is None:
+            return
+        self.entries[self._key(file_path)] = dict(fingerprint, outputs=[os.path.abspath(p) for p in outputs],
+                                                  settings=self.settings)
+        self._dirty = True
+
+    def outputs(self, file_path):
+        """دریافت خروجی‌های ثبت شده یک سند"""
+        entry = self.entries.get(self._key(file_path))
+        return list(entry['outputs']) if entry else []
+
+    def save(self):
+        """ذخیره اتمی فایل وضعیت (نوشتن در فایل موقت و جایگزینی)"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.manifest_path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fp:
+            json.dump({'algorithm': self.algorithm, 'documents': self.entries}, fp, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
@@ -0,0 +1,256 @@
+"""
+Stage timing and profiling hooks
+زمان‌سنجی مراحل استخراج (باز کردن، بارگذاری، چکیده، تبدیل، نوشتن) و شمارنده‌ها
+
+جمع‌آوری فقط داخل collecting(metrics) فعال است؛ بیرون از آن stage و count
+هیچ کاری انجام نمی‌دهند، پس کد استخراج بدون شرط آن‌ها را صدا می‌زند.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import clean_filename, format_file_size
+
+
+# ترتیب نمایش مراحل در جدول خلاصه
+STAGES = ("open", "load", "hash", "perceptual", "convert", "thumbnail", "write")
+
+_active = None
+
+
+class Metrics:
+    """
+    زمان تجمعی و تعداد فراخوانی هر مرحله به همراه شمارنده‌ها
+
+    نخ‌های تبدیل و نوشتن هم در همان شیء ثبت می‌کنند، پس به‌روزرسانی‌ها با قفل انجام
+    می‌شوند. نتایج پردازه‌های کارگر با merge به شیء اصلی اضافه می‌شوند.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """ثبت یک اجرای مرحله"""
+        with self._lock:
+            calls, total = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (calls + 1, total + seconds)
+
+    def count(self, name, value=1):
+        """افزایش یک شمارنده"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        """
+        خروجی قابل pickle و JSON
+
+        Returns:
+            dict: مراحل، شمارنده‌ها و زمان کل
+        """
+        with self._lock:
+            return {
+                'elapsed': self.elapsed,
+                'stages': {stage: {'calls': calls, 'seconds': total} for stage, (calls, total) in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+    def merge(self, data, include_elapsed=True):
+        """
+        افزودن نتایج یک Metrics دیگر (خروجی as_dict)
+
+        Args:
+            data (dict): خروجی as_dict
+            include_elapsed (bool): جمع زدن زمان کل؛ برای کارگرهای موازی False بدهید
+        """
+        with self._lock:
+            for stage, values in data['stages'].items():
+                calls, total = self.stages.get(stage, (0, 0.0))
+                self.stages[stage] = (calls + values['calls'], total + values['seconds'])
+            for name, value in data['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            if include_elapsed:
+                self.elapsed += data['elapsed']
+
+    def _ordered_stages(self):
+        known = [stage for stage in STAGES if stage in self.stages]
+        return known + sorted(stage for stage in self.stages if stage not in STAGES)
+
+    def format_table(self):
+        """
+        جدول خلاصه مراحل و گذردهی
+
+        Returns:
+            str: جدول متنی
+        """
+        elapsed = max(self.elapsed, 1e-9)
+        lines = [f"{'stage':<12} {'calls':>8} {'total ms':>11} {'avg ms':>9} {'share':>7}"]
+        for stage in self._ordered_stages():
+            calls, total = self.stages[stage]
+            lines.append(f"{stage:<12} {calls:>8} {total * 1000:>11.1f} {total * 1000 / max(calls, 1):>9.2f} "
+                         f"{total / elapsed:>6.0%}")
+        counters = self.counters
+        lines.append(f"⏱️ {self.elapsed:.2f}s - "
+                     f"{counters.get('pages', 0) / elapsed:.1f} صفحه/ثانیه، "
+                     f"{counters.get('images_out', 0) / elapsed:.1f} تصویر/ثانیه، "
+                     f"ورودی {format_file_size(counters.get('bytes_in', 0))}، "
+                     f"خروجی {format_file_size(counters.get('bytes_out', 0))}")
+        return "\n".join(lines)
+
+    def to_prometheus(self, prefix="image_extractor"):
+        """
+        خروجی در قالب textfile برای node_exporter
+
+        Returns:
+            str: متریک‌ها در قالب متنی Prometheus
+        """
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Time spent in each extraction stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        stages = self._ordered_stages()
+        for stage in stages:
+            lines.append(f'{prefix}_stage_seconds_total{{stage="{stage}"}} {self.stages[stage][1]:.6f}')
+        lines += [f"# TYPE {prefix}_stage_calls_total counter"]
+        for stage in stages:
+            lines.append(f'{prefix}_stage_calls_total{{stage="{stage}"}} {self.stages[stage][0]}')
+        for name in sorted(self.counters):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {self.counters[name]}"]
+        lines += [f"# TYPE {prefix}_elapsed_seconds gauge", f"{prefix}_elapsed_seconds {self.elapsed:.6f}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        نوشتن متریک‌ها در فایل؛ پسوند .prom قالب Prometheus و بقیه JSON
+
+        نوشتن اتمی است تا node_exporter فایل نیمه‌کاره نخواند.
+        """
+        if path.endswith(".prom"):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fp:
+            fp.write(content)
+        os.replace(temp_path, path)
+
+
+@contextmanager
+def collecting(metrics):
+    """
+    فعال کردن جمع‌آوری در metrics و اندازه‌گیری زمان کل
+
+    Args:
+        metrics (Metrics): مقصد؛ None یعنی بدون جمع‌آوری
+    """
+    global _active
+    if metrics is None:
+        yield None
+        return
+    previous, _active = _active, metrics
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.elapsed += time.perf_counter() - started
+        _active = previous
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """
+    زمان‌سنج یک مرحله برای استفاده با with
+
+    Args:
+        name (str): نام مرحله (STAGES)
+    """
+    metrics = _active
+    return _Stage(metrics, name) if metrics is not None else _NULL_STAGE
+
+
+def count(name, value=1):
+    """افزایش شمارنده در جمع‌آوری فعال"""
+    metrics = _active
+    if metrics is not None:
+        metrics.count(name, value)
+
+
+def active():
+    """Metrics فعال یا None"""
+    return _active
+
+
+@contextmanager
+def profile_document(file_path, profile_dir, profiler="cprofile"):
+    """
+    اجرای یک بلوک زیر profiler و ذخیره نتیجه در profile_dir
+
+    cProfile خروجی .prof (قابل خواندن با pstats یا snakeviz) و pyinstrument
+    (در صورت نصب بودن) گزارش HTML می‌سازد.
+
+    Args:
+        file_path (str): سندی که پردازش می‌شود (برای نام فایل خروجی)
+        profile_dir (str): پوشه خروجی؛ None یعنی بدون profiler
+        profiler (str): cprofile یا pyinstrument
+    """
+    if not profile_dir:
+        yield
+        return
+    os.makedirs(profile_dir, exist_ok=True)
+    base_name = os.path.join(profile_dir, clean_filename(os.path.basename(file_path)))
+
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("برای profiler از نوع pyinstrument بسته pyinstrument باید نصب باشد")
+        session = Profiler()
+        session.start()
+        try:
+            yield
+        finally:
+            session.stop()
+            with open(f"{base_name}.html", "w", encoding="utf-8") as fp:
+                fp.write(session.output_html())
+        return
+
+    import cProfile
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield
+    finally:
+        session.disable()
+        session.dump_stats(f"{base_name}.prof")
@@ -0,0 +1,175 @@
+"""
+Perceptual near-duplicate detection
+تشخیص تصاویر تقریباً تکراری (مثلاً یک لوگو با کیفیت‌های JPEG متفاوت) با dHash
+"""
+
+from metrics import stage
+from profiles import open_reduced
+
+
+HASH_SIZE = 8
+DEFAULT_DISTANCE = 6
+_HASH_BITS = HASH_SIZE * HASH_SIZE
+
+_numpy = False
+
+
+def _load_numpy():
+    # import کردن numpy ده‌ها میلی‌ثانیه طول می‌کشد؛ فقط در اولین محاسبه چکیده
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:  # وابستگی اختیاری؛ بدون آن محاسبه با پایتون خالص انجام می‌شود
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+def hamming_distance(a, b):
+    """تعداد بیت‌های متفاوت دو چکیده"""
+    return bin(a ^ b).count("1")
+
+
+def dhash(data, hash_size=HASH_SIZE):
+    """
+    محاسبه difference hash یک تصویر
+
+    تصویر از همان ابتدا در مقیاس کوچک decode می‌شود (JPEG تا 1/8 و JP2 تا 1/32)،
+    به سیاه‌وسفید (hash_size+1)×hash_size کوچک می‌شود و هر بیت نشان می‌دهد پیکسل از
+    همسایه راستش روشن‌تر است یا نه.
+
+    Args:
+        data (bytes): داده‌های تصویر
+        hash_size (int): ضلع شبکه چکیده (چکیده hash_size² بیتی)
+
+    Returns:
+        int: چکیده، یا None اگر تصویر قابل decode نباشد
+    """
+    from PIL import Image
+    try:
+        with open_reduced(data, hash_size * 4, "L") as img:
+            small = img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    except Exception:
+        return None
+
+    numpy = _load_numpy()
+    if numpy is not None:
+        pixels = numpy.asarray(small, dtype=numpy.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+        return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+    pixels = list(small.getdata())
+    value = 0
+    width = hash_size + 1
+    for row in range(hash_size):
+        offset = row * width
+        for column in range(hash_size):
+            value = (value << 1) | (pixels[offset + column + 1] > pixels[offset + column])
+    return value
+
+
+class BKTree:
+    """
+    درخت BK برای جستجوی نزدیک‌ترین چکیده در فاصله Hamming
+
+    هر گره فرزندانش را بر اساس فاصله تا خودش نگه می‌دارد؛ طبق نامساوی مثلث فقط
+    زیردرخت‌هایی با فاصله در بازه [d - r, d + r] بررسی می‌شوند، پس برای آستانه‌های
+    کوچک هزینه جستجو با تعداد چکیده‌ها زیرخطی رشد می‌کند.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value, payload):
+        """
+        افزودن چکیده به درخت
+
+        Args:
+            value (int): چکیده
+            payload: داده همراه (مثلاً کلید تصویر)
+        """
+        node = [value, payload, {}]
+        if self._root is None:
+            self._root = node
+            self._size = 1
+            return
+        current = self._root
+        while True:
+            distance = hamming_distance(value, current[0])
+            if distance == 0:
+                return
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self._size += 1
+                return
+            current = child
+
+    def find(self, value, max_distance):
+        """
+        جستجوی نزدیک‌ترین چکیده
+
+        Args:
+            value (int): چکیده
+            max_distance (int): حداکثر فاصله Hamming
+
+        Returns:
+            tuple: (distance, payload) نزدیک‌ترین مورد، یا None
+        """
+        if self._root is None:
+            return None
+        best = None
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, node[1])
+                if distance == 0:
+                    break
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return best
+
+
+class NearDuplicateIndex:
+    """
+    شاخص چکیده‌های ادراکی برای کنار گذاشتن تصاویر تقریباً تکراری
+    """
+
+    def __init__(self, max_distance=DEFAULT_DISTANCE):
+        if not 0 <= max_distance < _HASH_BITS:
+            raise ValueError(f"فاصله تصاویر مشابه باید بین 0 و {_HASH_BITS - 1} باشد")
+        self.max_distance = max_distance
+        self._tree = BKTree()
+
+    def __len__(self):
+        return len(self._tree)
+
+    @staticmethod
+    def fingerprint(data):
+        """محاسبه چکیده ادراکی داده‌ها (None برای تصاویر غیرقابل decode)"""
+        with stage("perceptual"):
+            return dhash(data)
+
+    def match(self, fingerprint):
+        """
+        یافتن تصویر مشابه ثبت شده
+
+        Returns:
+            payload نزدیک‌ترین تصویر در فاصله max_distance، یا None
+        """
+        found = self._tree.find(fingerprint, self.max_distance)
+        return found[1] if found is not None else None
+
+    def add(self, fingerprint, payload):
+        """ثبت چکیده یک تصویر تازه"""
+        self._tree.add(fingerprint, payload)
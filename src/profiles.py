@@ -0,0 +1,309 @@
+"""
+Output transcoding profiles
+پروفایل‌های خروجی: تبدیل تصاویر در یک بار decode با تنظیمات encoder مشخص
+"""
+
+import io
+import logging
+from collections import namedtuple
+
+from utils import ImageProcessor
+
+
+# تصاویری که Pillow می‌تواند decode کند؛ بقیه (مثلاً EMF/WMF در Word) دست‌نخورده ذخیره می‌شوند
+RASTER_EXTENSIONS = frozenset({".jpg", ".png", ".jp2", ".gif", ".bmp", ".tif", ".tiff", ".webp"})
+
+_FORMAT_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+
+# حالت‌های رنگی که هر encoder بدون تبدیل می‌پذیرد
+_FORMAT_MODES = {
+    "PNG": {"1", "L", "LA", "P", "RGB", "RGBA", "I", "I;16"},
+    "JPEG": {"L", "RGB", "CMYK"},
+    "WEBP": {"RGB", "RGBA"},
+}
+
+
+class OutputProfile(namedtuple("OutputProfile", ["name", "decode", "image_format", "params", "max_dimension",
+                                                 "keep_smaller"])):
+    """
+    یک پروفایل خروجی
+
+    Attributes:
+        name (str): نام پروفایل
+        decode (frozenset): پسوندهایی که decode و دوباره کدگذاری می‌شوند؛ بقیه بایت به بایت کپی می‌شوند
+        image_format (str): فرمت Pillow خروجی
+        params (dict): تنظیمات encoder
+        max_dimension (int): حداکثر طول بزرگ‌ترین ضلع، یا None برای اندازه اصلی
+        keep_smaller (bool): اگر خروجی بزرگ‌تر از ورودی بود همان ورودی نگه داشته شود
+    """
+
+    __slots__ = ()
+
+    @property
+    def ext(self):
+        """پسوند فایل‌های خروجی این پروفایل"""
+        return _FORMAT_EXTENSIONS[self.image_format]
+
+
+PROFILES = {
+    # بدون اتلاف با بیشترین فشرده‌سازی؛ PNGهای موجود هم دوباره فشرده می‌شوند
+    "archive": OutputProfile("archive", frozenset({".jp2", ".png", ".bmp", ".tif", ".tiff"}), "PNG",
+                             {"compress_level": 9, "optimize": True}, None, True),
+    # کمترین زمان encode؛ فقط JP2 تبدیل می‌شود و بقیه بدون تغییر کپی می‌شوند
+    "fast": OutputProfile("fast", frozenset({".jp2"}), "PNG", {"compress_level": 1}, None, False),
+    # نسخه کوچک برای وب؛ همه تصاویر raster به WebP (یا JPEG) با ابعاد محدود تبدیل می‌شوند
+    "web": OutputProfile("web", RASTER_EXTENSIONS, "WEBP", {"quality": 80, "method": 4}, 1600, False),
+    # پیش‌نمایش؛ JPEG و JP2 از همان ابتدا در مقیاس کوچک decode می‌شوند (open_reduced)
+    "preview": OutputProfile("preview", RASTER_EXTENSIONS, "JPEG", {"quality": 75}, 512, False),
+}
+
+# بیشترین reduce وقتی سطوح موجک از سرآیند خوانده نشود (پیش‌فرض OpenJPEG: 6 سطح تفکیک)
+_DEFAULT_JP2_LEVELS = 5
+
+
+def get_profile(name, quality=None, max_dimension=None):
+    """
+    دریافت یک پروفایل با امکان جایگزینی کیفیت و ابعاد
+
+    Args:
+        name (str): نام پروفایل (یکی از کلیدهای PROFILES: archive، fast، web یا preview)
+        quality (int): کیفیت encoderهای با اتلاف (1-100)
+        max_dimension (int): حداکثر طول بزرگ‌ترین ضلع
+
+    Returns:
+        OutputProfile: پروفایل
+
+    Raises:
+        ValueError: اگر نام پروفایل ناشناخته باشد
+    """
+    profile = PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"پروفایل خروجی ناشناخته: {name}")
+    from PIL import features
+    if profile.image_format == "WEBP" and not features.check("webp"):
+        profile = profile._replace(image_format="JPEG", params={"quality": 80, "optimize": True})
+    if quality is not None and profile.image_format in ("JPEG", "WEBP"):
+        profile = profile._replace(params=dict(profile.params, quality=quality))
+    if max_dimension is not None:
+        profile = profile._replace(max_dimension=max_dimension)
+    return profile
+
+
+def _jp2_decomposition_levels(data):
+    """
+    تعداد سطوح تجزیه موجک از نشانگر COD سرآیند اصلی codestream
+
+    Returns:
+        int: تعداد سطوح، یا None اگر پیدا نشود
+    """
+    position = data.find(b"\xff\x4f\xff\x51")  # SOC و سپس SIZ
+    if position < 0:
+        return None
+    position += 2
+    while position + 4 <= len(data) and data[position] == 0xFF:
+        marker = data[position + 1]
+        if marker == 0x52:  # COD: Lcod(2) Scod(1) SGcod(4) و سپس تعداد سطوح
+            return data[position + 9] if position + 9 < len(data) else None
+        if marker == 0x90:  # SOT؛ سرآیند اصلی تمام شد
+            return None
+        position += 2 + int.from_bytes(data[position + 2:position + 4], "big")
+    return None
+
+
+def jp2_reduce_factor(size, max_dimension, levels=None):
+    """
+    بزرگ‌ترین reduce که ضلع بزرگ‌تر را هنوز حداقل max_dimension نگه می‌دارد
+
+    Args:
+        size (tuple): ابعاد کامل تصویر
+        max_dimension (int): حداقل طول ضلع بزرگ‌تر پس از decode
+        levels (int): سطوح تجزیه موجک موجود در فایل
+
+    Returns:
+        int: هر واحد ابعاد decode شده را نصف می‌کند
+    """
+    levels = _DEFAULT_JP2_LEVELS if levels is None else levels
+    longest = max(size)
+    factor = 0
+    while factor < levels and longest >> (factor + 1) >= max_dimension:
+        factor += 1
+    return factor
+
+
+def open_reduced(data, max_dimension=None, mode="RGB"):
+    """
+    decode تصویر در کوچک‌ترین مقیاسی که codec مستقیماً تولید می‌کند و از max_dimension کمتر نیست
+
+    JPEG با draft در خود decoder با مقیاس 1/2 تا 1/8 و JPEG2000 با reduce (کنار گذاشتن
+    سطوح موجک) decode می‌شوند؛ زمان و حافظه decode با مجذور مقیاس کم می‌شود. بقیه
+    فرمت‌ها کامل decode می‌شوند. کوچک‌سازی دقیق با thumbnail به عهده فراخواننده است.
+
+    Args:
+        data (bytes): داده‌های تصویر
+        max_dimension (int): حداقل طول ضلع بزرگ‌تر مورد نیاز؛ None یعنی اندازه کامل
+        mode (str): حالت رنگی مورد نظر برای draft در JPEG
+
+    Returns:
+        Image: تصویر بارگذاری شده (با with ببندید)
+    """
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    if max_dimension is not None and img.format == "JPEG":
+        img.draft(mode, (max_dimension, max_dimension))
+    elif max_dimension is not None and img.format == "JPEG2000":
+        factor = jp2_reduce_factor(img.size, max_dimension, _jp2_decomposition_levels(data))
+        if factor:
+            img.reduce = factor
+            try:
+                img.load()
+                return img
+            except OSError:  # سطوح کمتر از سرآیند اصلی (مثلاً با COC)؛ decode کامل
+                img.close()
+                img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+def _prepare_mode(img, image_format):
+    if img.mode in _FORMAT_MODES[image_format]:
+        return img
+    if image_format == "JPEG":
+        return ImageProcessor.flatten_alpha(img).convert("RGB")
+    has_alpha = img.mode in ("LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+    return img.convert("RGBA" if has_alpha else "RGB")
+
+
+Thumbnail = namedtuple("Thumbnail", ["size", "ext", "data", "dimensions"])
+
+# کیفیت JPEG تصاویر بندانگشتی
+THUMBNAIL_QUALITY = 80
+
+
+def parse_thumbnail_sizes(spec):
+    """
+    تبدیل فهرست اندازه‌ها مانند "128,512" به تاپل مرتب
+
+    Returns:
+        tuple: اندازه‌ها به ترتیب صعودی بدون تکرار
+
+    Raises:
+        ValueError: اندازه نامعتبر یا غیرمثبت
+    """
+    try:
+        sizes = {int(part) for part in str(spec).split(",") if part.strip()}
+    except ValueError:
+        raise ValueError(f"اندازه تصویر بندانگشتی نامعتبر: {spec}")
+    if not sizes or min(sizes) < 1:
+        raise ValueError(f"اندازه تصویر بندانگشتی نامعتبر: {spec}")
+    return tuple(sorted(sizes))
+
+
+def render_thumbnails(img, sizes):
+    """
+    ساخت تصاویر بندانگشتی JPEG از یک تصویر decode شده
+
+    اندازه‌ها از بزرگ به کوچک ساخته می‌شوند و هر کدام از تصویر بندانگشتی قبلی
+    کوچک می‌شود، پس هزینه کوچک‌سازی تقریباً مستقل از تعداد اندازه‌هاست.
+
+    Args:
+        img (Image): تصویر decode شده (تغییر نمی‌کند)
+        sizes (iterable): حداکثر طول بزرگ‌ترین ضلع هر تصویر بندانگشتی
+
+    Returns:
+        list: Thumbnail ها به ترتیب صعودی اندازه
+    """
+    thumbnails = []
+    source = img
+    for size in sorted(set(sizes), reverse=True):
+        if thumbnails and max(source.size) <= size:
+            # تصویر از قبل در این اندازه جا می‌شود؛ همان خروجی قبلی دوباره encode نمی‌شود
+            thumbnails.append(thumbnails[-1]._replace(size=size))
+            continue
+        thumb = source.copy()
+        thumb.thumbnail((size, size))
+        data = ImageProcessor.encode_image(_prepare_mode(thumb, "JPEG"), "JPEG", quality=THUMBNAIL_QUALITY)
+        thumbnails.append(Thumbnail(size, ".jpg", data, thumb.size))
+        source = thumb
+    thumbnails.reverse()
+    return thumbnails
+
+
+def thumbnails_from_data(data, ext, sizes):
+    """
+    ساخت تصاویر بندانگشتی تصویری که خودش decode نمی‌شود
+
+    تصویر فقط در مقیاس بزرگ‌ترین اندازه decode می‌شود (open_reduced).
+
+    Args:
+        data (bytes): داده‌های تصویر
+        ext (str): پسوند نرمال شده تصویر
+        sizes (iterable): اندازه‌های تصاویر بندانگشتی
+
+    Returns:
+        list: Thumbnail ها؛ برای تصاویر غیر raster یا غیرقابل decode لیست خالی
+    """
+    if not sizes or ext not in RASTER_EXTENSIONS:
+        return []
+    try:
+        with open_reduced(data, max(sizes)) as img:
+            return render_thumbnails(img, sizes)
+    except Exception as e:
+        logging.warning(f"ساخت تصویر بندانگشتی ممکن نشد: {e}")
+        return []
+
+
+def transcode(data, ext, profile):
+    """
+    تبدیل بایت‌های یک تصویر مطابق پروفایل در یک بار decode
+
+    کوچک‌سازی پیش از decode کامل در خود codec انجام می‌شود (draft برای JPEG و reduce
+    برای JPEG2000؛ open_reduced)، سپس thumbnail و encode روی همان تصویر اجرا می‌شوند.
+
+    Args:
+        data (bytes): داده‌های تصویر
+        ext (str): پسوند نرمال شده تصویر
+        profile (OutputProfile): پروفایل خروجی
+
+    Returns:
+        tuple: (ext, data)؛ در صورت شکست decode (None, None)
+    """
+    ext, data, _ = transcode_with_thumbnails(data, ext, profile)
+    return ext, data
+
+
+def transcode_with_thumbnails(data, ext, profile, thumbnail_sizes=()):
+    """
+    تبدیل مطابق پروفایل و ساخت تصاویر بندانگشتی از همان تصویر decode شده
+
+    مقیاس decode بزرگ‌ترین مقدار بین max_dimension پروفایل و بزرگ‌ترین تصویر
+    بندانگشتی است؛ تصاویری که پروفایل decode نمی‌کند با thumbnails_from_data پردازش
+    می‌شوند.
+
+    Args:
+        data (bytes): داده‌های تصویر
+        ext (str): پسوند نرمال شده تصویر
+        profile (OutputProfile): پروفایل خروجی
+        thumbnail_sizes (iterable): اندازه‌های تصاویر بندانگشتی
+
+    Returns:
+        tuple: (ext, data, thumbnails)؛ در صورت شکست decode (None, None, [])
+    """
+    if ext not in profile.decode:
+        return ext, data, thumbnails_from_data(data, ext, thumbnail_sizes)
+    decode_size = profile.max_dimension
+    if decode_size is not None and thumbnail_sizes:
+        decode_size = max(decode_size, *thumbnail_sizes)
+    try:
+        with open_reduced(data, decode_size) as img:
+            thumbnails = render_thumbnails(img, thumbnail_sizes) if thumbnail_sizes else []
+            if profile.max_dimension is not None:
+                img.thumbnail((profile.max_dimension, profile.max_dimension))
+            output = ImageProcessor.encode_image(_prepare_mode(img, profile.image_format), profile.image_format,
+                                                 **profile.params)
+    except Exception as e:
+        logging.error(f"خطا در تبدیل تصویر با پروفایل {profile.name}: {e}")
+        return None, None, []
+
+    if profile.keep_smaller and len(output) >= len(data) and ext == profile.ext:
+        return ext, data, thumbnails
+    return profile.ext, output, thumbnails
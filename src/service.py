@@ -0,0 +1,777 @@
+"""
+Extraction service
+سرویس ماندگار استخراج روی HTTP محلی یا سوکت Unix با صف کار و کارگرهای گرم
+
+مثال:
+    python service.py serve --port 8765 --jobs 4 --job-timeout 120
+    python service.py serve --socket /run/image-extractor.sock
+    python service.py submit document.pdf --connect 127.0.0.1:8765 --wait
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+from cli_extractor import extract_images, open_dedup_index
+from dedup import DEFAULT_ALGORITHM
+from extractor_core import ImageFilter, parse_page_ranges
+from image_manifest import read_manifest
+from metrics import Metrics
+from profiles import get_profile, parse_thumbnail_sizes
+from sinks import SINKS
+from utils import is_supported_format
+from writer import latency_percentiles
+
+
+DEFAULT_PORT = 8765
+
+# مهلت اضافه پس از بودجه زمانی کار، برای وقتی که کارگر در یک decode طولانی گیر کرده است
+_TIMEOUT_GRACE = 5.0
+
+_FILTER_OPTIONS = ("min_bytes", "min_width", "min_height", "max_pixels")
+_THREAD_OPTIONS = ("workers", "convert_workers", "write_workers")
+_SELECTION_OPTIONS = ("pages", "slides")
+JOB_OPTIONS = frozenset(("naming", "passthrough", "output_profile", "quality", "max_dimension", "fsync_batch",
+                         "sink", "thumbnails", "timeout") + _FILTER_OPTIONS + _THREAD_OPTIONS + _SELECTION_OPTIONS)
+
+
+class JobTimeout(Exception):
+    """پایان بودجه زمانی یک کار"""
+
+
+def _warm_worker():
+    # کتابخانه‌های سنگین یک بار در هر کارگر import می‌شوند، نه در اولین کار
+    import pypdf  # noqa: F401
+    from PIL import Image  # noqa: F401
+    return os.getpid()
+
+
+def _worker_loop(connection):
+    # حلقه پردازه کارگر: (func, args) دریافت و نتیجه برگردانده می‌شود؛ None یعنی پایان
+    connection.send(_warm_worker())
+    while True:
+        task = connection.recv()
+        if task is None:
+            return
+        func, args = task
+        try:
+            result = (True, func(*args))
+        except Exception as e:
+            result = (False, str(e))
+        connection.send(result)
+
+
+class _WorkerSlot:
+    """
+    یک پردازه کارگر گرم که کارها را یکی‌یکی اجرا می‌کند
+
+    هر نخ توزیع یک slot دارد، پس کار بلافاصله پس از تحویل شروع می‌شود و مهلت
+    فقط زمان اجرا را می‌سنجد. کارگری که از مهلت بگذرد (مثلاً در decode یک تصویر
+    بزرگ گیر کرده و به نقطه بررسی بودجه نمی‌رسد) کشته و با یک کارگر گرم تازه
+    جایگزین می‌شود. پردازه‌ها با forkserver (یا spawn) ساخته می‌شوند تا fork از
+    پردازه چندنخی سرور لازم نباشد.
+    """
+
+    def __init__(self):
+        import multiprocessing
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.restarts = 0
+        self._start()
+
+    def _start(self):
+        connection, child = self._context.Pipe()
+        self.process = self._context.Process(target=_worker_loop, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self._connection = connection
+        try:
+            self.pid = connection.recv()
+        except EOFError:
+            raise RuntimeError("راه‌اندازی پردازه کارگر ناموفق بود")
+
+    def restart(self):
+        """کشتن کارگر فعلی و راه‌اندازی یک کارگر گرم تازه"""
+        self.process.kill()
+        self.process.join()
+        self._connection.close()
+        self.restarts += 1
+        self._start()
+
+    def run(self, func, args, timeout=None):
+        """
+        اجرای func(*args) در کارگر
+
+        Args:
+            timeout (float): حداکثر زمان اجرا به ثانیه؛ None یعنی بدون محدودیت
+
+        Returns:
+            نتیجه func
+
+        Raises:
+            JobTimeout: کارگر در مهلت پاسخ نداد (و جایگزین شد)
+            RuntimeError: خطای func یا از کار افتادن کارگر
+        """
+        self._connection.send((func, args))
+        if not self._connection.poll(timeout):
+            self.restart()
+            raise JobTimeout(f"بودجه زمانی {timeout:g} ثانیه تمام شد")
+        try:
+            success, result = self._connection.recv()
+        except EOFError:  # کارگر از کار افتاد (مثلاً کمبود حافظه)
+            self.restart()
+            raise RuntimeError("پردازه کارگر به طور غیرمنتظره متوقف شد")
+        if not success:
+            raise RuntimeError(result)
+        return result
+
+    def close(self):
+        """توقف کارگر پس از پایان کار فعلی"""
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self.process.join(_TIMEOUT_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._connection.close()
+
+
+def _run_job(file_path, extract_options, hash_algorithm, index_path, near_distance, manifest_path, budget):
+    """
+    اجرای یک کار در پردازه کارگر
+
+    بودجه زمانی به صورت همکارانه بررسی می‌شود: هر پیام گزارش (هر تصویر) و هر صفحه
+    PDF زمان را می‌سنجد و پس از پایان بودجه استخراج را با JobTimeout متوقف می‌کند.
+
+    Returns:
+        tuple: (outputs, error, timed_out, metrics)
+    """
+    metrics = Metrics()
+    deadline = time.monotonic() + budget if budget else None
+    errors = []
+    timed_out = []
+
+    def check(message=None, *_):
+        if isinstance(message, str) and message.startswith("❌"):
+            errors.append(message)
+        if deadline is not None and time.monotonic() > deadline:
+            timed_out.append(True)
+            raise JobTimeout(f"بودجه زمانی {budget:g} ثانیه تمام شد")
+
+    try:
+        with open_dedup_index(index_path, hash_algorithm, None, near_distance) as dedup:
+            outputs = extract_images(file_path, dedup=dedup, manifest_path=manifest_path, metrics=metrics,
+                                     log=check, progress=check, **extract_options)
+        error = (errors[-1] if errors else "استخراج ناموفق بود") if outputs is None else None
+    except Exception as e:
+        outputs, error = None, str(e)
+    if timed_out:
+        outputs, error = None, f"بودجه زمانی {budget:g} ثانیه تمام شد"
+    return outputs, error, bool(timed_out), metrics.as_dict()
+
+
+def _int_option(options, name, minimum=0, maximum=None):
+    # عدد صحیح JSON یا رشته عددی؛ bool و اعداد اعشاری پذیرفته نمی‌شوند
+    value = options.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} باید عدد صحیح باشد")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} باید عدد صحیح باشد")
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"بین {minimum} و {maximum}" if maximum is not None else f"حداقل {minimum}"
+        raise ValueError(f"{name} باید {bounds} باشد")
+    return value
+
+
+def _string_option(options, name, default=None):
+    value = options.get(name, default)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{name} باید رشته باشد")
+    return value
+
+
+def _wait_seconds(value):
+    # پارامتر wait از رشته پرس‌وجو؛ nan و inf هم رد می‌شوند
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+    if seconds is None or not 0 <= seconds < float("inf"):
+        raise ValueError("wait باید عددی نامنفی (ثانیه) باشد")
+    return seconds
+
+
+def job_options(options, max_job_threads=4):
+    """
+    تبدیل گزینه‌های JSON یک کار به آرگومان‌های extract_images
+
+    نوع و محدوده همه گزینه‌ها همین‌جا بررسی می‌شود تا درخواست نامعتبر با 400 رد
+    شود، نه اینکه بعداً در کارگر شکست بخورد.
+
+    Args:
+        options (dict): گزینه‌های درخواست (JOB_OPTIONS)
+        max_job_threads (int): سقف workers، convert_workers و write_workers هر کار
+
+    Returns:
+        tuple: (extract_options, timeout)
+
+    Raises:
+        ValueError: گزینه ناشناخته، با نوع نادرست یا خارج از محدوده
+    """
+    if not isinstance(options, dict):
+        raise ValueError("options باید یک شیء JSON باشد")
+    unknown = set(options) - JOB_OPTIONS
+    if unknown:
+        raise ValueError(f"گزینه ناشناخته: {', '.join(sorted(unknown))}")
+    threads = {name: _int_option(options, name, 0, max_job_threads) for name in _THREAD_OPTIONS}
+    naming = _string_option(options, "naming", "uuid")
+    if naming not in ("uuid", "digest"):
+        raise ValueError("naming باید uuid یا digest باشد")
+    sink = _string_option(options, "sink") or "dir"
+    # pack:PATH پذیرفته نمی‌شود تا کلاینت نتواند بیرون از پوشه extracted_images سند بنویسد
+    if sink not in SINKS:
+        raise ValueError(f"sink باید یکی از {', '.join(SINKS)} باشد")
+    passthrough = options.get("passthrough", True)
+    if not isinstance(passthrough, bool):
+        raise ValueError("passthrough باید true یا false باشد")
+
+    profile = None
+    output_profile = _string_option(options, "output_profile")
+    if output_profile:
+        profile = get_profile(output_profile, _int_option(options, "quality", 1, 100),
+                              _int_option(options, "max_dimension", 1))
+    elif options.get("quality") is not None or options.get("max_dimension") is not None:
+        raise ValueError("quality و max_dimension به output_profile نیاز دارند")
+    image_filter = ImageFilter(*(_int_option(options, name) for name in _FILTER_OPTIONS))
+    extract_options = {
+        'workers': max(1, threads["workers"] or 1),
+        'naming': naming,
+        'passthrough': passthrough,
+        'convert_workers': threads["convert_workers"] or 0,
+        'write_workers': threads["write_workers"] or 0,
+        'fsync_batch': _int_option(options, "fsync_batch", 1),
+        'image_filter': image_filter or None,
+        'profile': profile,
+        'sink': sink,
+    }
+    thumbnails = options.get("thumbnails")
+    if isinstance(thumbnails, (list, tuple)):
+        thumbnails = ",".join(str(size) for size in thumbnails)
+    extract_options['thumbnail_sizes'] = parse_thumbnail_sizes(thumbnails) if thumbnails else None
+    for name in _SELECTION_OPTIONS:
+        # مثل --pages و --slides در CLI، رشته‌ای مثل "1-3,10"
+        extract_options[name] = parse_page_ranges(str(options[name])) if options.get(name) else None
+    timeout = options.get("timeout")
+    if timeout is not None:
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError("timeout باید عددی مثبت (ثانیه) باشد")
+        timeout = float(timeout)
+    return extract_options, timeout
+
+
+class Job:
+    """یک کار استخراج و وضعیت آن (queued، running، done، failed یا timeout)"""
+
+    def __init__(self, file_path, extract_options, timeout, state_dir):
+        self.id = uuid4().hex
+        self.file_path = file_path
+        self.extract_options = extract_options
+        self.timeout = timeout
+        self.manifest_path = os.path.join(state_dir, f"{self.id}.jsonl")
+        self.status = "queued"
+        self.outputs = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def as_dict(self, include_manifest=False):
+        """
+        وضعیت کار برای پاسخ JSON
+
+        Args:
+            include_manifest (bool): افزودن رکوردهای فهرست تصاویر (image_manifest)
+
+        Returns:
+            dict: وضعیت، زمان‌ها، مسیر خروجی‌ها و در صورت درخواست فهرست تصاویر
+        """
+        result = {
+            'id': self.id,
+            'path': self.file_path,
+            'status': self.status,
+            'submitted': self.submitted,
+            'queue_seconds': (self.started or time.time()) - self.submitted,
+            'run_seconds': (self.finished or time.time()) - self.started if self.started else None,
+            'images': len(self.outputs) if self.outputs is not None else None,
+            'outputs': self.outputs,
+            'manifest_path': self.manifest_path,
+            'error': self.error,
+        }
+        if include_manifest and self.done.is_set() and os.path.exists(self.manifest_path):
+            result['manifest'] = list(read_manifest(self.manifest_path))
+        return result
+
+
+class ExtractionService:
+    """
+    صف کارهای استخراج با مجموعه‌ای از پردازه‌های کارگر گرم
+
+    کارگرها (_WorkerSlot) تا وقتی از مهلت کاری نگذرند زنده می‌مانند و هنگام شروع
+    pypdf و Pillow را import می‌کنند، پس هر کار فقط هزینه خود استخراج را می‌پردازد. حداکثر jobs کار
+    هم‌زمان اجرا می‌شوند و بقیه تا max_queue در صف می‌مانند؛ درخواست‌های بیشتر رد
+    می‌شوند. زمان مراحل همه کارها در metrics جمع می‌شود.
+    """
+
+    def __init__(self, jobs=2, max_queue=100, job_timeout=None, max_job_threads=4, hash_algorithm=DEFAULT_ALGORITHM,
+                 index_path=None, near_distance=None, state_dir=None, keep_jobs=1000):
+        self.jobs = jobs
+        self.job_timeout = job_timeout
+        self.max_job_threads = max_job_threads
+        self.hash_algorithm = hash_algorithm
+        self.index_path = index_path
+        self.near_distance = near_distance
+        self.state_dir = state_dir or tempfile.mkdtemp(prefix="image-extractor-service-")
+        self.keep_jobs = keep_jobs
+        self.metrics = Metrics()
+        self.started = time.time()
+        self.running = 0
+        self.totals = {'done': 0, 'failed': 0, 'timeout': 0, 'rejected': 0}
+        self.queue_latencies = deque(maxlen=1000)
+        self.run_latencies = deque(maxlen=1000)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(max_queue)
+        self._slots = []
+        self._dispatchers = []
+        os.makedirs(self.state_dir, exist_ok=True)
+
+    def start(self):
+        """راه‌اندازی کارگرها و نخ‌های توزیع کار"""
+        for _ in range(self.jobs):
+            slot = _WorkerSlot()
+            thread = threading.Thread(target=self._dispatch, args=(slot,), daemon=True)
+            thread.start()
+            self._slots.append(slot)
+            self._dispatchers.append(thread)
+        return self
+
+    def submit(self, file_path, options=None):
+        """
+        افزودن یک کار به صف
+
+        Args:
+            file_path (str): مسیر سند
+            options (dict): گزینه‌های کار (JOB_OPTIONS)
+
+        Returns:
+            Job: کار ثبت شده
+
+        Raises:
+            ValueError: مسیر یا گزینه نامعتبر
+            queue.Full: صف پر است
+        """
+        if not os.path.isfile(file_path):
+            raise ValueError(f"فایل پیدا نشد: {file_path}")
+        if not is_supported_format(file_path):
+            raise ValueError(f"فرمت فایل پشتیبانی نمی‌شود: {file_path}")
+        extract_options, timeout = job_options(options or {}, self.max_job_threads)
+        if timeout is None or (self.job_timeout and timeout > self.job_timeout):
+            timeout = self.job_timeout
+        job = Job(os.path.abspath(file_path), extract_options, timeout, self.state_dir)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.totals['rejected'] += 1
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        return job
+
+    def _forget_old_jobs(self):
+        while len(self._jobs) > self.keep_jobs:
+            job_id, job = next(iter(self._jobs.items()))
+            if not job.done.is_set():
+                break
+            del self._jobs[job_id]
+            if os.path.exists(job.manifest_path):
+                os.remove(job.manifest_path)
+
+    def get(self, job_id):
+        """کار با شناسه job_id، یا None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self):
+        """همه کارهای نگه داشته شده به ترتیب ثبت"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _dispatch(self, slot):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self.running += 1
+            job.started = time.time()
+            job.status = "running"
+            job_metrics = None
+            try:
+                outputs, error, timed_out, job_metrics = slot.run(
+                    _run_job, (job.file_path, job.extract_options, self.hash_algorithm, self.index_path,
+                               self.near_distance, job.manifest_path, job.timeout),
+                    job.timeout + _TIMEOUT_GRACE if job.timeout else None)
+            except JobTimeout:
+                # کارگر به نقطه بررسی بودجه نرسید و جایگزین شده است
+                outputs, error, timed_out = None, f"بودجه زمانی {job.timeout:g} ثانیه تمام شد", True
+                logging.warning(f"⚠️ کارگر کار {job.id[:8]} پس از پایان مهلت متوقف و جایگزین شد")
+            except Exception as e:
+                outputs, error, timed_out = None, str(e), False
+            self._finish(job, outputs, error, timed_out, job_metrics)
+
+    def _finish(self, job, outputs, error, timed_out, job_metrics):
+        job.finished = time.time()
+        job.outputs = outputs
+        job.error = error
+        job.status = "timeout" if timed_out else "failed" if outputs is None else "done"
+        if job_metrics is not None:
+            self.metrics.merge(job_metrics, include_elapsed=False)
+        with self._lock:
+            self.running -= 1
+            self.totals[job.status] += 1
+            self.queue_latencies.append(job.started - job.submitted)
+            self.run_latencies.append(job.finished - job.started)
+        job.done.set()
+        logging.info(f"{'✅' if job.status == 'done' else '❌'} کار {job.id[:8]} ({job.status}): {job.file_path}")
+
+    def stats(self):
+        """
+        وضعیت صف و صدک‌های تأخیر
+
+        Returns:
+            dict: عمق صف، کارهای در حال اجرا، شمارش وضعیت‌ها و صدک‌های زمان انتظار و اجرا
+        """
+        with self._lock:
+            return {
+                'uptime': time.time() - self.started,
+                'queue_depth': self._queue.qsize(),
+                'running': self.running,
+                'workers': self.jobs,
+                'worker_restarts': sum(slot.restarts for slot in self._slots),
+                'jobs': dict(self.totals),
+                'queue_latency': latency_percentiles(list(self.queue_latencies)),
+                'run_latency': latency_percentiles(list(self.run_latencies)),
+            }
+
+    def to_prometheus(self, prefix="image_extractor"):
+        """
+        متریک‌های سرویس و مراحل استخراج در قالب متنی Prometheus
+
+        Returns:
+            str: متریک‌ها
+        """
+        stats = self.stats()
+        self.metrics.elapsed = stats['uptime']
+        lines = [
+            f"# TYPE {prefix}_queue_depth gauge", f"{prefix}_queue_depth {stats['queue_depth']}",
+            f"# TYPE {prefix}_jobs_running gauge", f"{prefix}_jobs_running {stats['running']}",
+            f"# TYPE {prefix}_worker_restarts_total counter",
+            f"{prefix}_worker_restarts_total {stats['worker_restarts']}",
+            f"# TYPE {prefix}_jobs_total counter",
+        ]
+        for status, value in sorted(stats['jobs'].items()):
+            lines.append(f'{prefix}_jobs_total{{status="{status}"}} {value}')
+        lines.append(f"# TYPE {prefix}_job_seconds summary")
+        for phase in ("queue", "run"):
+            for percentile, seconds in stats[f"{phase}_latency"].items():
+                lines.append(f'{prefix}_job_seconds{{phase="{phase}",quantile="{percentile / 100:g}"}} {seconds:.6f}')
+        return "\n".join(lines) + "\n" + self.metrics.to_prometheus(prefix)
+
+    def close(self):
+        """انتظار برای کارهای در حال اجرا و توقف کارگرها؛ کارهای صف رها می‌شوند"""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                self._finish_cancelled(job)
+        for _ in self._dispatchers:
+            self._queue.put(None)
+        for thread in self._dispatchers:
+            thread.join()
+        for slot in self._slots:
+            slot.close()
+
+    def _finish_cancelled(self, job):
+        job.status = "failed"
+        job.error = "سرویس متوقف شد"
+        job.finished = time.time()
+        job.done.set()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "image-extractor"
+
+    def address_string(self):
+        # سوکت Unix نشانی کلاینت ندارد
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, str):
+            body = json.dumps(body, ensure_ascii=False)
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            self._send(200, dict(service.stats(), status="ok"))
+        elif url.path == "/metrics":
+            self._send(200, service.to_prometheus(), "text/plain; version=0.0.4")
+        elif url.path == "/jobs":
+            self._send(200, [job.as_dict() for job in service.list_jobs()])
+        elif url.path.startswith("/jobs/"):
+            job = service.get(url.path[len("/jobs/"):])
+            if job is None:
+                self._send(404, {'error': "کار پیدا نشد"})
+                return
+            if "wait" in query:
+                try:
+                    wait = _wait_seconds(query["wait"][0])
+                except ValueError as e:
+                    self._send(400, {'error': str(e)})
+                    return
+                job.done.wait(wait)
+            self._send(200, job.as_dict(include_manifest=job.done.is_set()))
+        else:
+            self._send(404, {'error': "مسیر ناشناخته"})
+
+    def do_POST(self):
+        service = self.server.service
+        url = urlsplit(self.path)
+        if url.path != "/jobs":
+            self._send(404, {'error': "مسیر ناشناخته"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = service.submit(request["path"], request.get("options"))
+        except (KeyError, TypeError, ValueError) as e:
+            self._send(400, {'error': str(e) if not isinstance(e, KeyError) else "path لازم است"})
+            return
+        except queue.Full:
+            self._send(503, {'error': "صف کارها پر است"})
+            return
+        if request.get("wait"):
+            job.done.wait()
+            self._send(200, job.as_dict(include_manifest=True))
+        else:
+            self._send(202, job.as_dict())
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+    """
+    ساخت سرور HTTP روی host:port یا سوکت Unix
+
+    Args:
+        service (ExtractionService): سرویس راه‌اندازی شده
+        host (str): نشانی شنود؛ پیش‌فرض فقط دسترسی محلی
+        port (int): درگاه
+        socket_path (str): مسیر سوکت Unix (در این صورت host و port نادیده گرفته می‌شوند)
+
+    Returns:
+        سرور socketserver؛ با serve_forever اجرا کنید
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = _HTTPServer((host, port), _RequestHandler)
+    server.service = service
+    return server
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ServiceClient:
+    """
+    کلاینت محلی سرویس استخراج
+
+    Args:
+        address (str): "host:port" یا مسیر سوکت Unix
+        timeout (float): مهلت هر درخواست به ثانیه
+    """
+
+    def __init__(self, address=f"127.0.0.1:{DEFAULT_PORT}", timeout=None):
+        self.address = address
+        self.timeout = timeout
+
+    def _connection(self):
+        if os.sep in self.address or self.address.endswith(".sock"):
+            return _UnixHTTPConnection(self.address, self.timeout)
+        host, _, port = self.address.rpartition(":")
+        return HTTPConnection(host or "127.0.0.1", int(port), timeout=self.timeout)
+
+    def _request(self, method, path, body=None):
+        connection = self._connection()
+        try:
+            payload = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {'Content-Type': "application/json"} if payload is not None else {}
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            data = response.read().decode("utf-8")
+        finally:
+            connection.close()
+        if response.status >= 400:
+            raise RuntimeError(f"{response.status}: {json.loads(data).get('error')}")
+        return data if response.getheader("Content-Type", "").startswith("text/plain") else json.loads(data)
+
+    def submit(self, file_path, wait=False, **options):
+        """
+        ارسال یک کار
+
+        Args:
+            file_path (str): مسیر سند (از دید سرویس)
+            wait (bool): انتظار تا پایان کار و دریافت فهرست تصاویر
+            **options: گزینه‌های کار (JOB_OPTIONS)
+
+        Returns:
+            dict: وضعیت کار
+        """
+        return self._request("POST", "/jobs", {'path': os.path.abspath(file_path), 'options': options,
+                                               'wait': wait})
+
+    def job(self, job_id, wait=None):
+        """وضعیت یک کار؛ با wait حداکثر این تعداد ثانیه منتظر پایان آن می‌ماند"""
+        return self._request("GET", f"/jobs/{job_id}" + (f"?wait={wait}" if wait is not None else ""))
+
+    def health(self):
+        """وضعیت صف و صدک‌های تأخیر"""
+        return self._request("GET", "/health")
+
+    def metrics(self):
+        """متریک‌های Prometheus سرویس"""
+        return self._request("GET", "/metrics")
+
+
+def main(argv=None):
+    import argparse
+    import signal
+    parser = argparse.ArgumentParser(prog="service.py", description="سرویس ماندگار استخراج تصاویر")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="اجرای سرویس")
+    serve.add_argument("--host", default="127.0.0.1", help="نشانی شنود (پیش‌فرض: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"درگاه HTTP (پیش‌فرض: {DEFAULT_PORT})")
+    serve.add_argument("--socket", dest="socket_path", metavar="PATH", help="شنود روی سوکت Unix به جای TCP")
+    serve.add_argument("--jobs", type=int, default=2, help="تعداد کارهای هم‌زمان/پردازه‌های کارگر (پیش‌فرض: 2)")
+    serve.add_argument("--max-queue", type=int, default=100, help="حداکثر کارهای منتظر در صف (پیش‌فرض: 100)")
+    serve.add_argument("--job-timeout", type=float, metavar="SECONDS", help="بودجه زمانی پیش‌فرض و حداکثر هر کار")
+    serve.add_argument("--max-job-threads", type=int, default=4, metavar="N",
+                       help="سقف workers، convert_workers و write_workers هر کار (پیش‌فرض: 4)")
+    serve.add_argument("--hash", dest="hash_algorithm", default=DEFAULT_ALGORITHM, help="الگوریتم چکیده")
+    serve.add_argument("--index", metavar="DB", help="شاخص SQLite ماندگار تکراری‌ها، مشترک بین همه کارها")
+    serve.add_argument("--near-duplicates", dest="near_distance", type=int, metavar="BITS",
+                       help="حداکثر فاصله Hamming تصاویر تقریباً تکراری")
+    serve.add_argument("--state-dir", metavar="DIR", help="پوشه فهرست‌های JSONL کارها")
+
+    submit = commands.add_parser("submit", help="ارسال یک سند به سرویس")
+    submit.add_argument("path", help="مسیر سند")
+    submit.add_argument("--connect", default=f"127.0.0.1:{DEFAULT_PORT}", metavar="ADDRESS",
+                        help="host:port یا مسیر سوکت Unix سرویس")
+    submit.add_argument("--wait", action="store_true", help="انتظار تا پایان کار و چاپ فهرست تصاویر")
+    submit.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="گزینه کار با مقدار JSON، مثلاً output_profile=\"web\" یا min_width=64")
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        options = {}
+        for option in args.option:
+            name, _, value = option.partition("=")
+            try:
+                options[name] = json.loads(value)
+            except ValueError:
+                options[name] = value
+        try:
+            result = ServiceClient(args.connect).submit(args.path, wait=args.wait, **options)
+        except (OSError, RuntimeError) as e:
+            print(f"❌ خطا در ارسال کار: {e}")
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if result['status'] in ("failed", "timeout"):
+            sys.exit(1)
+        return
+
+    if args.jobs < 1:
+        parser.error("--jobs باید حداقل 1 باشد")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    service = ExtractionService(jobs=args.jobs, max_queue=args.max_queue, job_timeout=args.job_timeout,
+                                max_job_threads=args.max_job_threads, hash_algorithm=args.hash_algorithm,
+                                index_path=args.index, near_distance=args.near_distance,
+                                state_dir=args.state_dir).start()
+    server = make_server(service, args.host, args.port, args.socket_path)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logging.info(f"🚀 سرویس آماده است: {args.socket_path or f'{args.host}:{args.port}'} ({args.jobs} کارگر)")
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        if args.socket_path and os.path.exists(args.socket_path):
+            os.remove(args.socket_path)
+        service.close()
+        logging.info("🛑 سرویس متوقف شد")
+
+
+if __name__ == "__main__":
+    main()
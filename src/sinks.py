@@ -0,0 +1,332 @@
+"""
+Output sinks
+مقصدهای خروجی به جای یک فایل جدا برای هر تصویر: بایگانی tar یا ZIP بدون فشرده‌سازی
+برای هر سند، یا یک فایل بسته‌بندی (pack) مشترک
+
+مکان هر تصویر در این مقصدها به شکل "<container>#<name>" ثبت می‌شود. کنار هر
+container یک شاخص <container>.idx (یک خط برای هر تصویر: چکیده، اندازه منبع، آفست،
+طول و نام) نگه داشته می‌شود تا هر تصویر با یک seek و read بر اساس چکیده خوانده شود.
+"""
+
+import io
+import os
+import threading
+import time
+
+SINKS = ("dir", "tar", "zip", "pack")
+
+_CONTAINER_EXTENSIONS = (".tar", ".zip", ".pack")
+
+# اندازه بافر فایل pack پیش از نوشتن یک‌جا
+_PACK_BUFFER = 4 * 1024 * 1024
+
+try:
+    import fcntl
+except ImportError:  # ویندوز؛ چند پردازه نباید هم‌زمان در یک فایل pack بنویسند
+    fcntl = None
+
+
+def split_location(location):
+    """
+    جدا کردن container و نام عضو از مکان یک تصویر
+
+    Returns:
+        tuple: (container, name)؛ برای فایل‌های معمولی (location, None)
+    """
+    container, separator, name = location.rpartition("#")
+    if separator and container.endswith(_CONTAINER_EXTENSIONS):
+        return container, name
+    return location, None
+
+
+def location_exists(location):
+    """بررسی وجود فایل خروجی یا container آن"""
+    return os.path.exists(split_location(location)[0])
+
+
+def _load_index(index_path):
+    entries = {}
+    if not os.path.exists(index_path):
+        return entries
+    with open(index_path, "r", encoding="utf-8") as fp:
+        for line in fp:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) == 5:
+                digest, _, offset, length, name = fields
+                entries[digest] = (int(offset), int(length), name)
+    return entries
+
+
+class ArchiveReader:
+    """
+    خواندن تصادفی تصاویر یک container بر اساس چکیده
+
+    Args:
+        container (str): مسیر فایل tar، zip یا pack
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.entries = _load_index(f"{container}.idx")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, digest):
+        return digest in self.entries
+
+    def names(self):
+        """نام تصاویر ذخیره شده به ترتیب چکیده"""
+        return [name for _, _, name in self.entries.values()]
+
+    def read(self, digest):
+        """
+        خواندن بایت‌های ذخیره شده یک تصویر
+
+        Returns:
+            bytes: داده‌ها، یا None اگر چکیده در شاخص نباشد
+        """
+        entry = self.entries.get(digest)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        with open(self.container, "rb") as fp:
+            fp.seek(offset)
+            return fp.read(length)
+
+
+class _ArchiveSink:
+    """
+    پایه مقصدهای تک‌فایلی: نوشتن ترتیبی، شاخص آفست و خواندن بر اساس چکیده
+
+    نخ‌های تبدیل هم مستقیماً می‌نویسند، پس write با قفل انجام می‌شود.
+    """
+
+    def __init__(self, container, sync=False):
+        self.container = container
+        self.sync = sync
+        self.count = 0
+        self.bytes_written = 0
+        self._sizes = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(container)), exist_ok=True)
+        self._entries = _load_index(f"{container}.idx")
+        self._stored = {digest: (name, length) for digest, (_, length, name) in self._entries.items()}
+        self._index = open(f"{container}.idx", "a", encoding="utf-8")
+
+    def write(self, name, data, key):
+        """
+        افزودن یک تصویر
+
+        Args:
+            name (str): نام تصویر در container
+            data (bytes): داده‌های خروجی
+            key (ImageKey): کلید محتوای تصویر منبع (برای شاخص)
+
+        Returns:
+            str: مکان تصویر ("<container>#<name>")؛ اگر همین چکیده قبلاً در container
+            ثبت شده باشد (مثلاً در اجرای قبلی) مکان موجود برگردانده می‌شود و چیزی افزوده نمی‌شود
+        """
+        with self._lock:
+            existing = self._stored.get(key.digest)
+            if existing is not None:
+                existing_name, length = existing
+                self._sizes[existing_name] = length
+                return f"{self.container}#{existing_name}"
+            self._append(name, data, key)
+            # PackSink شاخص را با تأخیر می‌نویسد، پس چکیده همین‌جا ثبت می‌شود
+            self._stored[key.digest] = (name, len(data))
+            self.count += 1
+            self.bytes_written += len(data)
+            self._sizes[name] = len(data)
+        return f"{self.container}#{name}"
+
+    def _append(self, name, data, key):
+        raise NotImplementedError
+
+    def _add_entry(self, key, offset, length, name):
+        self._index.write(f"{key.digest}\t{key.size}\t{offset}\t{length}\t{name}\n")
+        self._entries[key.digest] = (offset, length, name)
+
+    def size(self, location):
+        """اندازه تصویری که در همین اجرا نوشته شده"""
+        return self._sizes.get(split_location(location)[1])
+
+    def read(self, digest):
+        """
+        خواندن یک تصویر بر اساس چکیده منبع
+
+        Returns:
+            bytes: داده‌ها، یا None اگر چکیده ثبت نشده باشد
+        """
+        with self._lock:
+            self._flush()
+            entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        with open(self.container, "rb") as fp:
+            fp.seek(offset)
+            return fp.read(length)
+
+    def _flush(self):
+        self._index.flush()
+
+    def close(self):
+        """نوشتن باقی‌مانده‌ها و بستن container و شاخص"""
+        with self._lock:
+            if self._index.closed:
+                return
+            self._flush()
+            self._close()
+            if self.sync:
+                os.fsync(self._index.fileno())
+                with open(self.container, "rb") as fp:
+                    os.fsync(fp.fileno())
+            self._index.close()
+
+    def _close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TarSink(_ArchiveSink):
+    """
+    بایگانی tar بدون فشرده‌سازی؛ اگر از قبل وجود داشته باشد به انتهای آن اضافه می‌شود
+
+    داده هر عضو دست‌نخورده در بلوک‌های 512 بایتی پس از سرآیندش قرار می‌گیرد، پس آفست
+    شاخص مستقیماً به بایت‌های تصویر اشاره می‌کند.
+    """
+
+    def __init__(self, container, sync=False):
+        super().__init__(container, sync)
+        import tarfile
+        self._tarfile = tarfile
+        # حالت a برای یافتن انتها سرآیندهای موجود را یک بار پیمایش می‌کند
+        self._tar = tarfile.open(container, "a" if os.path.exists(container) else "w", format=tarfile.PAX_FORMAT)
+
+    def _append(self, name, data, key):
+        info = self._tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = time.time()
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+        padded = -(-len(data) // self._tarfile.BLOCKSIZE) * self._tarfile.BLOCKSIZE
+        self._add_entry(key, self._tar.offset - padded, len(data), name)
+
+    def _flush(self):
+        super()._flush()
+        self._tar.fileobj.flush()
+
+    def _close(self):
+        self._tar.close()
+
+
+class ZipSink(_ArchiveSink):
+    """
+    بایگانی ZIP با ZIP_STORED؛ اگر از قبل وجود داشته باشد به آن اضافه می‌شود
+
+    فهرست مرکزی ZIP فقط هنگام بستن نوشته می‌شود، ولی شاخص .idx پس از هر تصویر
+    معتبر است.
+    """
+
+    def __init__(self, container, sync=False):
+        super().__init__(container, sync)
+        import zipfile
+        self._zipfile = zipfile
+        self._zip = zipfile.ZipFile(container, "a", compression=zipfile.ZIP_STORED)
+
+    def _append(self, name, data, key):
+        info = self._zipfile.ZipInfo(name, time.localtime()[:6])
+        info.external_attr = 0o644 << 16
+        self._zip.writestr(info, data, compress_type=self._zipfile.ZIP_STORED)
+        # پس از writestr موقعیت فایل درست انتهای داده‌های همین عضو است
+        self._add_entry(key, self._zip.fp.tell() - len(data), len(data), name)
+
+    def _flush(self):
+        super()._flush()
+        self._zip.fp.flush()
+
+    def _close(self):
+        self._zip.close()
+
+
+class PackSink(_ArchiveSink):
+    """
+    فایل بسته‌بندی: داده‌های خام تصاویر پشت سر هم با شاخص آفست در .idx
+
+    تصاویر تا _PACK_BUFFER بایت در حافظه جمع و با یک write به انتهای فایل اضافه
+    می‌شوند. افزودن داده و خطوط شاخص زیر قفل fcntl انجام می‌شود تا چند پردازه
+    دسته‌ای بتوانند در یک فایل pack مشترک بنویسند.
+    """
+
+    def __init__(self, container, sync=False):
+        super().__init__(container, sync)
+        self._fd = os.open(container, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _append(self, name, data, key):
+        self._pending.append((name, data, key))
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= _PACK_BUFFER:
+            self._write_pending()
+
+    def _write_pending(self):
+        if not self._pending:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            offset = os.fstat(self._fd).st_size
+            os.write(self._fd, b"".join(data for _, data, _ in self._pending))
+            for name, data, key in self._pending:
+                self._add_entry(key, offset, len(data), name)
+                offset += len(data)
+            self._index.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _flush(self):
+        self._write_pending()
+        super()._flush()
+
+    def _close(self):
+        os.close(self._fd)
+
+
+def open_sink(spec, output_path, file_path, sync=False):
+    """
+    ساخت مقصد خروجی یک سند
+
+    Args:
+        spec (str): "dir"، "tar"، "zip"، "pack" یا "pack:PATH" برای یک فایل pack مشترک
+        output_path (str): پوشه خروجی سند (extracted_images)
+        file_path (str): مسیر سند؛ نام بایگانی tar و zip از آن گرفته می‌شود
+        sync (bool): fsync container و شاخص هنگام بستن
+
+    Returns:
+        مقصد با متدهای write، read و close؛ برای "dir" مقدار None (نوشتن فایل‌های جدا)
+
+    Raises:
+        ValueError: نوع مقصد ناشناخته
+    """
+    kind, _, path = (spec or "dir").partition(":")
+    if kind not in SINKS or (path and kind != "pack"):
+        raise ValueError(f"مقصد خروجی ناشناخته: {spec}")
+    if kind == "dir":
+        return None
+    base_name = os.path.join(output_path, os.path.basename(file_path))
+    if kind == "tar":
+        return TarSink(f"{base_name}.tar", sync)
+    if kind == "zip":
+        return ZipSink(f"{base_name}.zip", sync)
+    return PackSink(path or os.path.join(output_path, "images.pack"), sync)
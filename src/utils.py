@@ -5,11 +5,14 @@ Utility functions for Image Extractor
 
 import os
 import logging
-import zipfile
 from uuid import uuid4
-from pypdf import PdfReader
-from PIL import Image
 import io
+import sys
+
+try:
+    import resource
+except ImportError:  # ویندوز
+    resource = None
 
 
 def setup_logging():
@@ -50,12 +53,14 @@ def ensure_directory_exists(path):
 
 def get_supported_formats():
     """
-    دریافت لیست فرمت‌های پشتیبانی شده
+    دریافت لیست فرمت‌های پشتیبانی شده (پسوندهایی که در extractor_core backend دارند)
     
     Returns:
         list: لیست فرمت‌های پشتیبانی شده
     """
-    return ['.pdf', '.docx', '.pptx']
+    # extractor_core خودش utils را import می‌کند
+    from extractor_core import supported_extensions
+    return supported_extensions()
 
 
 def is_supported_format(file_path):
@@ -108,6 +113,7 @@ def convert_jp2_to_png(image_data):
     Returns:
         tuple: (data, extension, success)
     """
+    from PIL import Image
     try:
         with Image.open(io.BytesIO(image_data)) as img:
             if img.mode == "RGBA":
@@ -175,6 +181,35 @@ def format_file_size(size_bytes):
     return f"{size_bytes:.2f} {size_names[i]}"
 
 
+def get_memory_usage():
+    """
+    دریافت حافظه مقیم فعلی پردازه (RSS)
+
+    Returns:
+        int: حافظه به بایت، یا None اگر روی این سیستم قابل اندازه‌گیری نباشد
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # روی سیستم‌های بدون /proc حداکثر مصرف بهترین تخمین موجود است
+        return get_peak_memory_usage()
+
+
+def get_peak_memory_usage():
+    """
+    دریافت حداکثر حافظه مقیم پردازه از ابتدای اجرا
+
+    Returns:
+        int: حافظه به بایت، یا None اگر روی این سیستم قابل اندازه‌گیری نباشد
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss روی macOS بر حسب بایت و روی لینوکس بر حسب کیلوبایت است
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
 def clean_filename(filename):
     """
     پاکسازی نام فایل از کاراکترهای غیرمجاز
@@ -209,6 +244,44 @@ def get_output_path(input_file_path):
 
 class ImageProcessor:
     """کلاس برای پردازش تصاویر"""
+
+    @staticmethod
+    def flatten_alpha(img, background_color=(255, 255, 255)):
+        """
+        ترکیب کانال شفافیت با پس‌زمینه برای فرمت‌هایی که آلفا ندارند
+
+        Args:
+            img (Image.Image): تصویر
+            background_color (tuple): رنگ پس‌زمینه
+
+        Returns:
+            Image.Image: تصویر RGB (یا همان تصویر اگر آلفا نداشته باشد)
+        """
+        from PIL import Image
+        if img.mode == 'P' and 'transparency' in img.info:
+            img = img.convert('RGBA')
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', img.size, background_color)
+            background.paste(img, mask=img.split()[-1])
+            return background
+        return img
+
+    @staticmethod
+    def encode_image(img, image_format, **params):
+        """
+        کدگذاری تصویر در حافظه
+
+        Args:
+            img (Image.Image): تصویر
+            image_format (str): فرمت Pillow (PNG، JPEG، WEBP و ...)
+            **params: تنظیمات encoder (مثلاً quality یا compress_level)
+
+        Returns:
+            bytes: داده‌های تصویر کدگذاری شده
+        """
+        output = io.BytesIO()
+        img.save(output, format=image_format, **params)
+        return output.getvalue()
     
     @staticmethod
     def is_valid_image(file_path):
@@ -221,6 +294,7 @@ class ImageProcessor:
         Returns:
             bool: True اگر فایل معتبر باشد
         """
+        from PIL import Image
         try:
             with Image.open(file_path) as img:
                 img.verify()
@@ -239,6 +313,7 @@ class ImageProcessor:
         Returns:
             tuple: (width, height) یا None در صورت خطا
         """
+        from PIL import Image
         try:
             with Image.open(file_path) as img:
                 return img.size
@@ -256,13 +331,10 @@ class ImageProcessor:
             output_path (str): مسیر فایل خروجی
             quality (int): کیفیت خروجی (0-100)
         """
+        from PIL import Image
         try:
             with Image.open(input_path) as img:
-                if img.mode in ('RGBA', 'LA'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1])
-                    img = background
-                
+                img = ImageProcessor.flatten_alpha(img)
                 img.save(output_path, optimize=True, quality=quality)
                 return True
         except Exception as e:
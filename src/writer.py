@@ -0,0 +1,158 @@
+"""
+Asynchronous image writer
+نوشتن تصاویر در نخ‌های جداگانه تا خواندن سند منتظر دیسک یا شبکه نماند
+"""
+
+import os
+import threading
+import time
+
+import metrics
+from conversion import ConversionPool
+
+
+def latency_percentiles(samples, percentiles=(50, 95, 99)):
+    """
+    محاسبه صدک‌های یک نمونه زمانی (روش nearest-rank)
+
+    Args:
+        samples (list): زمان‌ها به ثانیه
+        percentiles (tuple): صدک‌های مورد نظر
+
+    Returns:
+        dict: {صدک: زمان}؛ برای نمونه خالی دیکشنری خالی
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {p: ordered[max(0, -(-p * len(ordered) // 100) - 1)] for p in percentiles}
+
+
+class ImageWriter:
+    """
+    نویسنده غیرهم‌زمان فایل‌های خروجی
+
+    کارهای (path, data) در صف محدود ConversionPool قرار می‌گیرند، پس اگر ذخیره‌ساز
+    کند باشد حداکثر max_pending تصویر منتظر نوشتن در حافظه می‌ماند. پوشه‌ها فقط یک
+    بار ساخته می‌شوند. با fsync_batch، fsync فایل‌ها به جای تک‌تک، در دسته‌های
+    fsync_batch تایی همراه با یک fsync برای هر پوشه انجام می‌شود.
+
+    نتایج (token, path) مثل ConversionPool در نخ فراخواننده با completed یا close
+    تحویل داده می‌شوند.
+    """
+
+    def __init__(self, workers=2, fsync_batch=None, max_pending=None):
+        self.fsync_batch = fsync_batch
+        self.latencies = []
+        self.sync_latencies = []
+        self.bytes_written = 0
+        self._created_dirs = set()
+        self._unsynced = []
+        self._lock = threading.Lock()
+        self._pool = ConversionPool(workers, max_pending)
+
+    def _ensure_directory(self, directory):
+        if directory not in self._created_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._created_dirs.add(directory)
+
+    def write(self, path, data, token=None, counter="images_out"):
+        """
+        افزودن یک فایل به صف نوشتن (در صورت پر بودن صف مسدود می‌شود)
+
+        Args:
+            path (str): مسیر فایل خروجی
+            data (bytes): محتوای فایل
+            token: مقداری که همراه مسیر در نتایج برگردانده می‌شود
+            counter (str): شمارنده متریک این فایل (مثلاً thumbnails_out برای تصاویر بندانگشتی)
+        """
+        self._ensure_directory(os.path.dirname(path) or ".")
+        self._pool.submit(self._write, path, data, token, counter)
+
+    def _write(self, path, data, token, counter):
+        started = time.perf_counter()
+        with open(path, "wb") as fp:
+            fp.write(data)
+        elapsed = time.perf_counter() - started
+        self.latencies.append(elapsed)
+        collector = metrics.active()
+        if collector is not None:
+            collector.observe("write", elapsed)
+            collector.count(counter)
+            collector.count("bytes_out", len(data))
+
+        if self.fsync_batch:
+            with self._lock:
+                self.bytes_written += len(data)
+                self._unsynced.append(path)
+                batch = None
+                if len(self._unsynced) >= self.fsync_batch:
+                    batch, self._unsynced = self._unsynced, []
+            if batch:
+                self._sync(batch)
+        else:
+            with self._lock:
+                self.bytes_written += len(data)
+        return token, path
+
+    def _sync(self, paths):
+        started = time.perf_counter()
+        for path in paths:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for directory in {os.path.dirname(path) or "." for path in paths}:
+            try:
+                fd = os.open(directory, os.O_RDONLY)
+            except OSError:  # ویندوز پوشه را به این شکل باز نمی‌کند
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.sync_latencies.append(time.perf_counter() - started)
+
+    def completed(self):
+        """
+        تحویل نتایج فایل‌هایی که نوشتنشان تمام شده، بدون انتظار
+
+        Yields:
+            tuple: (token, path)
+        """
+        return self._pool.completed()
+
+    def close(self):
+        """
+        انتظار برای نوشتن همه فایل‌ها و fsync باقی‌مانده‌ها
+
+        Returns:
+            list: نتایج (token, path) باقی‌مانده
+        """
+        results = self._pool.close()
+        if self._unsynced:
+            batch, self._unsynced = self._unsynced, []
+            self._sync(batch)
+        return results
+
+    def stats(self):
+        """
+        آمار نوشتن
+
+        Returns:
+            dict: تعداد فایل‌ها، بایت‌ها، صدک‌های تأخیر نوشتن و تعداد دسته‌های fsync
+        """
+        return {
+            'files': len(self.latencies),
+            'bytes': self.bytes_written,
+            'latency': latency_percentiles(self.latencies),
+            'fsync_batches': len(self.sync_latencies),
+            'fsync_latency': latency_percentiles(self.sync_latencies),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._pool.__exit__(exc_type, exc_value, traceback)
@@ -0,0 +1,75 @@
+"""
+Shared pytest fixtures
+ماژول‌های src مستقیماً (بدون بسته) import می‌شوند؛ اسناد نمونه در tmp_path ساخته می‌شوند
+"""
+
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+def image_bytes(color, image_format="PNG", size=(40, 30)):
+    """بایت‌های یک تصویر تک‌رنگ"""
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new("RGB", size, color).save(output, image_format)
+    return output.getvalue()
+
+
+def extracted_files(file_path):
+    """
+    فایل‌های پوشه extracted_images کنار یک سند
+
+    Returns:
+        dict: {نام فایل: بایت‌ها}؛ اگر پوشه ساخته نشده باشد خالی
+    """
+    output_path = os.path.join(os.path.dirname(file_path), "extracted_images")
+    if not os.path.isdir(output_path):
+        return {}
+    files = {}
+    for name in sorted(os.listdir(output_path)):
+        with open(os.path.join(output_path, name), "rb") as fp:
+            files[name] = fp.read()
+    return files
+
+
+def write_zip(path, members, compression=zipfile.ZIP_DEFLATED):
+    """
+    ساخت یک بایگانی ZIP از {نام عضو: بایت‌ها}؛ عضو mimetype مثل ODF/EPUB بدون فشرده‌سازی و اول نوشته می‌شود
+    """
+    with zipfile.ZipFile(path, "w", compression) as archive:
+        if "mimetype" in members:
+            archive.writestr(zipfile.ZipInfo("mimetype"), members["mimetype"], compress_type=zipfile.ZIP_STORED)
+        for name, data in members.items():
+            if name != "mimetype":
+                archive.writestr(name, data)
+    return str(path)
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    """سند Word با سه تصویر متفاوت و یک تکراری"""
+    return write_zip(tmp_path / "sample.docx", {
+        "word/document.xml": "<w:document/>",
+        "word/media/image1.png": image_bytes((255, 0, 0)),
+        "word/media/image2.jpeg": image_bytes((0, 255, 0), "JPEG"),
+        "word/media/image3.png": image_bytes((0, 0, 255)),
+        "word/media/image4.png": image_bytes((255, 0, 0)),
+    })
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """PDF چهار صفحه‌ای با یک تصویر JPEG متفاوت در هر صفحه"""
+    from PIL import Image
+    pages = [Image.new("RGB", (60, 40), (60 * index, 80, 120)) for index in range(4)]
+    path = tmp_path / "sample.pdf"
+    pages[0].save(path, "PDF", save_all=True, append_images=pages[1:])
+    return str(path)
@@ -0,0 +1,50 @@
+import os
+import shutil
+
+import pytest
+
+from batch import iter_input_paths, run_batch
+from incremental import SourceManifest
+
+
+@pytest.fixture
+def corpus(tmp_path, docx_path, pdf_path):
+    """پوشه‌ای با دو سند، یک فایل پشتیبانی نشده، یک ZIP ساده و یک پوشه خروجی قبلی"""
+    root = tmp_path / "corpus"
+    (root / "nested").mkdir(parents=True)
+    (root / "extracted_images").mkdir()
+    shutil.copy(docx_path, root / "nested" / "report.docx")
+    shutil.copy(pdf_path, root / "scan.pdf")
+    shutil.copy(pdf_path, root / "extracted_images" / "old.pdf")
+    shutil.copy(docx_path, root / "bundle.zip")
+    (root / "notes.txt").write_text("skip me")
+    return str(root)
+
+
+def test_iter_input_paths(corpus):
+    paths = list(iter_input_paths([corpus, os.path.join(corpus, "*.pdf")]))
+    assert [os.path.relpath(path, corpus) for path in paths] == ["scan.pdf", os.path.join("nested", "report.docx")]
+    paths = list(iter_input_paths([corpus], sniff_zip=True))
+    assert [os.path.relpath(path, corpus) for path in paths] == [
+        "bundle.zip", "scan.pdf", os.path.join("nested", "report.docx")]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_batch(corpus, jobs):
+    stats = run_batch(iter_input_paths([corpus]), jobs=jobs)
+    assert (stats['documents'], stats['failed'], stats['images']) == (2, 0, 7)
+    assert len(os.listdir(os.path.join(corpus, "nested", "extracted_images"))) == 3
+
+
+def test_run_batch_skips_unchanged_documents(tmp_path, corpus):
+    state = str(tmp_path / "state.json")
+    assert run_batch(iter_input_paths([corpus]), manifest=SourceManifest(state))['documents'] == 2
+    stats = run_batch(iter_input_paths([corpus]), manifest=SourceManifest(state))
+    assert (stats['documents'], stats['skipped']) == (0, 2)
+
+
+def test_run_batch_reports_failures(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really")
+    stats = run_batch([str(broken)])
+    assert (stats['documents'], stats['failed']) == (0, 1)
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from conversion import ConversionPool
+
+
+def _conversion_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("convert-")]
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+def test_results_are_collected_and_threads_stop():
+    with ConversionPool(3) as pool:
+        for value in range(10):
+            pool.submit(pow, value, 2)
+        assert sorted(pool.close()) == [value ** 2 for value in range(10)]
+    assert _conversion_threads() == []
+
+
+def test_submit_blocks_when_queue_is_full():
+    started, release = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait()
+        return "blocker"
+
+    pool = ConversionPool(1, max_pending=1)
+    pool.submit(blocker)
+    started.wait()
+    pool.submit(str, 1)  # صف یک‌خانه‌ای را پر می‌کند
+
+    producer = threading.Thread(target=pool.submit, args=(str, 2))
+    producer.start()
+    producer.join(0.2)
+    assert producer.is_alive()
+
+    release.set()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert sorted(pool.close()) == ["1", "2", "blocker"]
+
+
+def test_error_surfaces_from_completed():
+    done = threading.Event()
+    with ConversionPool(1) as pool:
+        pool.submit(_fail, "bad image")
+        pool.submit(done.set)
+        done.wait(5)
+        with pytest.raises(ValueError, match="bad image"):
+            list(pool.completed())
+
+
+def test_exit_on_error_discards_pending_work():
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def blocker():
+        started.set()
+        release.wait()
+
+    with pytest.raises(RuntimeError):
+        with ConversionPool(1, max_pending=4) as pool:
+            pool.submit(blocker)
+            started.wait()
+            for value in range(3):
+                pool.submit(ran.append, value)
+            # نخ تا بعد از خالی شدن صف در __exit__ مسدود می‌ماند
+            threading.Timer(0.2, release.set).start()
+            raise RuntimeError("stop")
+    assert ran == []
+    assert _conversion_threads() == []
@@ -0,0 +1,120 @@
+import io
+import os
+
+import pytest
+
+from cli_extractor import extract_images
+from conftest import extracted_files
+from dedup import DedupIndex, PersistentDedupIndex, available_algorithms, content_key, stream_key
+
+
+def test_content_and_stream_keys_agree():
+    data = os.urandom(300000)
+    for algorithm in available_algorithms():
+        key = content_key(data, algorithm)
+        assert key.size == len(data)
+        assert stream_key(io.BytesIO(data), algorithm) == key
+    assert content_key(b"a") != content_key(b"b")
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        DedupIndex("md4-please")
+
+
+def test_index_detects_repeats_by_size_and_digest():
+    index = DedupIndex()
+    first, same_size = content_key(b"abcd"), content_key(b"wxyz")
+    assert index.add(first)
+    assert not index.add(first)
+    assert index.add(same_size)
+    assert first in index and len(index) == 2
+
+
+def test_bounded_index_forgets_oldest():
+    index = DedupIndex(max_entries=2)
+    keys = [content_key(bytes([value])) for value in range(3)]
+    for key in keys:
+        assert index.add(key)
+    assert keys[0] not in index
+    assert len(index) == 2
+    assert index.add(keys[0])
+
+
+def test_document_duplicates_written_once(docx_path):
+    assert len(extract_images(docx_path)) == 3
+    assert len(set(extracted_files(docx_path).values())) == 3
+
+
+def test_digest_naming(pdf_path):
+    extract_images(pdf_path, naming="digest")
+    files = extracted_files(pdf_path)
+    assert len(files) == 4
+    for name, data in files.items():
+        assert os.path.splitext(name)[0] == content_key(data).digest
+
+
+def test_index_shared_across_documents(tmp_path, pdf_path):
+    index = DedupIndex()
+    extract_images(pdf_path, dedup=index)
+    copy_path = tmp_path / "copy" / "sample.pdf"
+    copy_path.parent.mkdir()
+    copy_path.write_bytes(open(pdf_path, "rb").read())
+    extract_images(str(copy_path), dedup=index)
+    assert len(index) == 4
+    assert extracted_files(str(copy_path)) == {}
+
+
+def test_persistent_index_skips_existing_outputs(tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    output = tmp_path / "image.png"
+    output.write_bytes(b"png")
+    key = content_key(b"png")
+    with PersistentDedupIndex(db_path) as index:
+        assert index.add(key)
+        index.record(key, str(output))
+
+    with PersistentDedupIndex(db_path) as index:
+        assert index.lookup(key) == str(output)
+        assert not index.add(key)
+        assert index.hits == 1
+
+    # خروجی پاک شده دوباره نوشته می‌شود
+    output.unlink()
+    with PersistentDedupIndex(db_path) as index:
+        assert index.add(key)
+
+
+def test_persistent_index_is_per_algorithm(tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    output = tmp_path / "image.png"
+    output.write_bytes(b"png")
+    with PersistentDedupIndex(db_path, "blake2b") as index:
+        index.record(content_key(b"png", "blake2b"), str(output))
+    with PersistentDedupIndex(db_path, "sha256") as index:
+        assert index.add(content_key(b"png", "sha256"))
+
+
+def test_compact_and_evict(tmp_path):
+    db_path = str(tmp_path / "index.sqlite")
+    with PersistentDedupIndex(db_path) as index:
+        for value in range(4):
+            output = tmp_path / f"{value}.png"
+            output.write_bytes(bytes([value]))
+            index.record(content_key(bytes([value])), str(output))
+        (tmp_path / "0.png").unlink()
+        assert index.compact() == 1
+        assert len(index) == 3
+        assert index.evict(max_entries=1) == 2
+        assert len(index) == 1
+        assert index.evict(max_age_days=0) == 1
+
+
+def test_rerun_with_index_writes_nothing(tmp_path, docx_path):
+    db_path = str(tmp_path / "index.sqlite")
+    with PersistentDedupIndex(db_path) as index:
+        first = extract_images(docx_path, dedup=index, naming="digest")
+    with PersistentDedupIndex(db_path) as index:
+        assert extract_images(docx_path, dedup=index, naming="digest") == []
+        assert index.hits == 3
+    assert all(os.path.exists(path) for path in first)
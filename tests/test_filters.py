@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from PIL import Image
+
+import extractor_core
+from conftest import image_bytes, write_zip
+from extractor_core import ImageFilter, iter_images
+
+
+@pytest.fixture
+def mixed_pdf(tmp_path):
+    """PDF دو صفحه‌ای: یک تصویر کوچک و یک تصویر بزرگ پرجزئیات"""
+    small = Image.new("RGB", (8, 8), (200, 10, 10))
+    large = Image.frombytes("RGB", (300, 200), os.urandom(300 * 200 * 3))
+    path = tmp_path / "mixed.pdf"
+    small.save(path, "PDF", save_all=True, append_images=[large])
+    return str(path)
+
+
+def test_empty_filter_is_falsy():
+    assert not ImageFilter()
+    assert ImageFilter(min_width=1)
+
+
+@pytest.mark.parametrize("passthrough", [True, False])
+def test_pdf_min_bytes_uses_stream_length(monkeypatch, mixed_pdf, passthrough):
+    decoded = []
+    decode = extractor_core._decode_pdf_image
+    monkeypatch.setattr(extractor_core, "_decode_pdf_image", lambda *args: decoded.append(args) or decode(*args))
+
+    images = list(iter_images(mixed_pdf, passthrough=passthrough, image_filter=ImageFilter(min_bytes=5000)))
+    assert [image.page for image in images] == [1]
+    assert images[0].size_hint > 5000
+    # بدون passthrough هم اندازه از طول جریان کدگذاری شده می‌آید، نه از داده decode شده
+    assert all(image.size_hint is not None for image in iter_images(mixed_pdf, passthrough=passthrough))
+    # تصویر کوچک پیش از decode کنار گذاشته شده است
+    assert decoded == []
+
+
+def test_pdf_dimension_filter(mixed_pdf):
+    images = list(iter_images(mixed_pdf, image_filter=ImageFilter(min_width=100, max_pixels=100000)))
+    assert [(image.page, image.dimensions) for image in images] == [(1, (300, 200))]
+    images = list(iter_images(mixed_pdf, image_filter=ImageFilter(max_pixels=1000)))
+    assert [image.page for image in images] == [0]
+
+
+def test_zip_filter_uses_member_size_and_header(tmp_path):
+    path = write_zip(tmp_path / "filtered.docx", {
+        "word/document.xml": "<w:document/>",
+        "word/media/tiny.png": image_bytes((1, 2, 3), size=(4, 4)),
+        "word/media/wide.png": image_bytes((4, 5, 6), size=(200, 20)),
+        "word/media/tall.png": image_bytes((7, 8, 9), size=(20, 200)),
+    })
+    names = [image.member for image in iter_images(path, image_filter=ImageFilter(min_width=10, min_height=10))]
+    assert names == ["word/media/wide.png", "word/media/tall.png"]
+    names = [image.member for image in iter_images(path, image_filter=ImageFilter(min_width=100))]
+    assert names == ["word/media/wide.png"]
@@ -0,0 +1,39 @@
+import os
+
+from cli_extractor import extract_images
+from image_manifest import read_manifest
+from profiles import get_profile
+
+
+def test_manifest_records_every_saved_image(tmp_path, pdf_path):
+    manifest_path = str(tmp_path / "images.jsonl")
+    outputs = extract_images(pdf_path, naming="digest", manifest_path=manifest_path)
+    records = list(read_manifest(manifest_path))
+
+    assert sorted(record['output'] for record in records) == sorted(os.path.abspath(path) for path in outputs)
+    assert sorted(record['page'] for record in records) == [1, 2, 3, 4]
+    for record in records:
+        assert record['source'] == os.path.abspath(pdf_path)
+        assert (record['width'], record['height']) == (60, 40)
+        assert record['format'] == "jpg" and record['conversion'] is None
+        assert record['output_size'] == os.path.getsize(record['output'])
+        assert os.path.basename(record['output']).startswith(record['digest'])
+        assert record['algorithm'] == "blake2b"
+
+
+def test_manifest_describes_conversions(tmp_path, docx_path):
+    manifest_path = str(tmp_path / "images.jsonl")
+    extract_images(docx_path, profile=get_profile("preview"), manifest_path=manifest_path)
+    records = list(read_manifest(manifest_path))
+
+    assert [record['member'] for record in records] == [
+        "word/media/image1.png", "word/media/image2.jpeg", "word/media/image3.png"]
+    assert all(record['page'] is None for record in records)
+    assert records[0]['conversion'] == "png→jpg (preview)"
+
+
+def test_manifest_appends_across_runs(tmp_path, docx_path):
+    manifest_path = str(tmp_path / "images.jsonl")
+    extract_images(docx_path, manifest_path=manifest_path)
+    extract_images(docx_path, manifest_path=manifest_path)
+    assert len(list(read_manifest(manifest_path))) == 6
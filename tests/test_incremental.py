@@ -0,0 +1,90 @@
+import json
+import os
+
+import cli_extractor
+from incremental import SourceManifest, extraction_settings, file_fingerprint
+
+
+def _outputs(pdf_path):
+    return sorted(os.listdir(os.path.join(os.path.dirname(pdf_path), "extracted_images")))
+
+
+def test_unchanged_document_is_skipped(tmp_path, pdf_path):
+    state = str(tmp_path / "state.json")
+    manifest = SourceManifest(state, settings=extraction_settings({'naming': "digest"}))
+    assert not manifest.is_unchanged(pdf_path)
+    manifest.update(pdf_path, file_fingerprint(pdf_path), [pdf_path])
+    manifest.save()
+
+    reloaded = SourceManifest(state, settings=extraction_settings({'naming': "digest"}))
+    assert reloaded.is_unchanged(pdf_path)
+    assert reloaded.outputs(pdf_path) == [os.path.abspath(pdf_path)]
+
+
+def test_changed_settings_invalidate_entry(tmp_path, pdf_path):
+    state = str(tmp_path / "state.json")
+    with SourceManifest(state, settings=extraction_settings({'pages': ((1, 1),)})) as manifest:
+        manifest.update(pdf_path, file_fingerprint(pdf_path), [])
+
+    assert SourceManifest(state, settings=extraction_settings({'pages': ((1, 1),)})).is_unchanged(pdf_path)
+    assert not SourceManifest(state, settings=extraction_settings({})).is_unchanged(pdf_path)
+    assert not SourceManifest(state, settings=extraction_settings({'pages': ((1, 2),)})).is_unchanged(pdf_path)
+
+
+def test_settings_survive_json_round_trip():
+    from extractor_core import ImageFilter
+    from profiles import get_profile
+    settings = extraction_settings({'image_filter': ImageFilter(min_width=10), 'profile': get_profile("web"),
+                                    'thumbnail_sizes': (128, 512), 'slides': ((2, None),)})
+    assert json.loads(json.dumps(settings)) == settings
+
+
+def test_partial_run_does_not_hide_full_run(tmp_path, pdf_path):
+    state = str(tmp_path / "state.json")
+    cli_extractor.main([pdf_path, "--incremental", state, "--pages", "1", "--naming", "digest"])
+    assert len(_outputs(pdf_path)) == 1
+
+    cli_extractor.main([pdf_path, "--incremental", state, "--naming", "digest"])
+    assert len(_outputs(pdf_path)) == 4
+
+    # اجرای دوم با همان گزینه‌ها رد می‌شود
+    os.remove(os.path.join(os.path.dirname(pdf_path), "extracted_images", _outputs(pdf_path)[0]))
+    cli_extractor.main([pdf_path, "--incremental", state, "--naming", "digest"])
+    assert len(_outputs(pdf_path)) == 3
+
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path, pdf_path):
+    state = str(tmp_path / "state.json")
+    with SourceManifest(state) as manifest:
+        manifest.update(pdf_path, file_fingerprint(pdf_path), [])
+    stat = os.stat(pdf_path)
+    os.utime(pdf_path, (stat.st_atime, stat.st_mtime + 100))
+
+    with SourceManifest(state) as manifest:
+        assert manifest.is_unchanged(pdf_path)
+    # mtime تازه ذخیره شده تا اجرای بعدی دوباره چکیده را نخواند
+    with open(state, encoding="utf-8") as fp:
+        (entry,) = json.load(fp)['documents'].values()
+    assert entry['mtime'] == os.path.getmtime(pdf_path)
+
+
+def test_modified_content_is_changed(tmp_path, docx_path):
+    state = str(tmp_path / "state.json")
+    with SourceManifest(state) as manifest:
+        manifest.update(docx_path, file_fingerprint(docx_path), [])
+    stat = os.stat(docx_path)
+    with open(docx_path, "r+b") as fp:
+        fp.seek(-1, os.SEEK_END)
+        last = fp.read(1)
+        fp.seek(-1, os.SEEK_END)
+        fp.write(bytes([last[0] ^ 0xFF]))
+    os.utime(docx_path, (stat.st_atime, stat.st_mtime + 100))
+    assert not SourceManifest(state).is_unchanged(docx_path)
+
+
+def test_algorithm_change_discards_state(tmp_path, pdf_path):
+    state = str(tmp_path / "state.json")
+    with SourceManifest(state, "blake2b") as manifest:
+        manifest.update(pdf_path, file_fingerprint(pdf_path, "blake2b"), [])
+    assert SourceManifest(state, "blake2b").is_unchanged(pdf_path)
+    assert not SourceManifest(state, "sha256").is_unchanged(pdf_path)
@@ -0,0 +1,37 @@
+import shutil
+
+import extractor_core
+from cli_extractor import dedup_entries_for_memory, extract_images, open_dedup_index
+from conftest import extracted_files
+
+
+def test_memory_limit_output_matches_normal_run(tmp_path, pdf_path, monkeypatch):
+    bounded_path = tmp_path / "bounded" / "sample.pdf"
+    bounded_path.parent.mkdir()
+    shutil.copy(pdf_path, bounded_path)
+
+    released = []
+    release = extractor_core._release_reader_cache
+
+    def tracking_release(reader):
+        release(reader)
+        released.append(len(reader.resolved_objects))
+
+    monkeypatch.setattr(extractor_core, "_release_reader_cache", tracking_release)
+    extract_images(pdf_path, naming="digest")
+    assert released == []
+
+    # سقف بسیار کوچک: هشدار می‌دهد ولی خروجی نباید تغییر کند
+    extract_images(str(bounded_path), naming="digest", memory_limit=1024 * 1024)
+    assert released == [0, 0, 0, 0]
+    assert extracted_files(str(bounded_path)) == extracted_files(pdf_path)
+
+
+def test_dedup_entries_for_memory(tmp_path):
+    assert dedup_entries_for_memory(None) is None
+    assert dedup_entries_for_memory(1024 * 1024) == 10000
+    assert dedup_entries_for_memory(400 * 1024 * 1024) == 102400
+    assert open_dedup_index().max_entries is None
+    assert open_dedup_index(memory_limit=400 * 1024 * 1024).max_entries == 102400
+    with open_dedup_index(str(tmp_path / "index.sqlite"), memory_limit=1024 * 1024) as index:
+        assert index.max_entries == 10000
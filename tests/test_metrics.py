@@ -0,0 +1,120 @@
+import json
+import os
+import pstats
+
+import metrics
+from cli_extractor import extract_images
+from metrics import Metrics, collecting, count, profile_document, stage
+
+
+def test_stage_and_count_only_inside_collecting():
+    with stage("load"):
+        count("pages")
+    assert metrics.active() is None
+
+    collected = Metrics()
+    with collecting(collected):
+        assert metrics.active() is collected
+        for _ in range(3):
+            with stage("load"):
+                count("pages")
+        count("bytes_in", 100)
+    assert metrics.active() is None
+    assert collected.stages["load"][0] == 3
+    assert collected.counters == {"pages": 3, "bytes_in": 100}
+    assert collected.elapsed >= collected.stages["load"][1]
+
+
+def test_collecting_none_is_a_no_op():
+    with collecting(None) as collected:
+        assert collected is None
+        with stage("load"):
+            count("pages")
+    assert metrics.active() is None
+
+
+def test_merge_without_elapsed():
+    worker = Metrics()
+    worker.observe("convert", 0.5)
+    worker.count("images_out", 2)
+    worker.elapsed = 3.0
+
+    parent = Metrics()
+    parent.observe("convert", 0.25)
+    parent.elapsed = 1.0
+    parent.merge(worker.as_dict(), include_elapsed=False)
+    assert parent.stages["convert"] == (2, 0.75)
+    assert parent.counters == {"images_out": 2}
+    assert parent.elapsed == 1.0
+    parent.merge(worker.as_dict())
+    assert parent.elapsed == 4.0
+
+
+def test_prometheus_format():
+    collected = Metrics()
+    collected.observe("write", 0.25)
+    collected.observe("custom", 1.0)
+    collected.observe("open", 0.5)
+    collected.count("pages", 4)
+    collected.elapsed = 2.0
+    assert collected.to_prometheus("x").splitlines() == [
+        "# HELP x_stage_seconds_total Time spent in each extraction stage.",
+        "# TYPE x_stage_seconds_total counter",
+        'x_stage_seconds_total{stage="open"} 0.500000',
+        'x_stage_seconds_total{stage="write"} 0.250000',
+        'x_stage_seconds_total{stage="custom"} 1.000000',
+        "# TYPE x_stage_calls_total counter",
+        'x_stage_calls_total{stage="open"} 1',
+        'x_stage_calls_total{stage="write"} 1',
+        'x_stage_calls_total{stage="custom"} 1',
+        "# TYPE x_pages_total counter",
+        "x_pages_total 4",
+        "# TYPE x_elapsed_seconds gauge",
+        "x_elapsed_seconds 2.000000",
+    ]
+
+
+def test_export_writes_temp_file_then_renames(tmp_path, monkeypatch):
+    collected = Metrics()
+    collected.count("pages", 2)
+    replaced = []
+    replace = os.replace
+
+    def tracking_replace(source, target):
+        with open(source, encoding="utf-8") as fp:
+            replaced.append((source, target, fp.read()))
+        replace(source, target)
+
+    monkeypatch.setattr(os, "replace", tracking_replace)
+    json_path, prom_path = str(tmp_path / "metrics.json"), str(tmp_path / "metrics.prom")
+    collected.export(json_path)
+    collected.export(prom_path)
+
+    assert [(source, target) for source, target, _ in replaced] == [
+        (f"{json_path}.tmp", json_path), (f"{prom_path}.tmp", prom_path)]
+    with open(json_path, encoding="utf-8") as fp:
+        assert json.load(fp)["counters"] == {"pages": 2}
+    with open(prom_path, encoding="utf-8") as fp:
+        assert fp.read() == replaced[1][2] == collected.to_prometheus()
+    assert sorted(os.listdir(tmp_path)) == ["metrics.json", "metrics.prom"]
+
+
+def test_extraction_records_stages(pdf_path):
+    collected = Metrics()
+    extract_images(pdf_path, metrics=collected)
+    assert collected.counters["pages"] == 4
+    assert collected.counters["images_out"] == 4
+    assert {"open", "load", "hash", "write"} <= set(collected.stages)
+
+
+def test_profile_document_writes_stats(tmp_path, pdf_path):
+    profile_dir = str(tmp_path / "profiles")
+    with profile_document(pdf_path, None):
+        pass
+    assert not os.path.exists(profile_dir)
+
+    with profile_document(pdf_path, profile_dir):
+        sum(range(1000))
+    (name,) = os.listdir(profile_dir)
+    assert name.endswith(".prof")
+    assert pstats.Stats(os.path.join(profile_dir, name)).total_calls > 0
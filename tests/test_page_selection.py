@@ -0,0 +1,76 @@
+import pytest
+
+import cli_extractor
+from conftest import image_bytes, write_zip
+from extractor_core import iter_images, parse_page_ranges, select_pages
+
+_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_IMAGE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+_SLIDE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+
+
+def _relationships(*targets):
+    items = "".join(f'<Relationship Id="rId{index}" Type="{kind}" Target="{target}"/>'
+                    for index, (kind, target) in enumerate(targets, 1))
+    return f'<Relationships xmlns="{_RELS}">{items}</Relationships>'
+
+
+@pytest.fixture
+def pptx_path(tmp_path):
+    """ارائه سه اسلایدی که ترتیب نمایشش با شماره فایل‌ها فرق دارد (slide3، slide1، slide2)"""
+    presentation = ('<p:presentation xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+                    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><p:sldIdLst>'
+                    '<p:sldId id="256" r:id="rId3"/><p:sldId id="257" r:id="rId1"/><p:sldId id="258" r:id="rId2"/>'
+                    '</p:sldIdLst></p:presentation>')
+    return write_zip(tmp_path / "deck.pptx", {
+        "ppt/presentation.xml": presentation,
+        "ppt/_rels/presentation.xml.rels": _relationships(
+            (_SLIDE, "slides/slide1.xml"), (_SLIDE, "slides/slide2.xml"), (_SLIDE, "slides/slide3.xml")),
+        "ppt/slides/slide1.xml": "<p:sld/>",
+        "ppt/slides/slide2.xml": "<p:sld/>",
+        "ppt/slides/slide3.xml": "<p:sld/>",
+        "ppt/slides/_rels/slide1.xml.rels": _relationships((_IMAGE, "../media/one.png")),
+        "ppt/slides/_rels/slide2.xml.rels": _relationships((_IMAGE, "../media/two.png"),
+                                                           (_IMAGE, "../media/one.png")),
+        "ppt/slides/_rels/slide3.xml.rels": _relationships((_IMAGE, "/ppt/media/three.png")),
+        "ppt/media/one.png": image_bytes((1, 0, 0)),
+        "ppt/media/two.png": image_bytes((2, 0, 0)),
+        "ppt/media/three.png": image_bytes((3, 0, 0)),
+        "ppt/media/unused.png": image_bytes((4, 0, 0)),
+    })
+
+
+def test_parse_page_ranges():
+    assert parse_page_ranges("1-3, 10,5-") == ((1, 3), (10, 10), (5, None))
+    for spec in ("0", "3-1", "a-b", "1,,2"):
+        with pytest.raises(ValueError):
+            parse_page_ranges(spec)
+
+
+def test_select_pages():
+    assert select_pages(None, 3) == range(3)
+    assert select_pages(parse_page_ranges("2-3,1-2,9"), 4) == [0, 1, 2]
+    assert select_pages(parse_page_ranges("3-"), 5) == [2, 3, 4]
+
+
+def test_pdf_pages_selected(pdf_path):
+    images = list(iter_images(pdf_path, pages=parse_page_ranges("2,4-")))
+    assert [image.page for image in images] == [1, 3]
+
+
+def test_all_slides_read_whole_media_folder(pptx_path):
+    members = [image.member for image in iter_images(pptx_path)]
+    assert sorted(members) == ["ppt/media/one.png", "ppt/media/three.png", "ppt/media/two.png",
+                               "ppt/media/unused.png"]
+
+
+def test_slides_follow_presentation_order(pptx_path):
+    images = [(image.page, image.member) for image in iter_images(pptx_path, slides=parse_page_ranges("1-"))]
+    assert images == [(0, "ppt/media/three.png"), (1, "ppt/media/one.png"), (2, "ppt/media/two.png")]
+    images = [(image.page, image.member) for image in iter_images(pptx_path, slides=parse_page_ranges("3"))]
+    assert images == [(2, "ppt/media/two.png"), (2, "ppt/media/one.png")]
+
+
+def test_cli_rejects_bad_selection(pdf_path):
+    with pytest.raises(SystemExit):
+        cli_extractor.main([pdf_path, "--pages", "0-2"])
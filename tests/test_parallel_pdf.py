@@ -0,0 +1,41 @@
+import shutil
+
+import pytest
+from PIL import Image
+
+from cli_extractor import extract_images
+from conftest import extracted_files
+from extractor_core import parse_page_ranges
+
+
+@pytest.fixture
+def repeated_pdf(tmp_path):
+    """PDF هشت صفحه‌ای که هر صفحه یکی از سه تصویر را تکرار می‌کند"""
+    colors = [(200, 0, 0), (0, 200, 0), (0, 0, 200)]
+    pages = [Image.new("RGB", (50, 50), colors[index % 3]) for index in range(8)]
+    path = tmp_path / "repeated.pdf"
+    pages[0].save(path, "PDF", save_all=True, append_images=pages[1:])
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_duplicates_skipped_across_page_ranges(repeated_pdf, workers):
+    extract_images(repeated_pdf, workers=workers)
+    outputs = list(extracted_files(repeated_pdf).values())
+    assert len(outputs) == 3
+    assert len(set(outputs)) == 3
+
+
+def test_parallel_output_matches_serial(tmp_path, pdf_path):
+    extract_images(pdf_path)
+    serial = sorted(extracted_files(pdf_path).values())
+    parallel_path = tmp_path / "parallel" / "sample.pdf"
+    parallel_path.parent.mkdir()
+    shutil.copy(pdf_path, parallel_path)
+    extract_images(str(parallel_path), workers=4)
+    assert sorted(extracted_files(str(parallel_path)).values()) == serial
+    assert len(serial) == 4
+
+
+def test_parallel_pages_respect_selection(pdf_path):
+    assert len(extract_images(pdf_path, workers=2, pages=parse_page_ranges("2-3"))) == 2
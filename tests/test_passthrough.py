@@ -0,0 +1,48 @@
+import pytest
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DecodedStreamObject, FloatObject, NameObject, NumberObject
+
+from cli_extractor import extract_images
+from conftest import extracted_files
+
+
+def _embedded_streams(pdf_path):
+    """بایت‌های کدشده XObjectهای تصویری هر صفحه"""
+    return [xobject.get_object().get_data() for page in PdfReader(pdf_path).pages
+            for xobject in page["/Resources"]["/XObject"].values()]
+
+
+def _soft_mask(xobject):
+    mask = DecodedStreamObject()
+    mask.set_data(bytes([128]) * (xobject["/Width"] * xobject["/Height"]))
+    mask.update({NameObject("/Width"): NumberObject(xobject["/Width"]),
+                 NameObject("/Height"): NumberObject(xobject["/Height"]),
+                 NameObject("/ColorSpace"): NameObject("/DeviceGray"),
+                 NameObject("/BitsPerComponent"): NumberObject(8)})
+    return mask
+
+
+def _inverted_decode(xobject):
+    return ArrayObject([FloatObject(value) for value in (1, 0) * 3])
+
+
+def test_dct_stream_copied_byte_for_byte(pdf_path):
+    extract_images(pdf_path)
+    assert sorted(extracted_files(pdf_path).values()) == sorted(_embedded_streams(pdf_path))
+
+
+@pytest.mark.parametrize("key, make_value", [("/SMask", _soft_mask), ("/Decode", _inverted_decode)])
+def test_masked_or_decoded_image_falls_back(tmp_path, pdf_path, key, make_value):
+    writer = PdfWriter(clone_from=pdf_path)
+    for page in writer.pages:
+        for xobject in page["/Resources"]["/XObject"].values():
+            xobject = xobject.get_object()
+            xobject[NameObject(key)] = make_value(xobject)
+    masked_path = tmp_path / "masked" / "masked.pdf"
+    masked_path.parent.mkdir()
+    writer.write(masked_path)
+
+    extract_images(str(masked_path))
+    outputs = extracted_files(str(masked_path)).values()
+    assert len(outputs) == 4
+    assert not set(outputs) & set(_embedded_streams(str(masked_path)))
@@ -0,0 +1,99 @@
+import io
+import os
+import random
+
+import pytest
+from PIL import Image
+
+import cli_extractor
+from cli_extractor import extract_images
+from dedup import DedupIndex, content_key
+from conftest import write_zip
+from perceptual import BKTree, NearDuplicateIndex, dhash, hamming_distance
+
+
+def _gradient(size=(64, 48), flip=False):
+    """تصویر گرادیان؛ با flip جهت روشنایی برعکس می‌شود"""
+    width, height = size
+    image = Image.new("L", size)
+    image.putdata([(255 - x * 255 // width) if flip else x * 255 // width for y in range(height) for x in range(width)])
+    return image.convert("RGB")
+
+
+def _encode(image, image_format, **params):
+    output = io.BytesIO()
+    image.save(output, image_format, **params)
+    return output.getvalue()
+
+
+def test_reencoded_image_keeps_its_hash():
+    image = _gradient()
+    png = dhash(_encode(image, "PNG"))
+    jpeg = dhash(_encode(image.resize((32, 24)), "JPEG", quality=60))
+    assert hamming_distance(png, jpeg) <= 4
+    assert hamming_distance(png, dhash(_encode(_gradient(flip=True), "PNG"))) > 32
+
+
+def test_undecodable_data_has_no_hash():
+    assert dhash(b"not an image") is None
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    tree = BKTree()
+    for index, value in enumerate(values):
+        tree.add(value, index)
+    assert len(tree) == 300
+    for probe in values[:20]:
+        target = probe ^ (1 << rng.randrange(64))
+        best = min(hamming_distance(target, value) for value in values)
+        distance, index = tree.find(target, 6)
+        assert distance == best == hamming_distance(target, values[index])
+    assert BKTree().find(values[0], 6) is None
+
+
+def test_index_rejects_invalid_distance():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(64)
+
+
+def test_near_duplicates_skipped_during_extraction(tmp_path):
+    image = _gradient((120, 90))
+    path = write_zip(tmp_path / "scans.docx", {
+        "word/media/original.png": _encode(image, "PNG"),
+        "word/media/recompressed.jpeg": _encode(image, "JPEG", quality=50),
+        "word/media/other.png": _encode(_gradient((120, 90), flip=True), "PNG"),
+    })
+    outputs = extract_images(path, dedup=DedupIndex(near_distance=6))
+    assert sorted(os.path.splitext(output)[1] for output in outputs) == [".png", ".png"]
+    assert len(extract_images(path)) == 3
+
+
+def test_fingerprint_added_only_after_write():
+    index = DedupIndex(near_distance=6)
+    fingerprint = dhash(_encode(_gradient(), "PNG"))
+    first, second, third = (content_key(bytes([value])) for value in range(3))
+    assert index.add_near(first, fingerprint) is None
+    # تصویر اول هنوز نوشته نشده است
+    assert index.add_near(second, fingerprint) is None
+    index.record(first, "first.png")
+    assert index.add_near(third, fingerprint) == first
+
+
+def test_failed_conversion_does_not_hide_near_duplicate(tmp_path, monkeypatch):
+    image = _gradient((120, 90))
+    path = write_zip(tmp_path / "scans.docx", {
+        "word/media/original.png": _encode(image, "PNG"),
+        "word/media/recompressed.jpeg": _encode(image, "JPEG", quality=50),
+    })
+    render = cli_extractor.render_image
+
+    def failing_render(image_name, *args):
+        if image_name == "original.png":
+            return None, None, None
+        return render(image_name, *args)
+
+    monkeypatch.setattr(cli_extractor, "render_image", failing_render)
+    outputs = extract_images(path, dedup=DedupIndex(near_distance=6))
+    assert [os.path.splitext(output)[1] for output in outputs] == [".jpg"]
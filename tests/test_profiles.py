@@ -0,0 +1,61 @@
+import io
+
+import pytest
+from PIL import Image, features
+
+from conftest import image_bytes
+from profiles import PROFILES, get_profile, jp2_reduce_factor, open_reduced, transcode
+
+
+def _size(data):
+    with Image.open(io.BytesIO(data)) as image:
+        return image.format, image.size
+
+
+def test_get_profile_overrides():
+    profile = get_profile("preview", quality=40, max_dimension=64)
+    assert profile.params['quality'] == 40
+    assert profile.max_dimension == 64
+    assert get_profile("archive", quality=40).params == PROFILES["archive"].params
+    with pytest.raises(ValueError):
+        get_profile("unknown")
+
+
+def test_jpeg_draft_decodes_at_reduced_scale():
+    data = image_bytes((90, 120, 30), "JPEG", size=(800, 600))
+    with open_reduced(data, 100) as image:
+        # draft فقط مقیاس‌های 1/2 تا 1/8 را تولید می‌کند و از اندازه خواسته شده کوچک‌تر نمی‌شود
+        assert image.size == (200, 150)
+    with open_reduced(data) as image:
+        assert image.size == (800, 600)
+
+
+def test_jp2_reduce_factor():
+    assert jp2_reduce_factor((4000, 3000), 512) == 2
+    assert jp2_reduce_factor((4000, 3000), 512, levels=1) == 1
+    assert jp2_reduce_factor((400, 300), 512) == 0
+
+
+@pytest.mark.skipif(not features.check("jpg_2000"), reason="Pillow بدون OpenJPEG")
+def test_jp2_reduce_decodes_at_reduced_scale():
+    data = image_bytes((10, 200, 90), "JPEG2000", size=(1024, 512))
+    with open_reduced(data, 200) as image:
+        assert image.size == (256, 128)
+
+
+def test_preview_profile_resizes_in_one_pass():
+    format_, size = _size(transcode(image_bytes((1, 2, 3), "JPEG", size=(1600, 1200)), ".jpg",
+                                    get_profile("preview"))[1])
+    assert (format_, size) == ("JPEG", (512, 384))
+
+
+def test_fast_profile_copies_non_jp2():
+    data = image_bytes((4, 5, 6))
+    assert transcode(data, ".png", get_profile("fast")) == (".png", data)
+
+
+def test_archive_keeps_smaller_original():
+    data = image_bytes((7, 8, 9))
+    ext, output = transcode(data, ".png", get_profile("archive"))
+    assert ext == ".png"
+    assert len(output) <= len(data)
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+import service
+
+
+@pytest.fixture
+def extraction_service(tmp_path):
+    svc = service.ExtractionService(jobs=1, state_dir=str(tmp_path / "state")).start()
+    yield svc
+    svc.close()
+
+
+def test_worker_slot_replaces_stuck_worker():
+    slot = service._WorkerSlot()
+    try:
+        pid = slot.pid
+        started = time.monotonic()
+        with pytest.raises(service.JobTimeout):
+            slot.run(time.sleep, (60,), timeout=0.5)
+        assert time.monotonic() - started < 10
+        assert slot.pid != pid
+        assert slot.restarts == 1
+        # کارگر جایگزین بلافاصله کار بعدی را می‌پذیرد
+        assert slot.run(sum, ([1, 2, 3],), timeout=10) == 6
+    finally:
+        slot.close()
+
+
+def test_worker_slot_reports_errors():
+    slot = service._WorkerSlot()
+    try:
+        with pytest.raises(RuntimeError):
+            slot.run(int, ("not a number",))
+        assert slot.restarts == 0
+    finally:
+        slot.close()
+
+
+def test_job_runs_and_records_manifest(extraction_service, docx_path):
+    job = extraction_service.submit(docx_path, {"naming": "digest"})
+    assert job.done.wait(60)
+    assert job.status == "done"
+    assert len(job.outputs) == 3
+    assert len(job.as_dict(include_manifest=True)['manifest']) == 3
+    stats = extraction_service.stats()
+    assert stats['running'] == 0
+    assert stats['jobs']['done'] == 1
+
+
+def test_submit_rejects_unknown_file(extraction_service, tmp_path):
+    with pytest.raises(ValueError):
+        extraction_service.submit(str(tmp_path / "missing.pdf"))
+
+
+@pytest.mark.parametrize("options", [
+    {"min_width": "wide"},
+    {"min_bytes": 1.5},
+    {"min_height": True},
+    {"max_pixels": -1},
+    {"workers": "many"},
+    {"quality": 80},
+    {"output_profile": "web", "quality": 0},
+    {"passthrough": "no"},
+    {"timeout": "soon"},
+    {"naming": 3},
+    {"sink": "tar:x"},
+    {"sink": "zip:"},
+    {"sink": "pack:/tmp/elsewhere.pack"},
+    {"sink": "pack:../../images.pack"},
+    {"colour": "red"},
+])
+def test_job_options_rejects_bad_types(options):
+    with pytest.raises(ValueError):
+        service.job_options(options)
+
+
+def test_job_options_coerces_numeric_strings():
+    extract_options, timeout = service.job_options({"min_width": "32", "workers": 2, "timeout": 5})
+    assert extract_options['image_filter'].min_width == 32
+    assert extract_options['workers'] == 2
+    assert timeout == 5.0
+    assert service.job_options({"sink": "pack"})[0]['sink'] == "pack"
+
+
+def test_http_rejects_bad_options_with_400(extraction_service, docx_path):
+    server = service.make_server(extraction_service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = service.ServiceClient(f"127.0.0.1:{server.server_address[1]}", timeout=30)
+        with pytest.raises(RuntimeError, match="^400"):
+            client.submit(docx_path, min_width="wide")
+        assert client.health()['jobs']['done'] == 0
+        job = client.submit(docx_path, wait=True, min_width="1")
+        assert job['status'] == "done"
+        for wait in ("abc", "-1", "nan", "inf"):
+            with pytest.raises(RuntimeError, match="^400"):
+                client.job(job['id'], wait=wait)
+        assert client.job(job['id'], wait="0.5")['status'] == "done"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,79 @@
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import cli_extractor
+from dedup import content_key
+from sinks import ArchiveReader, PackSink, TarSink, ZipSink, location_exists, open_sink, split_location
+
+SINK_CLASSES = {"tar": TarSink, "zip": ZipSink, "pack": PackSink}
+
+
+def _members(container):
+    if container.endswith(".tar"):
+        with tarfile.open(container) as archive:
+            return archive.getnames()
+    if container.endswith(".zip"):
+        with zipfile.ZipFile(container) as archive:
+            return archive.namelist()
+    return None
+
+
+@pytest.mark.parametrize("kind", sorted(SINK_CLASSES))
+def test_sink_round_trip_by_digest(tmp_path, kind):
+    container = str(tmp_path / f"images.{kind}")
+    first, second = b"first image", b"second image" * 100
+    with SINK_CLASSES[kind](container) as sink:
+        location = sink.write("a.png", first, content_key(first))
+        sink.write("b.png", second, content_key(second))
+        assert sink.read(content_key(second).digest) == second
+        assert sink.size(location) == len(first)
+    assert split_location(location) == (container, "a.png")
+    assert location_exists(location)
+
+    reader = ArchiveReader(container)
+    assert len(reader) == 2
+    assert reader.read(content_key(first).digest) == first
+    assert reader.read(content_key(second).digest) == second
+    assert reader.read("missing") is None
+
+
+@pytest.mark.parametrize("kind", sorted(SINK_CLASSES))
+def test_sink_rerun_does_not_duplicate(tmp_path, kind):
+    container = str(tmp_path / f"images.{kind}")
+    data = b"image bytes" * 50
+    with SINK_CLASSES[kind](container) as sink:
+        first_location = sink.write("a.png", data, content_key(data))
+        # در همان اجرا هم (پیش از نوشتن بافر pack) تکراری اضافه نمی‌شود
+        assert sink.write("again.png", data, content_key(data)) == first_location
+    size = os.path.getsize(container)
+
+    with SINK_CLASSES[kind](container) as sink:
+        location = sink.write("b.png", data, content_key(data))
+        assert location == first_location
+        assert sink.count == 0
+        assert sink.size(location) == len(data)
+    assert os.path.getsize(container) == size
+    assert len(ArchiveReader(container)) == 1
+    with open(f"{container}.idx", encoding="utf-8") as fp:
+        assert len(fp.readlines()) == 1
+    assert _members(container) in (None, ["a.png"])
+
+
+def test_open_sink_rejects_unknown_kind(tmp_path):
+    assert open_sink("dir", str(tmp_path), "doc.pdf") is None
+    with pytest.raises(ValueError):
+        open_sink("tar:elsewhere.tar", str(tmp_path), "doc.pdf")
+
+
+@pytest.mark.parametrize("kind", ["tar", "zip", "pack"])
+def test_cli_rerun_with_sink_keeps_single_copy(docx_path, kind):
+    for _ in range(2):
+        cli_extractor.main([docx_path, "--sink", kind, "--naming", "digest"])
+    output = os.path.join(os.path.dirname(docx_path), "extracted_images")
+    container = os.path.join(output, "images.pack" if kind == "pack" else f"sample.docx.{kind}")
+    assert len(ArchiveReader(container)) == 3
+    members = _members(container)
+    assert members is None or len(members) == 3
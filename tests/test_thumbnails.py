@@ -0,0 +1,63 @@
+import io
+import json
+import os
+
+import pytest
+from PIL import Image
+
+import metrics
+from cli_extractor import extract_images
+from conftest import image_bytes
+from profiles import parse_thumbnail_sizes, thumbnails_from_data
+from writer import ImageWriter
+
+
+def test_parse_thumbnail_sizes():
+    assert parse_thumbnail_sizes("512, 128,128") == (128, 512)
+    for spec in ("", "0", "big"):
+        with pytest.raises(ValueError):
+            parse_thumbnail_sizes(spec)
+
+
+def test_thumbnails_fit_requested_sizes():
+    thumbnails = thumbnails_from_data(image_bytes((10, 20, 30), size=(400, 200)), ".png", (50, 100))
+    assert [(t.size, t.dimensions) for t in thumbnails] == [(50, (50, 25)), (100, (100, 50))]
+    for thumbnail in thumbnails:
+        assert thumbnail.ext == ".jpg"
+        with Image.open(io.BytesIO(thumbnail.data)) as image:
+            assert image.format == "JPEG"
+
+
+def test_writer_returns_untokened_results(tmp_path):
+    with ImageWriter(2, fsync_batch=2) as writer:
+        writer.write(str(tmp_path / "a.bin"), b"a", "token")
+        writer.write(str(tmp_path / "a.thumb.bin"), b"b", counter="thumbnails_out")
+        results = {path: token for token, path in writer.close()}
+    assert results == {str(tmp_path / "a.bin"): "token", str(tmp_path / "a.thumb.bin"): None}
+    assert writer.stats()['fsync_batches'] == 1
+
+
+@pytest.mark.parametrize("write_options", [{}, {'write_workers': 2, 'fsync_batch': 2},
+                                           {'convert_workers': 2, 'write_workers': 2}])
+def test_thumbnails_written_beside_images(tmp_path, docx_path, write_options):
+    manifest_path = str(tmp_path / "images.jsonl")
+    collector = metrics.Metrics()
+    outputs = extract_images(docx_path, naming="digest", thumbnail_sizes=(16,), manifest_path=manifest_path,
+                             metrics=collector, **write_options)
+
+    assert len(outputs) == 3
+    assert not any(".thumb" in path for path in outputs)
+    output_dir = os.path.dirname(outputs[0])
+    thumbnails = sorted(name for name in os.listdir(output_dir) if ".thumb16" in name)
+    assert len(thumbnails) == 3
+    with open(manifest_path, encoding="utf-8") as fp:
+        records = [json.loads(line) for line in fp]
+    assert len(records) == 3
+    for record in records:
+        (thumbnail,) = record['thumbnails']
+        assert os.path.exists(thumbnail['output'])
+        assert max(thumbnail['width'], thumbnail['height']) == 16
+    counters = collector.as_dict()['counters']
+    assert counters['images_out'] == 3
+    assert counters['thumbnails_out'] == 3
+    assert collector.stages['thumbnail'][0] == 3
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from writer import ImageWriter, latency_percentiles
+
+
+def test_latency_percentiles_nearest_rank():
+    assert latency_percentiles([]) == {}
+    assert latency_percentiles([0.3]) == {50: 0.3, 95: 0.3, 99: 0.3}
+    assert latency_percentiles([4, 1, 3, 2]) == {50: 2, 95: 4, 99: 4}
+    assert latency_percentiles(list(range(1, 101)), (1, 50, 100)) == {1: 1, 50: 50, 100: 100}
+
+
+def test_writes_files_and_returns_tokens(tmp_path):
+    with ImageWriter(workers=2) as writer:
+        for index in range(5):
+            writer.write(str(tmp_path / "out" / f"{index}.bin"), bytes([index]) * 10, token=index)
+        results = writer.close()
+    assert sorted(results) == [(index, str(tmp_path / "out" / f"{index}.bin")) for index in range(5)]
+    assert (tmp_path / "out" / "3.bin").read_bytes() == bytes([3]) * 10
+    stats = writer.stats()
+    assert (stats['files'], stats['bytes'], stats['fsync_batches']) == (5, 50, 0)
+
+
+def test_fsync_batches_include_remainder(tmp_path):
+    writer = ImageWriter(workers=2, fsync_batch=3)
+    for index in range(7):
+        writer.write(str(tmp_path / f"{index}.bin"), b"data")
+    writer.close()
+    # دو دسته کامل سه‌تایی و یک دسته باقی‌مانده هنگام close
+    stats = writer.stats()
+    assert (stats['files'], stats['fsync_batches']) == (7, 3)
+    assert set(stats['fsync_latency']) == {50, 95, 99}
+
+
+def test_write_error_reaches_close(tmp_path):
+    taken = tmp_path / "taken"
+    taken.mkdir()
+    writer = ImageWriter(workers=1)
+    writer.write(str(tmp_path / "ok.bin"), b"ok")
+    writer.write(str(taken), b"not a file")
+    with pytest.raises(OSError):
+        writer.close()
+    assert os.path.exists(tmp_path / "ok.bin")
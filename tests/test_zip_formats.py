@@ -0,0 +1,89 @@
+import zipfile
+
+import pytest
+
+import cli_extractor
+from cli_extractor import extract_images
+from conftest import extracted_files, image_bytes, write_zip
+from extractor_core import ZIP_FORMATS, get_backend, iter_images, iter_zip_archive_images, sniff_image_extension, \
+    sniff_zip_format
+from utils import get_supported_formats, is_supported_format
+
+RED, GREEN = image_bytes((255, 0, 0)), image_bytes((0, 255, 0), "JPEG")
+
+SAMPLES = {
+    ".docx": {"[Content_Types].xml": '<Override ContentType="application/vnd.openxmlformats-officedocument.'
+                                     'wordprocessingml.document.main+xml"/>', "word/media/a.png": RED},
+    ".pptx": {"ppt/media/a.png": RED},
+    ".xlsx": {"[Content_Types].xml": '<Override ContentType="application/vnd.openxmlformats-officedocument.'
+                                     'spreadsheetml.sheet.main+xml"/>', "xl/media/a.png": RED},
+    ".odt": {"mimetype": "application/vnd.oasis.opendocument.text", "Pictures/a.png": RED},
+    ".ods": {"mimetype": "application/vnd.oasis.opendocument.spreadsheet", "Pictures/a.png": RED},
+    ".epub": {"mimetype": "application/epub+zip", "OEBPS/images/a.png": RED},
+    ".cbz": {"001.png": RED},
+}
+
+
+@pytest.mark.parametrize("ext", sorted(SAMPLES))
+def test_sniff_zip_format(tmp_path, ext):
+    path = write_zip(tmp_path / "unknown.bin", SAMPLES[ext])
+    with zipfile.ZipFile(path) as zip_ref:
+        assert sniff_zip_format(zip_ref) == ext
+
+
+def test_sniff_unknown_archive(tmp_path):
+    path = write_zip(tmp_path / "notes.zip", {"readme.txt": "hello"})
+    with zipfile.ZipFile(path) as zip_ref:
+        assert sniff_zip_format(zip_ref) is None
+    assert list(iter_zip_archive_images(path)) == []
+
+
+def test_plain_zip_is_not_registered(tmp_path):
+    assert ".zip" not in get_supported_formats()
+    assert not is_supported_format("bundle.zip")
+    assert get_backend("bundle.zip") is None
+    with pytest.raises(ValueError):
+        iter_images(str(tmp_path / "bundle.zip"))
+
+
+def test_zip_archive_images_explicit(tmp_path):
+    path = write_zip(tmp_path / "book.zip", SAMPLES[".epub"])
+    assert [image.member for image in iter_zip_archive_images(path)] == ["OEBPS/images/a.png"]
+
+
+def test_every_table_format_is_registered():
+    for ext in ZIP_FORMATS:
+        assert is_supported_format(f"document{ext.upper()}")
+
+
+@pytest.mark.parametrize("ext", [".xlsx", ".odt", ".epub"])
+def test_table_formats_read_media_only(tmp_path, ext):
+    members = dict(SAMPLES[ext])
+    members["thumbnail.png"] = GREEN
+    media_prefix = ZIP_FORMATS[ext].media_prefixes[0]
+    expected = [name for name in members if name.endswith(".png") and name.startswith(media_prefix)]
+    path = write_zip(tmp_path / f"document{ext}", members)
+    assert [image.member for image in iter_images(path)] == expected
+    assert [image.data for image in iter_images(path)] == [members[name] for name in expected]
+
+
+def test_comic_pages_in_natural_order(tmp_path):
+    path = write_zip(tmp_path / "comic.cbz", {"p10.png": RED, "p2.jpg": GREEN, "p1.png": RED, "notes.txt": "x"})
+    images = list(iter_images(path))
+    assert [(image.page, image.member) for image in images] == [(0, "p1.png"), (1, "p2.jpg"), (2, "p10.png")]
+
+
+def test_extensionless_member_is_typed_from_header(tmp_path):
+    path = write_zip(tmp_path / "deck.docx", {"word/media/image1": GREEN})
+    (image,) = list(iter_images(path))
+    assert image.ext in (".jpg", ".jpeg")
+    assert sniff_image_extension(RED[:16]) == ".png"
+
+
+def test_sniff_zip_is_opt_in(tmp_path):
+    path = write_zip(tmp_path / "book.zip", SAMPLES[".epub"])
+    assert extract_images(path) is None
+    assert [image.member for image in iter_images(path, sniff_zip=True)] == ["OEBPS/images/a.png"]
+
+    cli_extractor.main([path, "--sniff-zip"])
+    assert list(extracted_files(path).values()) == [RED]
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import extractor_core
+from conftest import image_bytes, write_zip
+from extractor_core import iter_images
+
+
+def _many_members(count=12):
+    return {f"word/media/image{index}.png": image_bytes((index, 0, 0)) for index in range(count)}
+
+
+def test_parallel_reads_match_serial_order(tmp_path):
+    path = write_zip(tmp_path / "many.docx", _many_members())
+    # بایت‌ها باید پیش از پیشروی مولد خوانده شوند؛ بایگانی با پایان پیمایش بسته می‌شود
+    serial = [(image.member, image.data) for image in iter_images(path)]
+    parallel = [(image.member, image.data) for image in iter_images(path, workers=4)]
+    assert parallel == serial
+    assert [member for member, _ in serial] == list(_many_members())
+
+
+def test_early_stop_cancels_reads_and_closes_handles(tmp_path, monkeypatch):
+    path = write_zip(tmp_path / "many.docx", _many_members())
+    created = []
+
+    class SlowReaders(extractor_core._ZipReaders):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.submitted = []
+            created.append(self)
+
+        def submit(self, file_info):
+            future = super().submit(file_info)
+            self.submitted.append(future)
+            return future
+
+        def _read(self, member):
+            if not member.endswith("image0.png"):
+                time.sleep(0.2)
+            return super()._read(member)
+
+    monkeypatch.setattr(extractor_core, "_ZipReaders", SlowReaders)
+    images = iter_images(path, workers=2)
+    first = next(images)
+    assert first.data == _many_members()[first.member]
+    images.close()
+
+    (readers,) = created
+    futures = readers.submitted
+    assert futures and all(future.done() for future in futures)
+    assert any(future.cancelled() for future in futures)
+    assert readers._handles and all(zip_ref.fp is None for zip_ref in readers._handles)
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("zip-reader")]